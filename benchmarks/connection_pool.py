@@ -0,0 +1,111 @@
+"""Benchmark of the connection pool settings (see :class:`.ConnectionAttributes`) on a local server with many host names.
+
+Each host name is resolved by a resolver that takes as long as a typical DNS lookup, and each response takes as long as
+a typical server. The pages of each host are fetched one after the other (like the crawling of one domain),
+while all hosts are crawled concurrently.
+Run with ``python benchmarks/connection_pool.py``.
+"""
+import asyncio
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+
+from scrawler.attributes import ConnectionAttributes
+from scrawler.utils.web_utils import async_get_html
+
+NO_HOSTS = 500
+NO_PAGES_PER_HOST = 5
+CONCURRENCY = 500  # like the parallel_processes of the Crawler
+DNS_LATENCY = 0.02  # in seconds
+SERVER_LATENCY = 0.1  # in seconds
+NO_REPETITIONS = 3
+
+HTML = "<!DOCTYPE html><html><head><title>Benchmark</title></head><body><p>Lorem ipsum dolor sit amet.</p></body></html>"
+
+
+class SlowResolver(AbstractResolver):
+    """Resolves every host name to the local server after ``DNS_LATENCY`` seconds and counts the lookups."""
+    lookups = 0
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> list:
+        SlowResolver.lookups += 1
+        await asyncio.sleep(DNS_LATENCY)
+        return [{"hostname": host, "host": "127.0.0.1", "port": port, "family": socket.AF_INET,
+                 "proto": 0, "flags": socket.AI_NUMERICHOST}]
+
+    async def close(self) -> None:
+        pass
+
+
+CONFIGURATIONS = {
+    # what the Crawler used before: aiohttp's default connector
+    "aiohttp defaults": ConnectionAttributes(limit=100, limit_per_host=0, dns_cache_ttl=10, keepalive_timeout=15,
+                                             resolver=SlowResolver),
+    "no keep-alive": ConnectionAttributes(keepalive_timeout=0, resolver=SlowResolver),
+    # host names are only resolved when a new connection is opened
+    "no keep-alive, no DNS cache": ConnectionAttributes(keepalive_timeout=0, dns_cache_ttl=0, resolver=SlowResolver),
+    "scrawler defaults": ConnectionAttributes(resolver=SlowResolver),
+}
+
+
+async def start_server() -> (web.AppRunner, int, set):
+    """Start the local server. Returns the runner, the port and the set of connections opened to the server."""
+    connections = set()
+
+    async def handle(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await asyncio.sleep(SERVER_LATENCY)
+        return web.Response(text=HTML, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{page}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, backlog=CONCURRENCY)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1], connections
+
+
+async def crawl(connection_attributes: ConnectionAttributes, port: int) -> None:
+    semaphore = asyncio.BoundedSemaphore(CONCURRENCY)
+    connector = connection_attributes.create_connector(default_limit=CONCURRENCY)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def crawl_host(host_no: int) -> None:
+            for page_no in range(NO_PAGES_PER_HOST):
+                async with semaphore:
+                    await async_get_html(f"http://host{host_no}.example.org:{port}/page{page_no}", session)
+
+        await asyncio.gather(*[crawl_host(i) for i in range(NO_HOSTS)])
+
+
+async def run_benchmark(connection_attributes: ConnectionAttributes) -> (float, int, int):
+    """Return the best time (in seconds) to crawl all hosts, and the number of DNS lookups and of connections opened in that run."""
+    runner, port, connections = await start_server()
+    try:
+        results = []
+        for _ in range(NO_REPETITIONS):
+            SlowResolver.lookups = 0
+            connections.clear()
+            start = time.perf_counter()
+            await crawl(connection_attributes, port)
+            results.append((time.perf_counter() - start, SlowResolver.lookups, len(connections)))
+        return min(results)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    no_requests = NO_HOSTS * NO_PAGES_PER_HOST
+    print(f"{no_requests} requests to {NO_HOSTS} hosts, {CONCURRENCY} concurrently "
+          f"(DNS latency {1000 * DNS_LATENCY:.0f} ms, server latency {1000 * SERVER_LATENCY:.0f} ms)")
+
+    results = {name: asyncio.run(run_benchmark(connection_attributes))
+               for name, connection_attributes in CONFIGURATIONS.items()}
+    baseline = results["aiohttp defaults"][0]
+    for name, (seconds, lookups, connections) in results.items():
+        print(f"{name:>28}: {seconds:6.2f} s  ({no_requests / seconds:6.0f} requests/s, {baseline / seconds:4.1f}x), "
+              f"{lookups:5d} DNS lookups, {connections:5d} connections")
@@ -0,0 +1,75 @@
+"""Benchmark of the HTML parser engines (see :mod:`scrawler.parsers`) on a fixed, synthetic HTML corpus.
+
+Each installed engine parses every document of the corpus and runs the built-in data extractors on it.
+Run with ``python benchmarks/html_parsers.py``.
+"""
+import random
+import statistics
+import time
+
+from scrawler.data_extractors import (CmsExtractor, ContactNameExtractor, DateExtractor, DescriptionExtractor,
+                                      KeywordsExtractor, LanguageExtractor, LinkExtractor, MobileOptimizedExtractor,
+                                      TermOccurrenceCountExtractor, TitleExtractor, WebsiteTextExtractor)
+from scrawler.parsers import HTML_PARSER, LXML, HTML5LIB, SELECTOLAX, is_parser_available
+from scrawler.utils.web_utils import StoredResponse
+from scrawler.website import Website
+
+SEED = 42
+NO_DOCUMENTS = 50
+NO_REPETITIONS = 3
+
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do", "eiusmod",
+         "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua", "crawler", "website", "data")
+
+EXTRACTORS = [CmsExtractor(), ContactNameExtractor(), DateExtractor(), DescriptionExtractor(), KeywordsExtractor(),
+              LanguageExtractor(), LinkExtractor(), MobileOptimizedExtractor(), TermOccurrenceCountExtractor("data"),
+              TitleExtractor(), WebsiteTextExtractor(mode="search_in_tags")]   # "auto" mode always parses with readability
+
+
+def generate_corpus(no_documents: int = NO_DOCUMENTS, seed: int = SEED) -> list:
+    """Generate HTML documents of varying size. The same seed always yields the same corpus."""
+    rng = random.Random(seed)
+
+    def sentence(length: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(length))
+
+    corpus = []
+    for i in range(no_documents):
+        body = []
+        for j in range(rng.randint(20, 200)):
+            body.append(f'<div class="section s{j % 7}"><h2>{sentence(4)}</h2><p>{sentence(rng.randint(10, 60))}</p>'
+                        f'<a href="/page/{i}/{j}">{sentence(2)}</a> <a href="https://other{j}.example.org/">{sentence(1)}</a>'
+                        f'<script>var x{j} = "{sentence(3)}";</script></div>')
+        if i % 5 == 0:
+            body.append('<div class="employee_name">Jane Doe</div>')
+        corpus.append(f'<!DOCTYPE html><html lang="en"><head><title>{sentence(5)}</title>'
+                      f'<meta name="description" content="{sentence(12)}"><meta name="keywords" content="{sentence(5)}">'
+                      f'<meta name="generator" content="WordPress 6.1"><meta name="pubdate" content="2021-02-03">'
+                      f'<meta name="viewport" content="width=device-width"><style>.s0 {{color: red;}}</style></head>'
+                      f'<body>{"".join(body)}</body></html>')
+    return corpus
+
+
+def run_benchmark(parser: str, corpus: list) -> float:
+    """Return the best total time (in seconds) to parse the corpus and run all extractors with the given parser engine."""
+    response = StoredResponse("https://www.example.com/page.html", 200, {"Content-Type": "text/html; charset=utf-8"})
+    timings = []
+    for _ in range(NO_REPETITIONS):
+        start = time.perf_counter()
+        for html in corpus:
+            website = Website(response.url, steps_from_start_page=1, html_parser=parser).parse(html, response)
+            for extractor in EXTRACTORS:
+                extractor.run(website)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    corpus = generate_corpus()
+    print(f"Corpus: {len(corpus)} documents, {sum(len(html) for html in corpus) / 1e6:.1f} MB (seed {SEED})")
+
+    results = {parser: run_benchmark(parser, corpus)
+               for parser in (HTML_PARSER, LXML, HTML5LIB, SELECTOLAX) if is_parser_available(parser)}
+    baseline = results[HTML_PARSER]
+    for parser, seconds in sorted(results.items(), key=lambda item: item[1]):
+        print(f"{parser:>12}: {seconds:7.3f} s  ({1000 * seconds / len(corpus):6.1f} ms/document, {baseline / seconds:4.1f}x)")
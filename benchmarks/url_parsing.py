@@ -0,0 +1,78 @@
+"""Benchmark of :class:`.ParsedUrl` (using the :class:`.PublicSuffixList` trie) against parsing with ``tld.get_tld()``,
+which :class:`.ParsedUrl` was based on before, on a fixed, synthetic corpus of links.
+
+Both ways of parsing are checked to yield the same URL parts. The cache of :func:`.parse_url` is not used.
+Run with ``python benchmarks/url_parsing.py``.
+"""
+import gc
+import random
+import time
+
+import tld
+
+from scrawler.public_suffixes import PublicSuffixList
+from scrawler.utils.web_utils import ParsedUrl
+
+SEED = 42
+NO_URLS = 100000
+NO_REPETITIONS = 3
+
+HOSTS = ("example.com", "www.example.com", "blog.example.co.uk", "www.shop.example.com.au", "example.org", "sub.example.de",
+         "www.example.github.io", "a.b.c.example.jp", "www.city.kawasaki.jp", "example.k12.ca.us")
+SCHEMES = ("https", "http")
+
+
+def generate_corpus(no_urls: int = NO_URLS, seed: int = SEED) -> list:
+    """Generate absolute links like those found while crawling. The same seed always yields the same corpus."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(no_urls):
+        path = "/".join(f"dir{rng.randint(0, 20)}" for _ in range(rng.randint(0, 4)))
+        query = f"?id={i}&page={rng.randint(1, 9)}" if rng.random() < 0.3 else ""
+        fragment = "#top" if rng.random() < 0.1 else ""
+        corpus.append(f"{rng.choice(SCHEMES)}://{rng.choice(HOSTS)}/{path}/page-{i}.html{query}{fragment}")
+    return corpus
+
+
+def parse_with_tld(url: str) -> tuple:
+    """URL parts as computed by ``tld.get_tld()``."""
+    result = tld.get_tld(url, as_object=True)
+    parsed_url = result.parsed_url
+    return (result.domain, result.subdomain, result.fld, result.tld, parsed_url.scheme, parsed_url.netloc,
+            parsed_url.hostname, parsed_url.path, parsed_url.query, parsed_url.fragment)
+
+
+def parse_with_parsed_url(url: str) -> tuple:
+    """URL parts as computed by :class:`.ParsedUrl`."""
+    u = ParsedUrl(url)
+    return u.domain, u.subdomain, u.fld, u.tld, u.scheme, u.netloc, u.hostname, u.path, u.query, u.fragment
+
+
+def run_benchmark(parse, corpus: list) -> float:
+    """Return the best total time (in seconds) to parse all URLs of the corpus."""
+    timings = []
+    for _ in range(NO_REPETITIONS):
+        gc.collect()    # don't let the garbage of the previous repetition slow down this one
+        start = time.perf_counter()
+        for url in corpus:
+            parse(url)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    corpus = generate_corpus()
+    print(f"Corpus: {len(corpus)} URLs (seed {SEED})")
+
+    start = time.perf_counter()
+    public_suffix_list = PublicSuffixList()
+    print(f"Loading the public suffix list ({len(public_suffix_list)} rules): {1000 * (time.perf_counter() - start):.1f} ms")
+    tld.get_tld(corpus[0])  # load the TLD package's names before timing
+
+    assert all(parse_with_tld(url) == parse_with_parsed_url(url) for url in corpus), "URL parts differ"
+
+    results = {"tld.get_tld": run_benchmark(parse_with_tld, corpus),
+               "ParsedUrl": run_benchmark(parse_with_parsed_url, corpus)}
+    baseline = results["tld.get_tld"]
+    for name, seconds in sorted(results.items(), key=lambda item: item[1]):
+        print(f"{name:>12}: {seconds:7.3f} s  ({1e6 * seconds / len(corpus):5.2f} us/URL, {baseline / seconds:4.1f}x)")
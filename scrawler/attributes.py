@@ -1,16 +1,29 @@
 """Specifies the attribute objects used by crawlers and scrapers."""
-from typing import Tuple, Union, Callable
+from typing import Tuple, Union, Callable, List
 from inspect import signature
+import importlib.util
 import os
+import ssl
 
+import aiohttp
 import pandas as pd
 
 from scrawler.defaults import (DEFAULT_CSV_ENCODING, DEFAULT_CSV_SEPARATOR, DEFAULT_CSV_QUOTING, DEFAULT_CSV_ESCAPECHAR,
-                               DEFAULT_PAUSE_TIME)
-from scrawler.website import Website
+                               DEFAULT_PARQUET_ROW_GROUP_SIZE, DEFAULT_PAUSE_TIME, DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
+                               DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF,
+                               DEFAULT_CONNECTION_LIMIT, DEFAULT_DNS_CACHE_TTL, DEFAULT_KEEPALIVE_TIMEOUT,
+                               DEFAULT_BLOOM_FILTER_ERROR_RATE)
+from scrawler.website import Website, DOM
 from scrawler.data_extractors import BaseExtractor
+from scrawler.parsers import TagQuery
+from scrawler.scheduling import ROUND_ROBIN, WEIGHTED
+from scrawler.canonicalization import UrlCanonicalizer
+from scrawler.url_sets import EXACT, FINGERPRINTS, BLOOM_FILTER
+from scrawler.utils.file_io_utils import CSV, PARQUET, EXPORT_FORMATS, PARQUET_SUPPORTED
 from scrawler.utils.web_utils import is_same_host, extract_same_host_pattern
 
+ASYNC_RESOLVER = "async"
+
 
 class SearchAttributes:
     def __init__(self, *args: BaseExtractor, validate: bool = True):
@@ -29,13 +42,49 @@ class SearchAttributes:
         self.attributes: Tuple[BaseExtractor] = args
         self.n_return_values: int = sum([extractor.n_return_values for extractor in self.attributes])
 
+    @property
+    def column_types(self) -> list:
+        """Python type of each column generated by the data extractors (see :attr:`.BaseExtractor.column_type`)."""
+        return [extractor.column_type for extractor in self.attributes for _ in range(extractor.n_return_values)]
+
+    @property
+    def requires(self) -> frozenset:
+        """Parts of a website needed by any of the data extractors (see :attr:`.BaseExtractor.requires`)."""
+        return frozenset().union(*[extractor.requires for extractor in self.attributes])
+
+    @property
+    def tag_queries(self) -> Union[List[TagQuery], None]:
+        """HTML tags looked up by the data extractors (see :attr:`.BaseExtractor.tag_queries`).
+        ``None`` if at least one extractor needs the HTML tree anyway (so that scanning the tags would be wasted effort)."""
+        queries = []
+        for extractor in self.attributes:
+            if DOM not in extractor.requires:
+                continue
+            try:
+                extractor_queries = [] if extractor.dynamic_parameters else extractor.tag_queries
+            except ValueError:  # query can't be answered by the tag scanner
+                extractor_queries = []
+            if len(extractor_queries) == 0:
+                return None
+            queries.extend(extractor_queries)
+        return queries
+
+    def scan_tags(self, website: Website) -> None:
+        """Collect the HTML tags needed by the data extractors in a single pass over the HTML text
+        (see :meth:`.Website.scan_tags`), unless the HTML tree is needed anyway."""
+        queries = self.tag_queries
+        if queries is not None:
+            website.scan_tags(queries)
+
     def extract_all_attrs_from_website(self, website: Website, index: int = None) -> list:
         """Extract data from a website using data extractors specified in ``SearchAttributes`` definition.
+        The HTML tags needed by the data extractors are collected in a single pass over the HTML text if possible (see :meth:`scan_tags`).
 
         :param website: Website object to collect the specified data points from.
         :param index: Optionally pass an index for data extractors that index into passed parameters.
             See `this explanation <custom_data_extractors.html#dynamic-parameters>`__ for details.
         """
+        self.scan_tags(website)
         extracted_data = []
 
         for extractor in self.attributes:
@@ -58,7 +107,10 @@ class ExportAttributes:
     def __init__(self, directory: str, fn: Union[str, list],
                  header: Union[list, str, bool] = None, encoding: str = DEFAULT_CSV_ENCODING,
                  separator: str = DEFAULT_CSV_SEPARATOR, quoting: int = DEFAULT_CSV_QUOTING,
-                 escapechar: str = DEFAULT_CSV_ESCAPECHAR, validate: bool = True, **kwargs):
+                 escapechar: str = DEFAULT_CSV_ESCAPECHAR, export_format: str = CSV, stream: bool = False,
+                 max_rows_per_file: int = None, max_bytes_per_file: int = None,
+                 row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE,
+                 validate: bool = True, **kwargs):
         """Specify how and where to export the collected data.
 
         :param directory: Folder where file(s) will be saved to.
@@ -71,14 +123,34 @@ class ExportAttributes:
         :param separator: Column separator or delimiter to use for creating the CSV file.
         :param quoting: Puts quotes around cells that contain the separator character.
         :param escapechar: Escapes the separator character.
+        :param export_format: ``csv``, ``jsonl`` (`JSON Lines <https://jsonlines.org/>`__)
+            or ``parquet`` (requires `pyarrow <https://arrow.apache.org/docs/python/>`__).
+            Parquet columns are typed according to the data extractors (see :attr:`.BaseExtractor.column_type`).
+        :param stream: If ``True`` and the data is exported immediately (e.g. in :meth:`.Crawler.run_and_export`),
+            each row is appended to the file as soon as a page has been processed, instead of writing all data of a domain at once.
+            See :class:`.StreamingWriter`.
+        :param max_rows_per_file: If specified, a new file is started after this number of rows (``fn.csv``, ``fn_1.csv``, ...).
+        :param max_bytes_per_file: If specified, a new file is started once a file has reached this size (in bytes).
+        :param row_group_size: Number of rows written at once as one Parquet row group.
         :param validate: Whether to make sure that input parameters are valid.
         :param kwargs: Any parameter supported by :meth:`pandas:pandas.DataFrame.to_csv` can be passed.
+            These are only used for CSV files that are written at once.
         """
         if validate:
             # Check that directory exists
             if not os.path.isdir(directory):
                 raise NotADirectoryError(f"Export directory does not exist on this system ({directory}).")
 
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f'Export format "{export_format}" not supported. Has to be one of: {", ".join(EXPORT_FORMATS)}')
+
+            if (export_format == PARQUET) and not PARQUET_SUPPORTED:
+                raise ImportError("Parquet export requires pyarrow. Install it with: pip install pyarrow")
+
+            for limit in (max_rows_per_file, max_bytes_per_file, row_group_size):
+                if (limit is not None) and ((type(limit) is not int) or (limit < 1)):
+                    raise ValueError(f"File size limits have to be positive integers (got {limit}).")
+
             # Check that keyword arguments are allowed for pandas.DataFrame.to_csv()
             for key, value in kwargs.items():
                 if key not in signature(pd.DataFrame.to_csv).parameters:
@@ -93,6 +165,12 @@ class ExportAttributes:
         self.quoting = quoting
         self.escapechar = escapechar
 
+        self.export_format = export_format
+        self.stream = stream
+        self.max_rows_per_file = max_rows_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.row_group_size = row_group_size
+
         for key, value in kwargs.items():   # Add keyword arguments as attributes
             self.__setattr__(key, value)
 
@@ -105,13 +183,29 @@ class CrawlingAttributes:
                  filter_foreign_urls: Union[str, Callable] = "auto",
                  strip_url_parameters: bool = False,
                  strip_url_fragments: bool = True,
+                 canonicalize_urls: Union[bool, UrlCanonicalizer] = False,
+                 seen_url_set: str = EXACT,
+                 bloom_filter_error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE,
 
                  max_no_urls: int = None,
                  max_distance_from_start_url: int = None,
                  max_subdirectory_depth: int = None,
 
                  pause_time: float = DEFAULT_PAUSE_TIME,
+                 adaptive_pause_time: bool = False,
+                 min_pause_time: float = None,
                  respect_robots_txt: bool = True,
+                 respect_crawl_delay: bool = True,
+                 concurrent_requests_per_domain: int = DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
+                 scheduling: str = None,
+
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                 circuit_breaker_threshold: int = None,
+
+                 follow_area_links: bool = False,
+                 follow_rel_next_links: bool = False,
+                 respect_rel_canonical: bool = False,
 
                  validate: bool = True
                  ):
@@ -130,6 +224,16 @@ class CrawlingAttributes:
 
         :param strip_url_parameters: Whether to strip URL query parameters (prefixed by ``?``) from the URL.
         :param strip_url_fragments: Whether to strip URL fragments (prefixed by ``#``) from the URL.
+        :param canonicalize_urls: Whether to bring found URLs into a canonical form before checking if they have been crawled already,
+            so that different spellings of the same URL are only crawled once (see :class:`.UrlCanonicalizer`).
+            Pass ``True`` to use the default rules or a :class:`.UrlCanonicalizer` object to configure, for example, which query parameters are removed.
+        :param seen_url_set: How the URLs that have already been processed or discarded are kept in memory. Possible values:
+            ``exact`` (sets of the URLs), ``fingerprints`` (64-bit fingerprints of the URLs, see :class:`.FingerprintSet`)
+            or ``bloom`` (a Bloom filter, see :class:`.BloomFilter`). For crawls of millions of URLs per domain,
+            ``fingerprints`` needs a fraction of the memory and ``bloom`` even less, at the cost of skipping
+            a new URL with a probability of up to ``bloom_filter_error_rate``.
+            Then, the processed and discarded URLs can't be listed (e.g. with ``return_type="all"``).
+        :param bloom_filter_error_rate: Probability that a new URL is falsely considered as already seen if ``seen_url_set`` is ``bloom``.
 
         :param max_no_urls: Maximum number of URLs to be crawled per domain (safety limit for very large crawls). Set to ``None`` if you want all URLs to be crawled.
         :param max_distance_from_start_url: Maximum number of links that have to be followed to arrive at a certain URL from the start URL.
@@ -138,9 +242,50 @@ class CrawlingAttributes:
             ``sub-siteA`` will then not be found, but a site ``hostname/sub-directory2`` or ``hostname/sub-siteB`` will be.
 
         :param pause_time: Time to wait between the crawling of two URLs (in seconds).
+        :param adaptive_pause_time: Whether to adapt the pause of each host to its server's responses (see :class:`.AdaptiveRateController`).
+            Then, ``pause_time`` is only the initial pause, which is lengthened if the server is overloaded (status ``429`` or ``503``,
+            ``Retry-After``, timeouts or rising latency) and shortened (down to ``min_pause_time``) while responses succeed without rising latency.
+        :param min_pause_time: Lower bound of the adapted pause (in seconds), unless ``pause_time`` is shorter. A ``Crawl-delay`` in the ``robots.txt`` file takes precedence.
+            If ``None``, the pause is never shortened below ``pause_time``, only lengthened. Pass a lower value (e.g. ``0.1``) to allow the rate to increase.
         :param respect_robots_txt: Whether to respect the specifications made in the website's ``robots.txt`` file.
+        :param respect_crawl_delay: If ``respect_robots_txt`` is ``True`` and the ``robots.txt`` file specifies a ``Crawl-delay`` or ``Request-rate``,
+            use the delay specified there instead of ``pause_time`` (also if it is shorter).
+        :param concurrent_requests_per_domain: Number of URLs of the same domain that are fetched concurrently
+            (only supported by the :mod:`.asyncio_backend`). Each concurrent worker pauses ``pause_time`` seconds after each of its requests.
+        :param scheduling: Only supported by the :mod:`.asyncio_backend`. If ``None``, each domain is crawled in its own crawling loop.
+            Otherwise, one :class:`.HostScheduler` distributes the requests across the frontiers of all domains,
+            so that large domains do not block small ones. Then, ``pause_time`` is the delay between two requests to the same host
+            and ``concurrent_requests_per_domain`` the maximum number of concurrent requests to the same host.
+            Possible values: ``round-robin`` (serve all hosts in turn) or ``weighted`` (favor hosts with more URLs left to crawl).
+
+        :param max_retries: Number of times a request is retried if it failed for a transient reason
+            (connection errors, timeouts and status codes ``429``, ``500``, ``502``, ``503`` or ``504``, see :mod:`scrawler.retries`).
+            The waiting time between two attempts grows exponentially, unless the server sends a ``Retry-After``.
+            If greater than ``0``, pages that still have one of these status codes after the last attempt are not collected.
+        :param retry_backoff: Waiting time before the first retry (in seconds). Is doubled for each further retry and jittered.
+        :param circuit_breaker_threshold: Number of consecutive failed requests to a host after which it is considered unreachable
+            and its remaining URLs are skipped for some time (see :class:`.CircuitBreaker`), e.g. ``5``. If ``None``, URLs are never skipped.
+
+        :param follow_area_links: Besides the links in ``<a href>`` tags, also follow the links of image map areas (``<area href>``).
+        :param follow_rel_next_links: Also follow links to the next page of paginated content (``<link rel="next" href>``).
+        :param respect_rel_canonical: Whether to honor the canonical URL declared by a page (``<link rel="canonical">`` or a ``Link`` header field).
+            A page declaring another canonical URL (e.g. a query variant of an article) is then processed under the canonical URL,
+            which is not fetched again. Further pages declaring the same canonical URL are skipped: Neither their data nor their links are collected.
         """
         if validate:
+            if not (isinstance(concurrent_requests_per_domain, int) and concurrent_requests_per_domain >= 1):
+                raise ValueError(f"Parameter concurrent_requests_per_domain has to be a positive integer: {concurrent_requests_per_domain}")
+            if not (isinstance(max_retries, int) and max_retries >= 0):
+                raise ValueError(f"Parameter max_retries has to be a non-negative integer: {max_retries}")
+            if not isinstance(canonicalize_urls, (bool, UrlCanonicalizer)):
+                raise ValueError(f"Parameter canonicalize_urls has to be a bool or a UrlCanonicalizer: {canonicalize_urls}")
+            if seen_url_set not in (EXACT, FINGERPRINTS, BLOOM_FILTER):
+                raise ValueError(f'Parameter seen_url_set has to be one of "{EXACT}", "{FINGERPRINTS}" or "{BLOOM_FILTER}": {seen_url_set}')
+            if not (0 < bloom_filter_error_rate < 1):
+                raise ValueError(f"Parameter bloom_filter_error_rate has to be between 0 and 1: {bloom_filter_error_rate}")
+            if scheduling not in (None, ROUND_ROBIN, WEIGHTED):
+                raise ValueError(f'Parameter scheduling has to be one of None, "{ROUND_ROBIN}" or "{WEIGHTED}": {scheduling}')
+
             # Check that a valid input is passed to parameter filter_foreign_url
             TEST_URL = "https://www.example.com"
             try:
@@ -158,10 +303,92 @@ class CrawlingAttributes:
         self.filter_foreign_urls = filter_foreign_urls
         self.strip_url_parameters = strip_url_parameters
         self.strip_url_fragments = strip_url_fragments
+        self.url_canonicalizer = UrlCanonicalizer() if (canonicalize_urls is True) else (canonicalize_urls or None)
+        self.seen_url_set = seen_url_set
+        self.bloom_filter_error_rate = bloom_filter_error_rate
 
         self.max_no_urls = max_no_urls if (max_no_urls is not None) else float("inf")
         self.max_distance_from_start_url = max_distance_from_start_url if (max_distance_from_start_url is not None) else float("inf")
         self.max_subdirectory_depth = max_subdirectory_depth if (max_subdirectory_depth is not None) else float("inf")
 
         self.pause_time = pause_time
+        self.adaptive_pause_time = adaptive_pause_time
+        self.min_pause_time = pause_time if (min_pause_time is None) else min_pause_time
         self.respect_robots_txt = respect_robots_txt
+        self.respect_crawl_delay = respect_crawl_delay
+        self.concurrent_requests_per_domain = concurrent_requests_per_domain
+        self.scheduling = scheduling
+
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.circuit_breaker_threshold = circuit_breaker_threshold
+
+        self.follow_area_links = follow_area_links
+        self.follow_rel_next_links = follow_rel_next_links
+        self.respect_rel_canonical = respect_rel_canonical
+
+
+class ConnectionAttributes:
+    def __init__(self,
+                 limit: int = None,
+                 limit_per_host: int = 0,
+                 dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+                 resolver: Union[str, Callable[[], aiohttp.abc.AbstractResolver]] = None,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+                 ssl_context: ssl.SSLContext = None,
+                 validate: bool = True):
+        """Specify the connection pool used to make HTTP requests (only used by the :mod:`.asyncio_backend`).
+
+        All requests of a crawling/scraping share one pool of connections (an :class:`aiohttp:aiohttp.TCPConnector`):
+        Connections are kept open and reused for further requests to the same host, resolved host names are cached
+        and one TLS context is used for all connections.
+
+        :param limit: Maximum number of simultaneous connections (``0`` for no limit). By default, the :class:`.Crawler`
+            allows as many connections as its ``parallel_processes`` (but at least 100) and the :class:`.Scraper` 100 connections.
+            Note that requests wait for a free connection, so a limit lower than the number of concurrent requests slows down the crawling.
+        :param limit_per_host: Maximum number of simultaneous connections to the same host (``0`` for no limit).
+            When many start URLs share a host, e.g. ``10`` keeps the crawler from opening too many connections to its server.
+        :param dns_cache_ttl: Time (in seconds) for which resolved host names are reused. ``None`` to cache them forever, ``0`` to disable the cache.
+        :param resolver: How to resolve host names. ``None`` uses the default resolver (blocking lookups in a thread pool).
+            ``async`` resolves them asynchronously with :class:`aiohttp:aiohttp.AsyncResolver` (requires `aiodns <https://github.com/saghul/aiodns>`__),
+            which is faster when many hosts are crawled. Alternatively, pass a function (e.g. a class) that returns an :class:`aiohttp:aiohttp.abc.AbstractResolver`.
+            It is called in the running event loop.
+        :param keepalive_timeout: Time (in seconds) for which an idle connection is kept open.
+            Should be longer than the pause between two requests to the same host, otherwise each request opens a new connection.
+        :param ssl_context: TLS context used for all connections, e.g. to trust additional certificate authorities.
+            By default, a context with the system's certificates is created once and shared by all connections.
+        :param validate: Whether to make sure that input parameters are valid.
+        """
+        if validate:
+            for name, value in (("limit", limit), ("limit_per_host", limit_per_host)):
+                if (value is not None) and not (isinstance(value, int) and value >= 0):
+                    raise ValueError(f"Parameter {name} has to be a non-negative integer: {value}")
+            if resolver == ASYNC_RESOLVER:
+                if importlib.util.find_spec("aiodns") is None:
+                    raise ImportError("The async resolver requires aiodns. Install it with: pip install aiodns")
+            elif (resolver is not None) and not callable(resolver):
+                raise ValueError(f'Parameter resolver has to be None, "{ASYNC_RESOLVER}" or a function returning a resolver: {resolver}')
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.resolver = resolver
+        self.keepalive_timeout = keepalive_timeout
+        self.ssl_context = ssl_context if (ssl_context is not None) else ssl.create_default_context()
+
+    def create_connector(self, default_limit: int = DEFAULT_CONNECTION_LIMIT) -> aiohttp.TCPConnector:
+        """Create the connection pool. Has to be called in the running event loop.
+
+        :param default_limit: Maximum number of simultaneous connections if no ``limit`` is specified.
+        """
+        if self.resolver == ASYNC_RESOLVER:
+            resolver = aiohttp.AsyncResolver()
+        elif self.resolver is not None:
+            resolver = self.resolver()
+        else:
+            resolver = None
+
+        return aiohttp.TCPConnector(limit=default_limit if (self.limit is None) else self.limit,
+                                    limit_per_host=self.limit_per_host,
+                                    use_dns_cache=(self.dns_cache_ttl != 0), ttl_dns_cache=self.dns_cache_ttl or None,
+                                    resolver=resolver, keepalive_timeout=self.keepalive_timeout, ssl=self.ssl_context)
@@ -1,18 +1,30 @@
-from typing import Union, Iterable, Callable
+from typing import Union, Iterable, Callable, List, Tuple, Awaitable, Any
+from concurrent.futures import Executor, ProcessPoolExecutor
 import asyncio
 import logging
+import time
 
 import aiohttp
 
-from scrawler.utils.web_utils import (get_directory_depth, async_get_redirected_url, async_get_robot_file_parser,
-                                      strip_unnecessary_url_parts, fix_relative_urls, filter_urls,
-                                      extract_same_host_pattern)
-from scrawler.defaults import DEFAULT_PAUSE_TIME
+from scrawler.utils.web_utils import (async_get_redirected_url, async_get_robot_file_parser, async_get_html, StoredResponse,
+                                      parse_url, get_redirect_chain)
+from scrawler.defaults import (DEFAULT_PAUSE_TIME, DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
+                               DEFAULT_MAX_NO_PARALLEL_PROCESSES, DEFAULT_HTML_PARSER, DEFAULT_MAX_RETRIES,
+                               DEFAULT_RETRY_BACKOFF, DEFAULT_BLOOM_FILTER_ERROR_RATE)
 from scrawler.utils.general_utils import ProgressBar
 from scrawler.attributes import SearchAttributes, ExportAttributes
-from scrawler.data_extractors import LinkExtractor
-from scrawler.utils.file_io_utils import export_to_csv
-from scrawler.website import Website
+from scrawler.parsers import LinkScanner
+from scrawler.utils.file_io_utils import export_dataset, open_streaming_writer
+from scrawler.frontier import CrawlFrontier, SQLiteFrontierStore
+from scrawler.canonicalization import UrlCanonicalizer, get_rel_canonical_url, claim_canonical_page
+from scrawler.http_cache import SQLiteHttpCache
+from scrawler.warc import WarcWriter, WarcArchive
+from scrawler.robots import RobotsCache, get_crawl_delay
+from scrawler.rate_control import AdaptiveRateController
+from scrawler.retries import CircuitBreaker, TRANSIENT_STATUS_CODES, record_failed_attempt
+from scrawler.scheduling import HostScheduler, ROUND_ROBIN
+from scrawler.url_sets import EXACT
+from scrawler.website import Website, DOM
 
 
 async def async_crawl_domain(start_url: str,
@@ -22,6 +34,7 @@ async def async_crawl_domain(start_url: str,
                              user_agent: str = None,
                              pause_time: float = DEFAULT_PAUSE_TIME,
                              respect_robots_txt: bool = True,
+                             respect_crawl_delay: bool = True,
                              max_no_urls: int = float("inf"),
                              max_distance_from_start_url: int = float("inf"),
                              max_subdirectory_depth: int = float("inf"),
@@ -31,10 +44,29 @@ async def async_crawl_domain(start_url: str,
                              filter_foreign_urls: Union[str, Callable] = "auto",
                              strip_url_parameters: bool = False,
                              strip_url_fragments: bool = True,
+                             url_canonicalizer: UrlCanonicalizer = None,
+                             seen_url_set: str = EXACT,
+                             bloom_filter_error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE,
+                             concurrent_requests_per_domain: int = DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
                              return_type: str = "data",
                              progress_bar: ProgressBar = None,
                              current_index: int = None,
                              semaphore: asyncio.Semaphore = None,
+                             frontier_store: SQLiteFrontierStore = None,
+                             on_result: Callable[[int, str, list], Awaitable] = None,
+                             executor: Executor = None,
+                             html_parser: str = DEFAULT_HTML_PARSER,
+                             follow_area_links: bool = False,
+                             follow_rel_next_links: bool = False,
+                             respect_rel_canonical: bool = False,
+                             http_cache: SQLiteHttpCache = None,
+                             warc_writer: WarcWriter = None,
+                             warc_archive: WarcArchive = None,
+                             robots_cache: RobotsCache = None,
+                             rate_controller: AdaptiveRateController = None,
+                             max_retries: int = DEFAULT_MAX_RETRIES,
+                             retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                             circuit_breaker: CircuitBreaker = None,
                              **kwargs):
     """
     Collect data from all sites of a given domain. The sites within the domain are found automatically be iteratively searching for all links inside all pages.
@@ -45,7 +77,9 @@ async def async_crawl_domain(start_url: str,
 
     :param user_agent: Optionally specify a user agent for making the HTTP request.
     :param pause_time: Time to wait between the crawling of two URLs (in seconds).
+        If a ``rate_controller`` is passed, this is only the initial pause, which is then adapted to the server's responses.
     :param respect_robots_txt: Whether to respect the specifications made in the website's ``robots.txt`` file.
+    :param respect_crawl_delay: If the ``robots.txt`` file specifies a ``Crawl-delay`` or ``Request-rate``, use it instead of ``pause_time``.
 
     :param max_no_urls: Maximum number of URLs to be crawled (safety limit for very large crawls).
     :param max_distance_from_start_url: Maximum number of links that have to be followed to arrive at a certain URL from the start_url.
@@ -60,6 +94,13 @@ async def async_crawl_domain(start_url: str,
 
     :param strip_url_parameters: See :func:`.strip_unnecessary_url_parts`.
     :param strip_url_fragments: See :func:`.strip_unnecessary_url_parts`.
+    :param url_canonicalizer: If passed, found URLs are brought into their canonical form with this :class:`.UrlCanonicalizer`
+        before checking whether they have been crawled already.
+    :param seen_url_set: How the processed and discarded URLs are stored (``exact``, ``fingerprints`` or ``bloom``, see :class:`.CrawlFrontier`).
+    :param bloom_filter_error_rate: False positive rate of the Bloom filters if ``seen_url_set`` is ``bloom``.
+
+    :param concurrent_requests_per_domain: Number of workers fetching URLs of this domain concurrently.
+        Each worker waits ``pause_time`` seconds after each of its requests.
 
     :param return_type: Specify which values to return ("all", "none", "data").
     :param progress_bar: If a :class:`.ProgressBar` object is passed, prints a progress bar on the command line.
@@ -68,136 +109,509 @@ async def async_crawl_domain(start_url: str,
         contain a list of filenames, and only the relevant filename for the currently processed URL should be used).
         See `this explanation <custom_data_extractors.html#dynamic-parameters>`__ for details.
 
-    :param semaphore: :class:`python:asyncio.Semaphore` used for controlling the number of concurrent processes run.
+    :param semaphore: :class:`python:asyncio.Semaphore` used for controlling the number of concurrent requests (shared across all crawled domains).
+        A slot is only held while a request is made, not during the pause between two requests.
+    :param frontier_store: If passed, the crawling state is saved in this :class:`.SQLiteFrontierStore`.
+        If it already contains a state for ``current_index``, the crawling continues from there.
+    :param on_result: Optional coroutine function that is awaited with ``(current_index, url, url_data)`` as soon as the data of a URL has been extracted.
+    :param executor: If passed, HTML parsing and data extraction are done in this executor (created with :func:`create_parsing_pool`)
+        instead of on the event loop, so that the event loop only does I/O.
+    :param html_parser: HTML parser engine used to parse the websites (see :mod:`scrawler.parsers`).
+        Not used if an ``executor`` is passed, the parsing pool uses the engine it was created with.
+    :param follow_area_links: Also follow the links of image map areas (``<area href>``).
+    :param follow_rel_next_links: Also follow links to the next page of paginated content (``<link rel="next" href>``).
+    :param respect_rel_canonical: Whether to collapse pages that declare another canonical URL (``<link rel="canonical">``)
+        into their canonical page (see :meth:`.CrawlFrontier.claim_canonical_url`).
+    :param http_cache: If passed, pages are revalidated with conditional requests and unchanged pages are served from this :class:`.SQLiteHttpCache`.
+    :param warc_writer: If passed, all responses are recorded in this :class:`.WarcWriter`.
+    :param warc_archive: If passed, no requests are made. Instead, the responses recorded in this :class:`.WarcArchive` are replayed
+        (without pausing between requests).
+    :param robots_cache: :class:`.RobotsCache` used for looking up ``robots.txt`` files (defaults to the process-wide cache).
+    :param rate_controller: If passed, the pause between two requests is chosen by this :class:`.AdaptiveRateController`
+        instead of pausing ``pause_time`` seconds after every request.
+    :param max_retries: Number of times a request that failed for a transient reason (see :func:`.is_transient_error`) is retried.
+    :param retry_backoff: Base of the exponential backoff between two attempts (in seconds, see :func:`.get_retry_delay`).
+    :param circuit_breaker: If passed, the remaining URLs of the host are failed without requesting them
+        while this :class:`.CircuitBreaker` considers the host unreachable.
     :param session: :class:`aiohttp:aiohttp.ClientSession` used to make requests in a concurrent manner.
 
     :return: List of the data collected from all URLs that where found using ``start_url`` as starting point.
     """
-    async with semaphore:
-        # Fetch and update start URL (solves redirects)
-        start_url = await async_get_redirected_url(start_url, session=session, user_agent=user_agent)
-        if start_url is None:
-            return None
+    if warc_archive is not None:    # replaying does not put load on any server
+        pause_time, rate_controller = 0, None
+    if semaphore is None:
+        semaphore = asyncio.BoundedSemaphore(concurrent_requests_per_domain)
+
+    frontier, data, start_page = await _async_create_frontier(start_url, session=session, user_agent=user_agent,
+                                            respect_robots_txt=respect_robots_txt, semaphore=semaphore,
+                                            progress_bar=progress_bar, max_no_urls=max_no_urls,
+                                            max_distance_from_start_url=max_distance_from_start_url,
+                                            max_subdirectory_depth=max_subdirectory_depth,
+                                            filter_non_standard_schemes=filter_non_standard_schemes,
+                                            filter_media_files=filter_media_files, blocklist=blocklist,
+                                            filter_foreign_urls=filter_foreign_urls,
+                                            strip_url_parameters=strip_url_parameters,
+                                            strip_url_fragments=strip_url_fragments,
+                                            url_canonicalizer=url_canonicalizer, seen_url_set=seen_url_set,
+                                            bloom_filter_error_rate=bloom_filter_error_rate,
+                                            frontier_store=frontier_store, index=current_index,
+                                            warc_writer=warc_writer, warc_archive=warc_archive,
+                                            robots_cache=robots_cache, http_cache=http_cache)
+    if frontier is None:
+        return None
+    host = parse_url(frontier.start_url).hostname
+    crawl_delay = None
+    if respect_crawl_delay and (warc_archive is None):   # use the Crawl-delay of robots.txt instead of pause_time
+        crawl_delay = get_crawl_delay(frontier.robots_txt_parser, user_agent)
+        pause_time = pause_time if (crawl_delay is None) else crawl_delay
+    if rate_controller is not None:     # the Crawl-delay is the lower bound of the adapted pause
+        rate_controller.add_host(host, initial_delay=pause_time, min_delay=crawl_delay)
+
+    frontier_changed = asyncio.Condition()
+    writer = open_streaming_writer(export_attrs, current_index=current_index, restored_data=data,
+                                   column_types=search_attributes.column_types)
+    link_scanner = LinkScanner(area_links=follow_area_links, next_links=follow_rel_next_links)
+    keep_data = (return_type != "none") or ((export_attrs is not None) and (writer is None))
+
+    async def worker():
+        nonlocal start_page
+        while True:
+            async with frontier_changed:
+                await frontier_changed.wait_for(lambda: frontier.has_pending_urls or frontier.is_finished)
+
+            next_url_and_distance = frontier.pop()
+            if next_url_and_distance is None:
+                if frontier.is_finished:
+                    break
+                continue    # remaining URLs were discarded, wait for the URLs currently in progress
+            if (circuit_breaker is not None) and circuit_breaker.is_open(host):     # don't waste requests on an unreachable host
+                frontier.mark_failed(next_url_and_distance[0])
+                async with frontier_changed:
+                    frontier_changed.notify_all()
+                continue
+
+            prefetched_page = None
+            if next_url_and_distance[0] == frontier.start_url:
+                prefetched_page, start_page = start_page, None
+            url_data = await _async_crawl_url(frontier, *next_url_and_distance, session=session,
+                                              search_attributes=search_attributes, user_agent=user_agent,
+                                              current_index=current_index, semaphore=semaphore, executor=executor,
+                                              html_parser=html_parser, link_scanner=link_scanner,
+                                              http_cache=http_cache, warc_writer=warc_writer,
+                                              warc_archive=warc_archive, rate_controller=rate_controller, host=host,
+                                              max_retries=max_retries, retry_backoff=retry_backoff,
+                                              circuit_breaker=circuit_breaker, start_page=prefetched_page,
+                                              respect_rel_canonical=respect_rel_canonical)
+            if url_data is not None:
+                if keep_data:
+                    data.append(url_data)
+                if writer is not None:
+                    writer.write_row(url_data)
+                if on_result is not None:
+                    await on_result(current_index, next_url_and_distance[0], url_data)
+
+            async with frontier_changed:
+                frontier_changed.notify_all()
+
+            # pause to avoid being flagged as spammer (not needed if no more requests are made to the host)
+            if (circuit_breaker is None) or not circuit_breaker.is_open(host):
+                await asyncio.sleep(pause_time if (rate_controller is None) else rate_controller.wait_time(host))
+
+        async with frontier_changed:    # wake up the other workers so that they notice that crawling is finished
+            frontier_changed.notify_all()
+
+    await asyncio.gather(*[worker() for _ in range(max(concurrent_requests_per_domain, 1))])
+    frontier.close()
+
+    # Optionally export files immediately
+    if writer is not None:
+        writer.close()
+    elif (export_attrs is not None) and (len(data) > 0):
+        export_dataset(data, current_index=current_index, column_types=search_attributes.column_types,
+                       **export_attrs.__dict__)
+
+    if return_type == "all":  # TODO better return type definition?
+        return data, frontier.to_crawl, frontier.processed, frontier.discarded, frontier.url_and_distance
+    elif return_type == "data":
+        return data
+    else:
+        return None
+
+
+async def async_crawl_domains(start_urls: List[str],
+                              session: aiohttp.ClientSession,
+                              search_attributes: SearchAttributes,
+                              export_attrs: ExportAttributes = None,
+                              user_agent: str = None,
+                              pause_time: float = DEFAULT_PAUSE_TIME,
+                              respect_robots_txt: bool = True,
+                              respect_crawl_delay: bool = True,
+                              concurrent_requests_per_domain: int = DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
+                              scheduling: str = ROUND_ROBIN,
+                              parallel_processes: int = DEFAULT_MAX_NO_PARALLEL_PROCESSES,
+                              return_type: str = "data",
+                              progress_bar: ProgressBar = None,
+                              frontier_store: SQLiteFrontierStore = None,
+                              on_result: Callable[[int, str, list], Awaitable] = None,
+                              executor: Executor = None,
+                              html_parser: str = DEFAULT_HTML_PARSER,
+                              follow_area_links: bool = False,
+                              follow_rel_next_links: bool = False,
+                              respect_rel_canonical: bool = False,
+                              http_cache: SQLiteHttpCache = None,
+                              warc_writer: WarcWriter = None,
+                              warc_archive: WarcArchive = None,
+                              robots_cache: RobotsCache = None,
+                              rate_controller: AdaptiveRateController = None,
+                              max_retries: int = DEFAULT_MAX_RETRIES,
+                              retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                              circuit_breaker: CircuitBreaker = None,
+                              **kwargs) -> List[Union[list, None]]:
+    """Crawl several domains at once, using one :class:`.HostScheduler` that owns the frontiers of all domains.
+    Instead of one crawling loop per domain, a fixed number of workers fetches the URLs handed out by the scheduler,
+    so that a few large domains cannot block all slots while many small domains are waiting.
+
+    :param start_urls: The first URL to be accessed for each domain.
+    :param session: :class:`aiohttp:aiohttp.ClientSession` used to make requests in a concurrent manner.
+    :param search_attributes: Dictionary specifying what to search for and how to search it.
+    :param export_attrs: Optional. If specified, the crawled data of each domain is exported as soon as the domain is finished.
+    :param user_agent: Optionally specify a user agent for making the HTTP request.
+    :param pause_time: Time to wait between two requests to the same host (in seconds).
+        If a ``rate_controller`` is passed, this is only the initial pause, which is then adapted to the server's responses.
+    :param respect_robots_txt: Whether to respect the specifications made in the website's ``robots.txt`` file.
+    :param respect_crawl_delay: If the ``robots.txt`` file specifies a ``Crawl-delay`` or ``Request-rate``, use it instead of ``pause_time``.
+    :param concurrent_requests_per_domain: Maximum number of concurrent requests to the same host.
+    :param scheduling: How the scheduler chooses the next host (``round-robin`` or ``weighted``, see :class:`.HostScheduler`).
+    :param parallel_processes: Total number of concurrent requests across all domains.
+    :param return_type: Specify which values to return ("data" or "none").
+    :param progress_bar: If a :class:`.ProgressBar` object is passed, prints a progress bar on the command line.
+    :param frontier_store: If passed, the crawling state is saved in this :class:`.SQLiteFrontierStore`.
+        Domains with a saved state continue from there.
+    :param on_result: Optional coroutine function that is awaited with ``(index, url, url_data)`` as soon as the data of a URL has been extracted.
+    :param executor: If passed, HTML parsing and data extraction are done in this executor (see :func:`create_parsing_pool`).
+    :param html_parser: HTML parser engine used to parse the websites (see :mod:`scrawler.parsers`).
+        Not used if an ``executor`` is passed, the parsing pool uses the engine it was created with.
+    :param follow_area_links: Also follow the links of image map areas (``<area href>``).
+    :param follow_rel_next_links: Also follow links to the next page of paginated content (``<link rel="next" href>``).
+    :param respect_rel_canonical: Whether to collapse pages that declare another canonical URL (``<link rel="canonical">``)
+        into their canonical page (see :meth:`.CrawlFrontier.claim_canonical_url`).
+    :param http_cache: If passed, pages are revalidated with conditional requests and unchanged pages are served from this :class:`.SQLiteHttpCache`.
+    :param warc_writer: If passed, all responses are recorded in this :class:`.WarcWriter`.
+    :param warc_archive: If passed, no requests are made. Instead, the responses recorded in this :class:`.WarcArchive` are replayed
+        (without pausing between requests).
+    :param robots_cache: :class:`.RobotsCache` used for looking up ``robots.txt`` files (defaults to the process-wide cache).
+    :param rate_controller: If passed, the politeness delay of each host is chosen by this :class:`.AdaptiveRateController`.
+    :param max_retries: Number of times a request that failed for a transient reason (see :func:`.is_transient_error`) is retried.
+    :param retry_backoff: Base of the exponential backoff between two attempts (in seconds, see :func:`.get_retry_delay`).
+    :param circuit_breaker: If passed, the remaining URLs of the host are failed without requesting them
+        while this :class:`.CircuitBreaker` considers the host unreachable.
+    :param kwargs: Crawling parameters passed on to :class:`.CrawlFrontier` (e.g. ``max_no_urls`` or ``filter_foreign_urls``).
+    :return: List with one entry per start URL, containing the data collected from the respective domain
+        (``None`` if the start URL could not be retrieved).
+    """
+    if warc_archive is not None:    # replaying does not put load on any server
+        pause_time, rate_controller = 0, None
+    data = [None] * len(start_urls)
+    hosts = {}  # index -> host of the start URL
+    start_pages = {}    # index -> start page fetched while resolving redirects (html, response)
+    writers = {}    # index -> StreamingWriter (only if export_attrs.stream is set)
+    streaming = (export_attrs is not None) and export_attrs.stream
+    keep_data = (return_type != "none") or ((export_attrs is not None) and not streaming)
+
+    def export_finished_domain(index: int, frontier: CrawlFrontier) -> None:
+        frontier.close()
+        if index in writers:
+            writers.pop(index).close()
+        elif (export_attrs is not None) and (len(data[index]) > 0):
+            export_dataset(data[index], current_index=index, column_types=search_attributes.column_types,
+                           **export_attrs.__dict__)
+        if return_type != "data":
+            data[index] = None
+
+    scheduler = HostScheduler(mode=scheduling, host_delay=pause_time,
+                              max_requests_per_host=concurrent_requests_per_domain,
+                              on_frontier_finished=export_finished_domain)
+    semaphore = asyncio.BoundedSemaphore(parallel_processes)
+    link_scanner = LinkScanner(area_links=follow_area_links, next_links=follow_rel_next_links)
+
+    async def add_domain(index: int, start_url: str):
+        frontier, data[index], start_page = await _async_create_frontier(
+            start_url, session=session, user_agent=user_agent, respect_robots_txt=respect_robots_txt, semaphore=semaphore,
+            progress_bar=progress_bar, frontier_store=frontier_store, index=index, warc_writer=warc_writer,
+            warc_archive=warc_archive, robots_cache=robots_cache, http_cache=http_cache, **kwargs)
+        if frontier is not None:
+            if start_page is not None:
+                start_pages[index] = start_page
+            host = hosts[index] = parse_url(frontier.start_url).hostname
+            crawl_delay = None
+            if respect_crawl_delay and (warc_archive is None):   # use the Crawl-delay of robots.txt instead of pause_time
+                crawl_delay = get_crawl_delay(frontier.robots_txt_parser, user_agent)
+                if crawl_delay is not None:
+                    scheduler.set_host_delay(host, crawl_delay)
+            if rate_controller is not None:     # the Crawl-delay is the lower bound of the adapted delay
+                rate_controller.add_host(host, initial_delay=scheduler.get_host_delay(host), min_delay=crawl_delay)
+                scheduler.set_host_delay(host, rate_controller.wait_time(host))
+            if streaming:
+                writers[index] = open_streaming_writer(export_attrs, current_index=index, restored_data=data[index],
+                                                       column_types=search_attributes.column_types)
+            await scheduler.add(index, frontier)
+
+    async def add_all_domains():
+        await asyncio.gather(*[add_domain(i, url) for i, url in enumerate(start_urls)])
+        await scheduler.close()
+
+    async def worker():
+        while True:
+            job = await scheduler.next()
+            if job is None:
+                break
+            index, frontier, url, steps_from_start_page = job
+            if (circuit_breaker is not None) and circuit_breaker.is_open(hosts[index]):    # don't waste requests on an unreachable host
+                frontier.mark_failed(url)
+                await scheduler.done(index, pause=False)
+                continue
 
-        # Optionally get foreign URL matching pattern
-        filter_foreign_urls = extract_same_host_pattern(start_url) if (
-                    filter_foreign_urls == "auto") else filter_foreign_urls
+            url_data = await _async_crawl_url(frontier, url, steps_from_start_page, session=session,
+                                              search_attributes=search_attributes, user_agent=user_agent,
+                                              current_index=index, semaphore=semaphore, executor=executor,
+                                              html_parser=html_parser, link_scanner=link_scanner,
+                                              http_cache=http_cache, warc_writer=warc_writer,
+                                              warc_archive=warc_archive, rate_controller=rate_controller,
+                                              host=hosts[index], max_retries=max_retries, retry_backoff=retry_backoff,
+                                              circuit_breaker=circuit_breaker,
+                                              start_page=start_pages.pop(index, None) if (url == frontier.start_url) else None,
+                                              respect_rel_canonical=respect_rel_canonical)
+            if url_data is not None:
+                if keep_data:
+                    data[index].append(url_data)
+                if index in writers:
+                    writers[index].write_row(url_data)
+                if on_result is not None:
+                    await on_result(index, url, url_data)
+
+            if rate_controller is not None:
+                scheduler.set_host_delay(hosts[index], rate_controller.wait_time(hosts[index]))
+            await scheduler.done(index, pause=(circuit_breaker is None) or not circuit_breaker.is_open(hosts[index]))
+
+    await asyncio.gather(add_all_domains(), *[worker() for _ in range(parallel_processes)])
+
+    return data
+
+
+async def _async_create_frontier(start_url: str, session: aiohttp.ClientSession, user_agent: str = None,
+                                 respect_robots_txt: bool = True, semaphore: asyncio.Semaphore = None,
+                                 frontier_store: SQLiteFrontierStore = None, index: int = None,
+                                 warc_writer: WarcWriter = None, warc_archive: WarcArchive = None,
+                                 robots_cache: RobotsCache = None, http_cache: SQLiteHttpCache = None,
+                                 **kwargs) -> Tuple[Union[CrawlFrontier, None], Union[list, None], Union[tuple, None]]:
+    """Resolve redirects of the start URL, retrieve its ``robots.txt`` and set up the :class:`.CrawlFrontier` for the domain.
+    If the ``frontier_store`` contains a saved state for the domain, the frontier is restored from it instead.
+    Returns the frontier, the data extracted so far (only non-empty if restored) and the start page as tuple ``(html, response)``
+    (fetched while resolving the redirects, ``None`` if it was not successful), or ``(None, None, None)`` if the start URL can't be retrieved."""
+    saved_state = frontier_store.load_domain(index) if (frontier_store is not None) else None
+    start_page = None
+
+    async with semaphore:
+        if saved_state is None:
+            # Fetch and update start URL (solves redirects)
+            start_url, html, response = await async_get_redirected_url(start_url, session=session, user_agent=user_agent,
+                                                                       return_response_object=True, http_cache=http_cache,
+                                                                       warc_writer=warc_writer, warc_archive=warc_archive)
+            if start_url is None:
+                return None, None, None
+            if StoredResponse.from_response(response).status < 400:     # otherwise, the crawling loop requests it again
+                start_page = (html, response)
+        else:
+            start_url = saved_state["start_url"]
 
         # Robots.txt parsing
+        robots_txt_parser = None
         if respect_robots_txt:
-            robots_txt_parser = await async_get_robot_file_parser(start_url, session=session, user_agent=user_agent)
-
-        # Initiate some objects
-        to_crawl = {start_url}
-        processed = set()
-        discarded = set()
-        data = []
-
-        url_and_distance = {start_url: 0}  # for parameter max_url_depth
-
-        # Start logging progress bar on console
-        if progress_bar is not None:
-            progress_bar.update(iterations=0, total_length_update=1)
-
-        while (len(to_crawl) > 0) and (len(data) < max_no_urls):
-            next_url = to_crawl.pop()
-
-            # Check if URL access is disallowed by robots.txt
-            if respect_robots_txt and (robots_txt_parser is not None):
-                ua = "*" if (user_agent is None) else user_agent
-                if not robots_txt_parser.can_fetch(ua, next_url):
-                    logging.info(f"URL access disallowed for crawler by robots.txt: {next_url}")
-                    discarded.add(next_url)
-                    if progress_bar is not None:
-                        progress_bar.update(iterations=1)
-                    continue
-
-            # Crawl only up to the subdirectory depth specified in the parameter
-            current_directory_depth = get_directory_depth(next_url)
-            if current_directory_depth > max_subdirectory_depth:
-                logging.warning(f"Subdirectory depth too deep ({current_directory_depth}): {next_url}")
-                discarded.add(next_url)
-                if progress_bar is not None:
-                    progress_bar.update(iterations=1)
-                continue
+            robots_txt_parser = await async_get_robot_file_parser(start_url, session=session, user_agent=user_agent,
+                                                                  robots_cache=robots_cache, warc_writer=warc_writer,
+                                                                  warc_archive=warc_archive)
+
+    if saved_state is not None:
+        frontier = CrawlFrontier.restore(saved_state, frontier_store=frontier_store, index=index,
+                                         robots_txt_parser=robots_txt_parser, user_agent=user_agent, **kwargs)
+        return frontier, saved_state["data"], None
+    return CrawlFrontier(start_url, robots_txt_parser=robots_txt_parser, user_agent=user_agent,
+                         frontier_store=frontier_store, index=index, **kwargs), [], start_page
+
+
+async def _async_crawl_url(frontier: CrawlFrontier, url: str, steps_from_start_page: int,
+                           session: aiohttp.ClientSession, search_attributes: SearchAttributes,
+                           user_agent: str = None, current_index: int = None,
+                           semaphore: asyncio.Semaphore = None, executor: Executor = None,
+                           html_parser: str = DEFAULT_HTML_PARSER,
+                           link_scanner: LinkScanner = None,
+                           http_cache: SQLiteHttpCache = None, warc_writer: WarcWriter = None,
+                           warc_archive: WarcArchive = None, rate_controller: AdaptiveRateController = None,
+                           host: str = None, max_retries: int = 0, retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                           circuit_breaker: CircuitBreaker = None, start_page: tuple = None,
+                           respect_rel_canonical: bool = False) -> Union[list, None]:
+    """Fetch a URL handed out by the frontier, extract the data and report the found links back to the frontier.
+    If the URL is the start URL, its page fetched while resolving redirects can be passed as ``start_page`` ``(html, response)``,
+    so that it is not requested again.
+    If ``respect_rel_canonical`` is set, a page declaring another canonical URL is processed under that URL
+    or skipped if the canonical page has been processed already (see :meth:`.CrawlFrontier.claim_canonical_url`).
+    Requests that failed for a transient reason are retried up to ``max_retries`` times (without holding a slot of the semaphore while waiting).
+    The outcome of each attempt is reported to the ``rate_controller`` and the ``circuit_breaker`` (if passed) under the given ``host``.
+    Returns the extracted data or ``None`` if the URL could not be fetched (or is a duplicate)."""
+    if link_scanner is None:
+        link_scanner = LinkScanner()
+    follow_links = frontier.should_follow_links(steps_from_start_page)
+
+    retry_params = dict(host=host, semaphore=semaphore, max_retries=max_retries, retry_backoff=retry_backoff,
+                        rate_controller=rate_controller, circuit_breaker=circuit_breaker)
+    raise_for_status_codes = TRANSIENT_STATUS_CODES if (max_retries > 0) else ()
+
+    # Only use the parsing pool if the HTML tree is needed at all (links are found without parsing)
+    if (executor is not None) and (DOM in search_attributes.requires):
+        try:
+            if start_page is not None:
+                body, response = start_page
+            else:
+                body, response = await _fetch_with_retries(lambda: async_get_html(
+                    url, session=session, user_agent=user_agent, check_http_content_type=frontier.filter_media_files,
+                    return_response_object=True, decode=False, http_cache=http_cache, warc_writer=warc_writer,
+                    warc_archive=warc_archive, raise_for_status_codes=raise_for_status_codes), url, **retry_params)
+            response = StoredResponse.from_response(response)
+            if respect_rel_canonical:
+                canonical_url = frontier.claim_canonical_url(url, steps_from_start_page, get_rel_canonical_url(body, response))
+                if canonical_url is None:
+                    return None
+                url = canonical_url
+            url_data, found_urls = await asyncio.get_event_loop().run_in_executor(
+                executor, _parse_and_extract, url, steps_from_start_page, body, response,
+                current_index, link_scanner if follow_links else None)
+        except Exception as e:
+            logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}. Details: {e}")
+            frontier.mark_failed(url)
+            return None
 
-            # Crawl only up to a certain distance (links that had to be followed) from the start_url
-            current_steps_from_start_page = url_and_distance[next_url]
-            if current_steps_from_start_page > max_distance_from_start_url:
-                logging.warning(f"Too many steps from start page ({current_steps_from_start_page}): {next_url}")
-                discarded.add(next_url)
-                if progress_bar is not None:
-                    progress_bar.update(iterations=1)
-                continue
+        frontier.mark_processed(url, steps_from_start_page, found_urls, url_data=url_data,
+                                aliases=get_redirect_chain(response))
+        return url_data
 
-            # Get Website object for further processing
-            try:
-                website = await Website(next_url, steps_from_start_page=current_steps_from_start_page).fetch_async(
-                    session=session, user_agent=user_agent, check_http_content_type=filter_media_files)
-            except Exception as e:
-                logging.error(
-                    f"{e.__class__.__module__}.{e.__class__.__name__} while processing {next_url}. Details: {e}")
-                discarded.add(next_url)
-                if progress_bar is not None:
-                    progress_bar.update(iterations=1)
-                continue
+    # Get Website object for further processing (only the request itself occupies a slot of the semaphore)
+    async def fetch_website():
+        website = await Website(url, steps_from_start_page=steps_from_start_page, html_parser=html_parser).fetch_async(
+            session=session, user_agent=user_agent, check_http_content_type=frontier.filter_media_files,
+            http_cache=http_cache, warc_writer=warc_writer, warc_archive=warc_archive,
+            raise_for_status_codes=raise_for_status_codes)
+        return website, website.http_response
 
-            # Collect the data from the website
-            url_data = search_attributes.extract_all_attrs_from_website(website, index=current_index)
-            data.append(url_data)
-
-            # Collect all available hyperlinks from the website and pre-process + filter them
-            found_urls = LinkExtractor().run(website) if (
-                        current_steps_from_start_page < max_distance_from_start_url) else []
-
-            found_urls = strip_unnecessary_url_parts(found_urls, parameters=strip_url_parameters,
-                                                     fragments=strip_url_fragments)
-            found_urls = fix_relative_urls(urls=found_urls, base_url=start_url)
-            found_urls, filtered = filter_urls(found_urls, base_url=start_url,
-                                               filter_foreign_urls=filter_foreign_urls,
-                                               filter_non_standard_schemes=filter_non_standard_schemes,
-                                               filter_media_files=filter_media_files,
-                                               blocklist=blocklist,
-                                               return_discarded=True)
-            discarded = discarded.union(filtered)
-
-            # All newly found URLs to working list (to_crawl) except those processed or discarded already
-            processed.add(next_url)
-            urls_to_add = found_urls.difference(processed, discarded, to_crawl)
-            to_crawl.update(urls_to_add)
-
-            # Add URL depth (distance from start) to each newly found URL
-            for url in found_urls:
-                if url in url_and_distance:  # do not overwrite URL depths that are already included
-                    continue
-                else:
-                    url_and_distance[url] = current_steps_from_start_page + 1
-
-            logging.debug(f"Processed {next_url}")
-
-            # Update progress bar
-            if progress_bar is not None:
-                progress_bar.update(iterations=1, total_length_update=len(urls_to_add))
-
-            # pause to avoid being flagged as spammer
-            await asyncio.sleep(pause_time)
-
-        # Optionally export files immediately
-        if (export_attrs is not None) and (len(data) > 0):
-            export_to_csv(data, current_index=current_index, **export_attrs.__dict__)
-
-        if return_type == "all":  # TODO better return type definition?
-            return data, to_crawl, processed, discarded, url_and_distance
-        elif return_type == "data":
-            return data
+    try:
+        if start_page is not None:
+            website = Website(url, steps_from_start_page=steps_from_start_page, html_parser=html_parser).parse(*start_page)
         else:
+            website, _ = await _fetch_with_retries(fetch_website, url, **retry_params)
+    except Exception as e:
+        logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}. Details: {e}")
+        frontier.mark_failed(url)
+        return None
+
+    if respect_rel_canonical:
+        website = claim_canonical_page(frontier, website, html_parser)
+        if website is None:
             return None
+        url = website.url
+
+    # Collect the data from the website
+    url_data = search_attributes.extract_all_attrs_from_website(website, index=current_index)
+
+    # Collect all available hyperlinks from the website (without parsing it), the frontier pre-processes and filters them
+    found_urls = link_scanner.scan(website.html_text) if follow_links else []
+    aliases = get_redirect_chain(website.http_response)
+    website.release()
+    frontier.mark_processed(url, steps_from_start_page, found_urls, url_data=url_data, aliases=aliases)
+
+    return url_data
+
+
+async def _fetch_with_retries(fetch: Callable[[], Awaitable[Tuple[Any, Any]]], url: str, host: str = None,
+                              semaphore: asyncio.Semaphore = None, max_retries: int = 0,
+                              retry_backoff: float = DEFAULT_RETRY_BACKOFF, rate_controller: AdaptiveRateController = None,
+                              circuit_breaker: CircuitBreaker = None) -> Tuple[Any, Any]:
+    """Await ``fetch()``, which has to return a tuple ``(result, response)``, and retry it if it failed for a transient reason.
+    A slot of the ``semaphore`` is only held during the attempts, not while waiting for the next attempt.
+    The outcome of each attempt is reported to the ``rate_controller`` and the ``circuit_breaker`` (if passed).
+    Raises the exception of the last attempt if all attempts failed."""
+    attempt = 0
+    while True:
+        error = None
+        async with semaphore:
+            started = time.monotonic()  # not counting the time waited for the semaphore
+            try:
+                result, response = await fetch()
+            except Exception as e:
+                error = e
+            latency = time.monotonic() - started
+
+        if error is None:
+            if rate_controller is not None:
+                rate_controller.record(host, latency, response=response)
+            if circuit_breaker is not None:
+                circuit_breaker.record_success(host)
+            return result, response
+
+        retry_delay = record_failed_attempt(error, latency, attempt, host, max_retries=max_retries, retry_backoff=retry_backoff,
+                                            rate_controller=rate_controller, circuit_breaker=circuit_breaker)
+        if retry_delay is None:
+            raise error
+        logging.info(f"{error.__class__.__module__}.{error.__class__.__name__} while processing {url}, retrying in {retry_delay:.1f} seconds.")
+        await asyncio.sleep(retry_delay)
+        attempt += 1
+
+
+def create_parsing_pool(search_attributes: SearchAttributes, max_workers: int = None,
+                        html_parser: str = DEFAULT_HTML_PARSER) -> ProcessPoolExecutor:
+    """Create a :class:`python:concurrent.futures.ProcessPoolExecutor` that parses websites and extracts their data.
+    It can be passed as ``executor`` to the crawling and scraping functions of this module, which then only send
+    the raw response bodies to the worker processes and receive the extracted data (and links).
+    This keeps the event loop free for I/O and allows to use all CPU cores.
+
+    :param search_attributes: Data extractors to use. They are sent to each worker process once, so they have to be picklable.
+    :param max_workers: Number of worker processes. Defaults to the number of CPUs.
+    :param html_parser: HTML parser engine used by the worker processes (see :mod:`scrawler.parsers`).
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_parsing_process,
+                               initargs=(search_attributes, html_parser))
+
+
+# Set in each worker process of a parsing pool
+_process_search_attributes: Union[SearchAttributes, None] = None
+_process_html_parser: str = DEFAULT_HTML_PARSER
+
+
+def _init_parsing_process(search_attributes: SearchAttributes, html_parser: str = DEFAULT_HTML_PARSER) -> None:
+    global _process_search_attributes, _process_html_parser
+    _process_search_attributes = search_attributes
+    _process_html_parser = html_parser
+
+
+def _parse_and_extract(url: str, steps_from_start_page: Union[int, None], body: bytes, response: StoredResponse,
+                       current_index: int = None, link_scanner: LinkScanner = None) -> Tuple[list, set]:
+    """Runs in a worker process of a parsing pool. Returns the extracted data and the links found in the website
+    (only if a ``link_scanner`` is passed)."""
+    website = Website(url, steps_from_start_page=steps_from_start_page, html_parser=_process_html_parser).parse(body, response)
+    url_data = _process_search_attributes.extract_all_attrs_from_website(website, index=current_index)
+    found_urls = link_scanner.scan(website.html_text) if (link_scanner is not None) else set()
+    website.release()
+    return url_data, found_urls
 
 
 async def async_scrape_site(url: str, session: aiohttp.ClientSession,
                             search_attrs: SearchAttributes, export_attrs: ExportAttributes = None,
                             user_agent: str = None, current_index: int = None,
-                            progress_bar: ProgressBar = None) -> list:
+                            progress_bar: ProgressBar = None,
+                            on_result: Callable[[int, str, list], Awaitable] = None,
+                            executor: Executor = None,
+                            html_parser: str = DEFAULT_HTML_PARSER,
+                            http_cache: SQLiteHttpCache = None,
+                            warc_writer: WarcWriter = None,
+                            warc_archive: WarcArchive = None) -> list:
     """Scrape the data specified in search_attrs from one website.
 
     :param url: URL to be scraped.
@@ -210,14 +624,31 @@ async def async_scrape_site(url: str, session: aiohttp.ClientSession,
         contain a list of filenames, and only the relevant filename for the currently processed URL should be used).
         See `this explanation <custom_data_extractors.html#dynamic-parameters>`__ for details.
     :param progress_bar: If a :class:`.ProgressBar` object is passed, prints a progress bar on the command line.
+    :param on_result: Optional coroutine function that is awaited with ``(current_index, url, website_data)`` as soon as the data has been extracted.
+    :param executor: If passed, HTML parsing and data extraction are done in this executor (see :func:`create_parsing_pool`).
+    :param html_parser: HTML parser engine used to parse the website (see :mod:`scrawler.parsers`).
+        Not used if an ``executor`` is passed, the parsing pool uses the engine it was created with.
+    :param http_cache: If passed, pages are revalidated with conditional requests and unchanged pages are served from this :class:`.SQLiteHttpCache`.
+    :param warc_writer: If passed, all responses are recorded in this :class:`.WarcWriter`.
+    :param warc_archive: If passed, no requests are made. Instead, the responses recorded in this :class:`.WarcArchive` are replayed.
     :return: List of data collected from the website.
     """
     if progress_bar is not None:
         progress_bar.update(iterations=0, total_length_update=1)
 
     try:
-        website = await Website(url).fetch_async(session, user_agent=user_agent)
-        website_data = search_attrs.extract_all_attrs_from_website(website, index=current_index)
+        if (executor is not None) and (DOM in search_attrs.requires):
+            body, response = await async_get_html(url, session=session, user_agent=user_agent,
+                                                  return_response_object=True, decode=False, http_cache=http_cache,
+                                                  warc_writer=warc_writer, warc_archive=warc_archive)
+            website_data, _ = await asyncio.get_event_loop().run_in_executor(
+                executor, _parse_and_extract, url, None, body, StoredResponse.from_response(response), current_index)
+        else:
+            website = await Website(url, html_parser=html_parser).fetch_async(session, user_agent=user_agent,
+                                                                              http_cache=http_cache, warc_writer=warc_writer,
+                                                                              warc_archive=warc_archive)
+            website_data = search_attrs.extract_all_attrs_from_website(website, index=current_index)
+            website.release()
     except Exception as e:
         logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}. Details: {e}")
         website_data = []
@@ -225,8 +656,12 @@ async def async_scrape_site(url: str, session: aiohttp.ClientSession,
     if progress_bar is not None:
         progress_bar.update(iterations=1)
 
+    if (on_result is not None) and (len(website_data) > 0):
+        await on_result(current_index, url, website_data)
+
     # Optionally export files immediately
     if (export_attrs is not None) and (len(website_data) > 0):
-        export_to_csv(website_data, current_index=current_index, **export_attrs.__dict__)
+        export_dataset(website_data, current_index=current_index, column_types=search_attrs.column_types,
+                       **export_attrs.__dict__)
     else:
         return website_data  # TODO useful return values
@@ -1,15 +1,38 @@
-from typing import Iterable, Union, Callable
+from typing import Iterable, Union, Callable, Tuple
 import logging
+import threading
 import time
 
+import requests
+
 from scrawler.attributes import SearchAttributes, ExportAttributes
-from scrawler.defaults import DEFAULT_PAUSE_TIME
+from scrawler.defaults import (DEFAULT_PAUSE_TIME, DEFAULT_HTML_PARSER, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF,
+                               DEFAULT_BLOOM_FILTER_ERROR_RATE)
 from scrawler.website import Website
-from scrawler.data_extractors import LinkExtractor
+from scrawler.parsers import LinkScanner
 from scrawler.utils.general_utils import ProgressBar
-from scrawler.utils.web_utils import (extract_same_host_pattern, get_directory_depth, strip_unnecessary_url_parts,
-                                      fix_relative_urls, filter_urls, get_redirected_url, get_robot_file_parser)
-from scrawler.utils.file_io_utils import export_to_csv
+from scrawler.utils.web_utils import (get_redirected_url, get_robot_file_parser, parse_url, create_session, StoredResponse,
+                                      get_redirect_chain)
+from scrawler.utils.file_io_utils import export_dataset, open_streaming_writer
+from scrawler.frontier import CrawlFrontier, SQLiteFrontierStore
+from scrawler.canonicalization import UrlCanonicalizer, claim_canonical_page
+from scrawler.url_sets import EXACT
+from scrawler.http_cache import SQLiteHttpCache
+from scrawler.warc import WarcWriter, WarcArchive
+from scrawler.robots import RobotsCache, get_crawl_delay
+from scrawler.rate_control import AdaptiveRateController
+from scrawler.retries import CircuitBreaker, TRANSIENT_STATUS_CODES, record_failed_attempt
+
+_thread_local = threading.local()
+
+
+def get_thread_session() -> requests.Session:
+    """Return the :class:`requests:requests.Session` of the current thread (created on first use with :func:`.create_session`).
+    All requests made by a worker thread share its session, so that connections to a host are kept open and reused."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = create_session()
+    return session
 
 
 def crawl_domain(start_url: str,
@@ -18,6 +41,7 @@ def crawl_domain(start_url: str,
                  user_agent: str = None,
                  pause_time: float = DEFAULT_PAUSE_TIME,
                  respect_robots_txt: bool = True,
+                 respect_crawl_delay: bool = True,
                  max_no_urls: int = float("inf"),
                  max_distance_from_start_url: int = float("inf"),
                  max_subdirectory_depth: int = float("inf"),
@@ -27,9 +51,26 @@ def crawl_domain(start_url: str,
                  filter_foreign_urls: Union[str, Callable] = "auto",
                  strip_url_parameters: bool = False,
                  strip_url_fragments: bool = True,
+                 url_canonicalizer: UrlCanonicalizer = None,
+                 seen_url_set: str = EXACT,
+                 bloom_filter_error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE,
                  return_type: str = "data",
                  progress_bar: ProgressBar = None,
                  current_index: int = None,
+                 frontier_store: SQLiteFrontierStore = None,
+                 on_result: Callable[[int, str, list], None] = None,
+                 html_parser: str = DEFAULT_HTML_PARSER,
+                 follow_area_links: bool = False,
+                 follow_rel_next_links: bool = False,
+                 respect_rel_canonical: bool = False,
+                 http_cache: SQLiteHttpCache = None,
+                 warc_writer: WarcWriter = None,
+                 warc_archive: WarcArchive = None,
+                 robots_cache: RobotsCache = None,
+                 rate_controller: AdaptiveRateController = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                 circuit_breaker: CircuitBreaker = None,
                  **kwargs):
     """
     Collect data from all sites of a given domain. The sites within the domain are found automatically be iteratively searching for all links inside all pages.
@@ -40,7 +81,9 @@ def crawl_domain(start_url: str,
 
     :param user_agent: Optionally specify a user agent for making the HTTP request.
     :param pause_time: Time to wait between the crawling of two URLs (in seconds).
+        If a ``rate_controller`` is passed, this is only the initial pause, which is then adapted to the server's responses.
     :param respect_robots_txt: Whether to respect the specifications made in the website's ``robots.txt`` file.
+    :param respect_crawl_delay: If the ``robots.txt`` file specifies a ``Crawl-delay`` or ``Request-rate``, use it instead of ``pause_time``.
 
     :param max_no_urls: Maximum number of URLs to be crawled (safety limit for very large crawls).
     :param max_distance_from_start_url: Maximum number of links that have to be followed to arrive at a certain URL from the start_url.
@@ -55,6 +98,10 @@ def crawl_domain(start_url: str,
 
     :param strip_url_parameters: See `strip_unnecessary_url_parts() <reference.html#scrawler.utils.web_utils.strip_unnecessary_url_parts>`__.
     :param strip_url_fragments: See `strip_unnecessary_url_parts() <reference.html#scrawler.utils.web_utils.strip_unnecessary_url_parts>`__.
+    :param url_canonicalizer: If passed, found URLs are brought into their canonical form with this :class:`.UrlCanonicalizer`
+        before checking whether they have been crawled already.
+    :param seen_url_set: How the processed and discarded URLs are stored (``exact``, ``fingerprints`` or ``bloom``, see :class:`.CrawlFrontier`).
+    :param bloom_filter_error_rate: False positive rate of the Bloom filters if ``seen_url_set`` is ``bloom``.
 
     :param return_type: Specify which values to return ("all", "none", "data").
     :param progress_bar: If a ``ProgressBar`` object is passed, prints a progress bar on the command line.
@@ -62,128 +109,217 @@ def crawl_domain(start_url: str,
         passed and only the values relevant to the currently processed URL should be used; for example, export_attrs may
         contain a list of filenames, and only the relevant filename for the currently processed URL should be used).
         See `this explanation <custom_data_extractors.html#dynamic-parameters>`__ for details.
+    :param frontier_store: If passed, the crawling state is saved in this :class:`.SQLiteFrontierStore`.
+        If it already contains a state for ``current_index``, the crawling continues from there.
+    :param on_result: Optional function that is called with ``(current_index, url, url_data)`` as soon as the data of a URL has been extracted.
+    :param html_parser: HTML parser engine used to parse the websites (see :mod:`scrawler.parsers`).
+    :param follow_area_links: Also follow the links of image map areas (``<area href>``).
+    :param follow_rel_next_links: Also follow links to the next page of paginated content (``<link rel="next" href>``).
+    :param respect_rel_canonical: Whether to collapse pages that declare another canonical URL (``<link rel="canonical">``)
+        into their canonical page (see :meth:`.CrawlFrontier.claim_canonical_url`).
+    :param http_cache: If passed, pages are revalidated with conditional requests and unchanged pages are served from this :class:`.SQLiteHttpCache`.
+    :param warc_writer: If passed, all responses are recorded in this :class:`.WarcWriter`.
+    :param warc_archive: If passed, no requests are made. Instead, the responses recorded in this :class:`.WarcArchive` are replayed
+        (without pausing between requests).
+    :param robots_cache: :class:`.RobotsCache` used for looking up ``robots.txt`` files (defaults to the process-wide cache).
+    :param rate_controller: If passed, the pause between two requests is chosen by this :class:`.AdaptiveRateController`
+        instead of pausing ``pause_time`` seconds after every request.
+    :param max_retries: Number of times a request that failed for a transient reason (see :func:`.is_transient_error`) is retried.
+    :param retry_backoff: Base of the exponential backoff between two attempts (in seconds, see :func:`.get_retry_delay`).
+    :param circuit_breaker: If passed, the remaining URLs of the host are failed without requesting them
+        while this :class:`.CircuitBreaker` considers the host unreachable.
 
     :return: List of the data collected from all URLs that where found using ``start_url`` as starting point.
     """
-    # Fetch and update start URL (solves redirects)
-    start_url = get_redirected_url(start_url, user_agent=user_agent)
-    if start_url is None:
+    if warc_archive is not None:    # replaying does not put load on any server
+        pause_time, rate_controller = 0, None
+    session = get_thread_session()
+    frontier, data, start_page = _create_frontier(start_url, user_agent=user_agent, respect_robots_txt=respect_robots_txt,
+                                                  progress_bar=progress_bar, max_no_urls=max_no_urls,
+                                                  max_distance_from_start_url=max_distance_from_start_url,
+                                                  max_subdirectory_depth=max_subdirectory_depth,
+                                                  filter_non_standard_schemes=filter_non_standard_schemes,
+                                                  filter_media_files=filter_media_files, blocklist=blocklist,
+                                                  filter_foreign_urls=filter_foreign_urls,
+                                                  strip_url_parameters=strip_url_parameters,
+                                                  strip_url_fragments=strip_url_fragments,
+                                                  url_canonicalizer=url_canonicalizer, seen_url_set=seen_url_set,
+                                                  bloom_filter_error_rate=bloom_filter_error_rate,
+                                                  frontier_store=frontier_store, index=current_index,
+                                                  warc_writer=warc_writer, warc_archive=warc_archive,
+                                                  robots_cache=robots_cache, http_cache=http_cache, session=session)
+    if frontier is None:
         return None
-
-    # Optionally get foreign URL matching pattern
-    filter_foreign_urls = extract_same_host_pattern(start_url) if (filter_foreign_urls == "auto") else filter_foreign_urls
-
-    # Robots.txt parsing
-    if respect_robots_txt:
-        robots_txt_parser = get_robot_file_parser(start_url, user_agent=user_agent)
-
-    # Initiate some objects
-    to_crawl = {start_url}
-    processed = set()
-    discarded = set()
-    data = []
-
-    url_and_distance = {start_url: 0}  # for parameter max_url_depth
-
-    # Start logging progress bar on console
-    if progress_bar is not None:
-        progress_bar.update(iterations=0, total_length_update=1)
-
-    while (len(to_crawl) > 0) and (len(data) < max_no_urls):
-        next_url = to_crawl.pop()
-
-        # Check if URL access is disallowed by robots.txt
-        if respect_robots_txt and (robots_txt_parser is not None):
-            ua = "*" if (user_agent is None) else user_agent
-            if not robots_txt_parser.can_fetch(ua, next_url):
-                logging.info(f"URL access disallowed for crawler by robots.txt: {next_url}")
-                discarded.add(next_url)
-                if progress_bar is not None:
-                    progress_bar.update(iterations=1)
-                continue
-
-        # Crawl only up to the subdirectory depth specified in the parameter
-        current_directory_depth = get_directory_depth(next_url)
-        if current_directory_depth > max_subdirectory_depth:
-            logging.warning(f"Subdirectory depth too deep ({current_directory_depth}): {next_url}")
-            discarded.add(next_url)
-            if progress_bar is not None:
-                progress_bar.update(iterations=1)
-            continue
-
-        # Crawl only up to a certain distance (links that had to be followed) from the start_url
-        current_steps_from_start_page = url_and_distance[next_url]
-        if current_steps_from_start_page > max_distance_from_start_url:
-            logging.warning(f"Too many steps from start page ({current_steps_from_start_page}): {next_url}")
-            discarded.add(next_url)
-            if progress_bar is not None:
-                progress_bar.update(iterations=1)
+    host = parse_url(frontier.start_url).hostname
+    crawl_delay = None
+    if respect_crawl_delay and (warc_archive is None):   # use the Crawl-delay of robots.txt instead of pause_time
+        crawl_delay = get_crawl_delay(frontier.robots_txt_parser, user_agent)
+        pause_time = pause_time if (crawl_delay is None) else crawl_delay
+    if rate_controller is not None:     # the Crawl-delay is the lower bound of the adapted pause
+        rate_controller.add_host(host, initial_delay=pause_time, min_delay=crawl_delay)
+
+    writer = open_streaming_writer(export_attrs, current_index=current_index, restored_data=data,
+                                   column_types=search_attributes.column_types)
+    link_scanner = LinkScanner(area_links=follow_area_links, next_links=follow_rel_next_links)
+    keep_data = (return_type != "none") or ((export_attrs is not None) and (writer is None))
+    while True:
+        next_url_and_distance = frontier.pop()
+        if next_url_and_distance is None:
+            break
+        if (circuit_breaker is not None) and circuit_breaker.is_open(host):     # don't waste requests on an unreachable host
+            frontier.mark_failed(next_url_and_distance[0])
             continue
 
-        # Get Website object for further processing
-        try:
-            website = Website(next_url, steps_from_start_page=current_steps_from_start_page).fetch(user_agent=user_agent,
-                                                                                                   check_http_content_type=filter_media_files)
-        except Exception as e:
-            logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {next_url}. Details: {e}")
-            discarded.add(next_url)
-            if progress_bar is not None:
-                progress_bar.update(iterations=1)
-            continue
-
-        # Collect the data from the website
-        url_data = search_attributes.extract_all_attrs_from_website(website, index=current_index)
-        data.append(url_data)
-
-        # Collect all available hyperlinks from the website and pre-process + filter them
-        found_urls = LinkExtractor().run(website) if (current_steps_from_start_page < max_distance_from_start_url) else []
-
-        found_urls = strip_unnecessary_url_parts(found_urls, parameters=strip_url_parameters,
-                                                 fragments=strip_url_fragments)
-        found_urls = fix_relative_urls(urls=found_urls, base_url=start_url)
-        found_urls, filtered = filter_urls(found_urls, base_url=start_url,
-                                           filter_foreign_urls=filter_foreign_urls,
-                                           filter_non_standard_schemes=filter_non_standard_schemes,
-                                           filter_media_files=filter_media_files,
-                                           blocklist=blocklist,
-                                           return_discarded=True)
-        discarded = discarded.union(filtered)
-
-        # All newly found URLs to working list (to_crawl) except those processed or discarded already
-        processed.add(next_url)
-        urls_to_add = found_urls.difference(processed, discarded, to_crawl)
-        to_crawl.update(urls_to_add)
-
-        # Add URL depth (distance from start) to each newly found URL
-        for url in found_urls:
-            if url in url_and_distance:  # do not overwrite URL depths that are already included
-                continue
-            else:
-                url_and_distance[url] = current_steps_from_start_page + 1
-
-        logging.debug(f"Processed {next_url}")
-
-        # Update progress bar
-        if progress_bar is not None:
-            progress_bar.update(iterations=1, total_length_update=len(urls_to_add))
-
-        # pause to avoid being flagged as spammer
-        time.sleep(pause_time)
+        prefetched_page = None
+        if next_url_and_distance[0] == frontier.start_url:
+            prefetched_page, start_page = start_page, None
+        url_data = _crawl_url(frontier, *next_url_and_distance, search_attributes=search_attributes,
+                              user_agent=user_agent, current_index=current_index, html_parser=html_parser,
+                              link_scanner=link_scanner, http_cache=http_cache, warc_writer=warc_writer,
+                              warc_archive=warc_archive, rate_controller=rate_controller, host=host,
+                              max_retries=max_retries, retry_backoff=retry_backoff, circuit_breaker=circuit_breaker,
+                              session=session, start_page=prefetched_page, respect_rel_canonical=respect_rel_canonical)
+        if url_data is not None:
+            if keep_data:
+                data.append(url_data)
+            if writer is not None:
+                writer.write_row(url_data)
+            if on_result is not None:
+                on_result(current_index, next_url_and_distance[0], url_data)
+
+        # pause to avoid being flagged as spammer (not needed if no more requests are made to the host)
+        if (circuit_breaker is None) or not circuit_breaker.is_open(host):
+            time.sleep(pause_time if (rate_controller is None) else rate_controller.wait_time(host))
+
+    frontier.close()
 
     # Optionally export files immediately
-    if (export_attrs is not None) and (len(data) > 0):
-        export_to_csv(data, current_index=current_index, **export_attrs.__dict__)
+    if writer is not None:
+        writer.close()
+    elif (export_attrs is not None) and (len(data) > 0):
+        export_dataset(data, current_index=current_index, column_types=search_attributes.column_types,
+                       **export_attrs.__dict__)
 
     if return_type == "all":  # TODO better return type definition?
-        return data, to_crawl, processed, discarded, url_and_distance
+        return data, frontier.to_crawl, frontier.processed, frontier.discarded, frontier.url_and_distance
     elif return_type == "data":
         return data
     else:
         return None
 
 
+def _create_frontier(start_url: str, user_agent: str = None, respect_robots_txt: bool = True,
+                     frontier_store: SQLiteFrontierStore = None, index: int = None,
+                     warc_writer: WarcWriter = None, warc_archive: WarcArchive = None,
+                     robots_cache: RobotsCache = None, http_cache: SQLiteHttpCache = None,
+                     session: requests.Session = None,
+                     **kwargs) -> Tuple[Union[CrawlFrontier, None], Union[list, None], Union[tuple, None]]:
+    """Resolve redirects of the start URL, retrieve its ``robots.txt`` and set up the :class:`.CrawlFrontier` for the domain.
+    If the ``frontier_store`` contains a saved state for the domain, the frontier is restored from it instead.
+    Returns the frontier, the data extracted so far (only non-empty if restored) and the start page as tuple ``(html, response)``
+    (fetched while resolving the redirects, ``None`` if it was not successful), or ``(None, None, None)`` if the start URL can't be retrieved."""
+    saved_state = frontier_store.load_domain(index) if (frontier_store is not None) else None
+    start_page = None
+
+    if saved_state is None:
+        # Fetch and update start URL (solves redirects)
+        start_url, html, response = get_redirected_url(start_url, user_agent=user_agent, return_response_object=True,
+                                                       http_cache=http_cache, warc_writer=warc_writer,
+                                                       warc_archive=warc_archive, session=session)
+        if start_url is None:
+            return None, None, None
+        if StoredResponse.from_response(response).status < 400:     # otherwise, the crawling loop requests it again
+            start_page = (html, response)
+    else:
+        start_url = saved_state["start_url"]
+
+    # Robots.txt parsing
+    robots_txt_parser = None
+    if respect_robots_txt:
+        robots_txt_parser = get_robot_file_parser(start_url, user_agent=user_agent, robots_cache=robots_cache,
+                                                  warc_writer=warc_writer, warc_archive=warc_archive, session=session)
+
+    if saved_state is not None:
+        frontier = CrawlFrontier.restore(saved_state, frontier_store=frontier_store, index=index,
+                                         robots_txt_parser=robots_txt_parser, user_agent=user_agent, **kwargs)
+        return frontier, saved_state["data"], None
+    return CrawlFrontier(start_url, robots_txt_parser=robots_txt_parser, user_agent=user_agent,
+                         frontier_store=frontier_store, index=index, **kwargs), [], start_page
+
+
+def _crawl_url(frontier: CrawlFrontier, url: str, steps_from_start_page: int, search_attributes: SearchAttributes,
+               user_agent: str = None, current_index: int = None,
+               html_parser: str = DEFAULT_HTML_PARSER, link_scanner: LinkScanner = None,
+               http_cache: SQLiteHttpCache = None, warc_writer: WarcWriter = None,
+               warc_archive: WarcArchive = None, rate_controller: AdaptiveRateController = None,
+               host: str = None, max_retries: int = 0, retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+               circuit_breaker: CircuitBreaker = None, session: requests.Session = None,
+               start_page: tuple = None, respect_rel_canonical: bool = False) -> Union[list, None]:
+    """Fetch a URL handed out by the frontier, extract the data and report the found links back to the frontier.
+    If the URL is the start URL, its page fetched while resolving redirects can be passed as ``start_page`` ``(html, response)``,
+    so that it is not requested again.
+    If ``respect_rel_canonical`` is set, a page declaring another canonical URL is processed under that URL
+    or skipped if the canonical page has been processed already (see :meth:`.CrawlFrontier.claim_canonical_url`).
+    Requests that failed for a transient reason are retried up to ``max_retries`` times.
+    The outcome of each attempt is reported to the ``rate_controller`` and the ``circuit_breaker`` (if passed) under the given ``host``.
+    Returns the extracted data or ``None`` if the URL could not be fetched (or is a duplicate)."""
+    if link_scanner is None:
+        link_scanner = LinkScanner()
+
+    # Get Website object for further processing (the start page may have been fetched while resolving redirects)
+    website = None
+    if start_page is not None:
+        website = Website(url, steps_from_start_page=steps_from_start_page, html_parser=html_parser).parse(*start_page)
+    attempt = 0
+    while website is None:
+        started = time.monotonic()
+        try:
+            website = Website(url, steps_from_start_page=steps_from_start_page, html_parser=html_parser).fetch(
+                user_agent=user_agent, check_http_content_type=frontier.filter_media_files, http_cache=http_cache,
+                warc_writer=warc_writer, warc_archive=warc_archive, session=session,
+                raise_for_status_codes=TRANSIENT_STATUS_CODES if (max_retries > 0) else ())
+            break
+        except Exception as e:
+            retry_delay = record_failed_attempt(e, time.monotonic() - started, attempt, host, max_retries=max_retries,
+                                                retry_backoff=retry_backoff, rate_controller=rate_controller,
+                                                circuit_breaker=circuit_breaker)
+            if retry_delay is None:
+                logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}. Details: {e}")
+                frontier.mark_failed(url)
+                return None
+            logging.info(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}, retrying in {retry_delay:.1f} seconds.")
+            time.sleep(retry_delay)
+            attempt += 1
+
+    if start_page is None:  # the start page was not timed
+        if rate_controller is not None:
+            rate_controller.record(host, time.monotonic() - started, response=website.http_response)
+        if circuit_breaker is not None:
+            circuit_breaker.record_success(host)
+
+    if respect_rel_canonical:
+        website = claim_canonical_page(frontier, website, html_parser)
+        if website is None:
+            return None
+        url = website.url
+
+    # Collect the data from the website
+    url_data = search_attributes.extract_all_attrs_from_website(website, index=current_index)
+
+    # Collect all available hyperlinks from the website (without parsing it), the frontier pre-processes and filters them
+    found_urls = link_scanner.scan(website.html_text) if frontier.should_follow_links(steps_from_start_page) else []
+    aliases = get_redirect_chain(website.http_response)
+    website.release()
+    frontier.mark_processed(url, steps_from_start_page, found_urls, url_data=url_data, aliases=aliases)
+
+    return url_data
+
+
 def scrape_site(url: str, search_attrs: SearchAttributes, export_attrs: ExportAttributes = None,
-                user_agent: str = None, current_index: int = None, progress_bar: ProgressBar = None) -> list:
+                user_agent: str = None, current_index: int = None, progress_bar: ProgressBar = None,
+                on_result: Callable[[int, str, list], None] = None,
+                html_parser: str = DEFAULT_HTML_PARSER, http_cache: SQLiteHttpCache = None,
+                warc_writer: WarcWriter = None, warc_archive: WarcArchive = None) -> list:
     """Scrape the data specified in search_attrs from one website.
 
     :param url: URL to be scraped.
@@ -195,14 +331,22 @@ def scrape_site(url: str, search_attrs: SearchAttributes, export_attrs: ExportAt
         contain a list of filenames, and only the relevant filename for the currently processed URL should be used).
         See `this explanation <custom_data_extractors.html#dynamic-parameters>`__ for details.
     :param progress_bar: If a ``ProgressBar`` object is passed, prints a progress bar on the command line.
+    :param on_result: Optional function that is called with ``(current_index, url, website_data)`` as soon as the data has been extracted.
+    :param html_parser: HTML parser engine used to parse the website (see :mod:`scrawler.parsers`).
+    :param http_cache: If passed, pages are revalidated with conditional requests and unchanged pages are served from this :class:`.SQLiteHttpCache`.
+    :param warc_writer: If passed, all responses are recorded in this :class:`.WarcWriter`.
+    :param warc_archive: If passed, no requests are made. Instead, the responses recorded in this :class:`.WarcArchive` are replayed.
     :return: List of data collected from the website.
     """
     if progress_bar is not None:
         progress_bar.update(iterations=0, total_length_update=1)
 
     try:
-        website = Website(url).fetch(user_agent=user_agent)
+        website = Website(url, html_parser=html_parser).fetch(user_agent=user_agent, http_cache=http_cache,
+                                                              warc_writer=warc_writer, warc_archive=warc_archive,
+                                                              session=get_thread_session())
         website_data = search_attrs.extract_all_attrs_from_website(website, index=current_index)
+        website.release()
     except Exception as e:
         logging.error(f"{e.__class__.__module__}.{e.__class__.__name__} while processing {url}. Details: {e}")
         website_data = []
@@ -210,8 +354,12 @@ def scrape_site(url: str, search_attrs: SearchAttributes, export_attrs: ExportAt
     if progress_bar is not None:
         progress_bar.update(iterations=1)
 
+    if (on_result is not None) and (len(website_data) > 0):
+        on_result(current_index, url, website_data)
+
     # Optionally export files immediately
     if (export_attrs is not None) and (len(website_data) > 0):
-        export_to_csv(website_data, current_index=current_index, **export_attrs.__dict__)
+        export_dataset(website_data, current_index=current_index, column_types=search_attrs.column_types,
+                       **export_attrs.__dict__)
     else:
         return website_data  # TODO useful return values
@@ -0,0 +1,179 @@
+"""Canonicalization of URLs, so that different spellings of the same URL are only crawled once,
+and detection of the canonical URL declared by a page (``<link rel="canonical">``)."""
+from typing import Iterable, Union, Pattern, Optional, TYPE_CHECKING
+from urllib.parse import urlsplit, urlunsplit, urljoin
+import html
+import re
+
+import aiohttp
+import requests
+
+from scrawler.defaults import DEFAULT_STRIPPED_URL_PARAMETERS, DEFAULT_STRIPPED_URL_PARAMETER_PATTERN, DEFAULT_HTML_PARSER
+from scrawler.redirects import HEAD_END_PATTERN, HEAD_SCAN_LIMIT
+from scrawler.utils.web_utils import StoredResponse
+from scrawler.website import Website
+
+if TYPE_CHECKING:   # avoid circular imports, the frontier uses the UrlCanonicalizer
+    from scrawler.frontier import CrawlFrontier
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+PERCENT_ENCODING_PATTERN = re.compile(r"%([0-9a-fA-F]{2})")
+PATH_PARAMETER_PATTERN = re.compile(r";([^/;=]+)=[^/;]*")    # e.g. ;jsessionid=123 in /shop;jsessionid=123
+UNRESERVED_CHARACTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+LINK_TAG_PATTERN = re.compile(r"<link\s[^>]*>", flags=re.IGNORECASE)
+LINK_ATTRIBUTE_PATTERN = re.compile(r"""[\s"'/](href|rel)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", flags=re.IGNORECASE)
+LINK_HEADER_CANONICAL_PATTERN = re.compile(r"""<([^>]*)>[^,<]*;\s*rel\s*=\s*"?([^";,]*\bcanonical\b[^";,]*)"?""", flags=re.IGNORECASE)
+
+
+class UrlCanonicalizer:
+    def __init__(self, sort_query_parameters: bool = True,
+                 stripped_parameters: Iterable[str] = DEFAULT_STRIPPED_URL_PARAMETERS,
+                 stripped_parameter_pattern: Union[str, Pattern, None] = DEFAULT_STRIPPED_URL_PARAMETER_PATTERN):
+        """Bring URLs into a canonical form, so that URLs that differ only in their spelling are recognized as the same URL.
+
+        The following normalizations do not change the resource a URL points to (see RFC 3986, section 6) and are always made
+        for ``http`` and ``https`` URLs:
+
+        - Scheme and host name are lowercased, the default port (``:80``/``:443``) is removed.
+        - Dot-segments in the path are resolved (``/a/./b/../c`` becomes ``/a/c``), an empty path becomes ``/``.
+        - Percent-encoded unreserved characters are decoded (``%7E`` becomes ``~``), other percent-encodings are uppercased.
+
+        Additionally, tracking and session parameters are removed from the query (and session IDs from the path, e.g. ``;jsessionid=...``)
+        and the query parameters are sorted by name. For example, ``http://Example.com:80/a/./b/?utm_source=x&b=2&a=1``
+        becomes ``http://example.com/a/b/?a=1&b=2``.
+
+        :param sort_query_parameters: Whether to sort the query parameters by name (the order of parameters with the same name is kept).
+        :param stripped_parameters: Names of parameters that are removed (case-insensitive).
+        :param stripped_parameter_pattern: Regular expression matching the names of further parameters that are removed
+            (case-insensitive, has to match the whole name). ``None`` to only remove the ``stripped_parameters``.
+        """
+        self.sort_query_parameters = sort_query_parameters
+        self.stripped_parameters = frozenset(name.lower() for name in stripped_parameters)
+        if isinstance(stripped_parameter_pattern, str):
+            stripped_parameter_pattern = re.compile(stripped_parameter_pattern, flags=re.IGNORECASE)
+        self.stripped_parameter_pattern = stripped_parameter_pattern
+
+    def __call__(self, url: str) -> str:
+        return self.canonicalize(url)
+
+    def canonicalize(self, url: str) -> str:
+        """Return the canonical form of an absolute URL. URLs with other schemes than ``http`` and ``https`` and invalid URLs are returned unchanged."""
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS:
+            return url
+
+        # Host name (user information is case-sensitive)
+        user_info, _, host = parts.netloc.rpartition("@")
+        host = host.lower()
+        if host.endswith(":") or (port == DEFAULT_PORTS[scheme]):
+            host = host[:host.rfind(":")]
+        netloc = f"{user_info}@{host}" if user_info else host
+
+        path = _normalize_percent_encoding(parts.path)
+        if ";" in path:
+            path = PATH_PARAMETER_PATTERN.sub(lambda match: "" if self.is_stripped(match.group(1)) else match.group(), path)
+        if "." in path:
+            path = _remove_dot_segments(path)
+
+        query = parts.query
+        if query:
+            parameters = [parameter for parameter in _normalize_percent_encoding(query).split("&")
+                          if parameter and not self.is_stripped(parameter.split("=", 1)[0])]
+            if self.sort_query_parameters:
+                parameters.sort(key=lambda parameter: parameter.split("=", 1)[0])    # stable, keeps the order of repeated names
+            query = "&".join(parameters)
+
+        return urlunsplit((scheme, netloc, path or "/", query, parts.fragment))
+
+    def canonicalize_all(self, urls: Iterable[str]) -> set:
+        """Return the set of the canonical forms of the URLs."""
+        return {self.canonicalize(url) for url in urls}
+
+    def is_stripped(self, parameter_name: str) -> bool:
+        """Whether a query parameter with this name is removed."""
+        parameter_name = parameter_name.lower()
+        if parameter_name in self.stripped_parameters:
+            return True
+        return (self.stripped_parameter_pattern is not None) and (self.stripped_parameter_pattern.fullmatch(parameter_name) is not None)
+
+
+def _normalize_percent_encoding(text: str) -> str:
+    if "%" not in text:
+        return text
+
+    def normalize(match: re.Match) -> str:
+        character = chr(int(match.group(1), 16))
+        return character if (character in UNRESERVED_CHARACTERS) else match.group().upper()
+
+    return PERCENT_ENCODING_PATTERN.sub(normalize, text)
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolve ``.`` and ``..`` segments of an absolute path (see RFC 3986, section 5.2.4)."""
+    segments = path.split("/")
+    output = []
+    for segment in segments:
+        if segment == ".":
+            continue
+        elif segment == "..":
+            if len(output) > 1:     # never remove the empty segment before the leading slash
+                output.pop()
+        else:
+            output.append(segment)
+    if segments[-1] in (".", ".."):     # /a/b/.. is the directory /a/
+        output.append("")
+    return "/".join(output)
+
+
+def get_rel_canonical_url(html_text: Union[str, bytes], http_response: Union[aiohttp.ClientResponse, requests.Response, StoredResponse]) -> Optional[str]:
+    """Return the absolute canonical URL that a page declares with ``<link rel="canonical" href="...">`` in its head
+    or with a ``Link`` header field (``Link: <...>; rel="canonical"``), or ``None`` if it declares none.
+
+    :param html_text: HTML text of the page or the undecoded response body (only its head is scanned).
+    :param http_response: Response of the page. Relative URLs are resolved against its URL.
+    """
+    base_url = str(http_response.url)
+    if isinstance(html_text, bytes):
+        charset = StoredResponse.from_response(http_response).charset or "utf-8"
+        try:
+            html_text = html_text[:HEAD_SCAN_LIMIT].decode(charset, errors="replace")
+        except LookupError:     # unknown charset
+            html_text = html_text[:HEAD_SCAN_LIMIT].decode("utf-8", errors="replace")
+
+    if html_text:
+        head_end = HEAD_END_PATTERN.search(html_text, 0, HEAD_SCAN_LIMIT)
+        head = html_text[:head_end.start()] if (head_end is not None) else html_text[:HEAD_SCAN_LIMIT]
+        for tag in LINK_TAG_PATTERN.finditer(head):
+            attributes = {}
+            for name, *values in LINK_ATTRIBUTE_PATTERN.findall(" " + tag.group()[5:]):
+                attributes.setdefault(name.lower(), next((value for value in values if value != ""), ""))
+            href = attributes.get("href", "").strip()
+            if href and ("canonical" in attributes.get("rel", "").lower().split()):
+                return urljoin(base_url, html.unescape(href))
+
+    match = LINK_HEADER_CANONICAL_PATTERN.search(http_response.headers.get("link", ""))
+    if (match is not None) and match.group(1).strip():
+        return urljoin(base_url, match.group(1).strip())
+    return None
+
+
+def claim_canonical_page(frontier: "CrawlFrontier", website: Website, html_parser: str = DEFAULT_HTML_PARSER) -> Optional[Website]:
+    """Determine under which URL a fetched website is processed, based on the canonical URL it declares
+    (see :meth:`.CrawlFrontier.claim_canonical_url`).
+
+    :return: The website (recreated with the canonical URL if it stands in for the canonical page) or ``None`` if it is a duplicate.
+    """
+    canonical_url = frontier.claim_canonical_url(website.url, website.steps_from_start_page,
+                                                 get_rel_canonical_url(website.html_text, website.http_response))
+    if canonical_url is None:
+        website.release()
+        return None
+    if canonical_url != website.url:
+        website = Website(canonical_url, steps_from_start_page=website.steps_from_start_page,
+                          html_parser=html_parser).parse(website.html_text, website.http_response)
+    return website
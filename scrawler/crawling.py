@@ -1,14 +1,23 @@
-from typing import Union, List, Any
+from typing import Union, List, Any, Tuple, Callable, Awaitable, Iterator, AsyncIterator
 import asyncio
+import functools
 from multiprocessing.dummy import Pool as ThreadPool
 
 import aiohttp
 
-from scrawler.defaults import DEFAULT_REQUEST_TIMEOUT, DEFAULT_MAX_NO_PARALLEL_PROCESSES, DEFAULT_BACKEND
-from scrawler.utils.general_utils import timing_decorator, ProgressBar
-from scrawler.attributes import SearchAttributes, ExportAttributes, CrawlingAttributes
-from scrawler.utils.file_io_utils import export_to_csv, multithreaded_csv_export
+from scrawler.defaults import (DEFAULT_REQUEST_TIMEOUT, DEFAULT_MAX_NO_PARALLEL_PROCESSES, DEFAULT_BACKEND,
+                              DEFAULT_HTML_PARSER, DEFAULT_CONNECTION_LIMIT)
+from scrawler.utils.general_utils import timing_decorator, ProgressBar, iterate_results, iterate_synchronously
+from scrawler.attributes import SearchAttributes, ExportAttributes, CrawlingAttributes, ConnectionAttributes
+from scrawler.utils.file_io_utils import export_dataset, multithreaded_csv_export
 from scrawler.utils.validation_utils import validate_input_params
+from scrawler.frontier import SQLiteFrontierStore
+from scrawler.parsers import resolve_parser
+from scrawler.http_cache import SQLiteHttpCache
+from scrawler.warc import WarcWriter, WarcArchive
+from scrawler.robots import RobotsCache
+from scrawler.rate_control import AdaptiveRateController
+from scrawler.retries import CircuitBreaker
 from scrawler import backends
 from scrawler.backends import asyncio_backend, multithreading_backend
 
@@ -20,8 +29,16 @@ class Crawler:
                  crawling_attributes: CrawlingAttributes = CrawlingAttributes(),
                  user_agent: str = None,
                  timeout: Union[int, aiohttp.ClientTimeout] = None,
+                 connection_attributes: ConnectionAttributes = None,
                  backend: str = DEFAULT_BACKEND,
                  parallel_processes: int = DEFAULT_MAX_NO_PARALLEL_PROCESSES,
+                 frontier_store: Union[str, SQLiteFrontierStore] = None,
+                 parsing_processes: int = None,
+                 html_parser: str = DEFAULT_HTML_PARSER,
+                 http_cache: Union[str, SQLiteHttpCache] = None,
+                 warc_writer: Union[str, WarcWriter] = None,
+                 warc_archive: Union[str, List[str], WarcArchive] = None,
+                 robots_cache: Union[str, RobotsCache] = None,
                  validate_input_parameters: bool = True):
         """Crawl a domain or multiple domains in parallel.
 
@@ -34,12 +51,28 @@ class Crawler:
             When using the :mod:`.asyncio_backend`, you can pass an :class:`aiohttp:aiohttp.ClientTimeout` object where you can specify detailed timeout settings.
             Alternatively, you can pass an integer that will be interpreted as total timeout for one request in seconds.
             If nothing is passed, a default timeout will be used.
+        :param connection_attributes: Only for the :mod:`.asyncio_backend`: Specify the connection pool, e.g. the maximum number of simultaneous connections,
+            how long resolved host names are cached or how long idle connections are kept open (see :class:`.ConnectionAttributes`).
         :param backend: "asyncio" to use the :mod:`.asyncio_backend` (faster when crawling many domains at once, but more unstable and may get hung).
                         "multithreading" to use the :mod:`~scrawler.backends.multithreading_backend` (more stable, but most likely slower).
                         See also `Why are there two backends? <getting_started.html#why-are-there-two-backends>`__
         :param parallel_processes: Number of concurrent processes/threads to use.
-            Can be very large when using :mod:`.asyncio_backend`.
+            Can be very large when using :mod:`.asyncio_backend`, where it limits the number of concurrent requests across all domains.
             When using :mod:`~scrawler.backends.multithreading_backend`, should not exceed 2x the CPU count on the machine running the crawling.
+        :param frontier_store: Path to a local SQLite file (or a :class:`.SQLiteFrontierStore` object) where the crawling state is saved in regular checkpoints.
+            If the crawling is interrupted, it can be continued with :meth:`resume`.
+        :param parsing_processes: Only for the :mod:`.asyncio_backend`: If specified, HTML parsing and data extraction are done
+            in a pool of this many worker processes instead of on the event loop (see :func:`.create_parsing_pool`).
+            Recommended if parsing is slow (e.g. when using :class:`.WebsiteTextExtractor`), as the event loop then only handles I/O.
+        :param html_parser: HTML parser engine used to parse the websites: ``html.parser``, ``lxml``, ``html5lib``, ``selectolax``
+            or ``auto`` (fastest installed engine). See :mod:`scrawler.parsers` for details.
+        :param http_cache: Path to a local SQLite file (or a :class:`.SQLiteHttpCache` object) where the fetched pages are cached.
+            When running again, unchanged pages are revalidated with conditional requests and served from the cache instead of being downloaded again.
+        :param warc_writer: Path to a WARC file (or a :class:`.WarcWriter` object) where all fetched responses are recorded (gzip-compressed).
+        :param warc_archive: Path to a WARC file or directory, list of them (or a :class:`.WarcArchive` object) from which the responses
+            are replayed instead of fetching them (offline replay, e.g. to run new data extractors on a recorded crawling).
+        :param robots_cache: Path to a local SQLite file (or a :class:`.RobotsCache` object) where retrieved ``robots.txt`` files are cached, so that they are reused across runs.
+            By default, ``robots.txt`` files are only cached in memory (shared by all crawlings in the same process).
         :param validate_input_parameters: Whether to validate input parameters.
             Note that this validates that all URLs work and that the various attributes work together.
             However, the attributes themselves are also validated independently.
@@ -68,8 +101,33 @@ class Crawler:
             else:
                 self.timeout = aiohttp.ClientTimeout(total=DEFAULT_REQUEST_TIMEOUT)
 
+        self.connection_attrs = connection_attributes if (connection_attributes is not None) else ConnectionAttributes()
+
         self.parallel_processes = parallel_processes
 
+        if (parsing_processes is not None) and (self.backend != backends.ASYNCIO):
+            raise ValueError("Parsing in separate processes is only supported by the asyncio backend.")
+        self.parsing_processes = parsing_processes
+        self.html_parser = resolve_parser(html_parser)
+        self.http_cache = SQLiteHttpCache(http_cache) if (type(http_cache) is str) else http_cache
+        self.warc_writer = WarcWriter(warc_writer) if (type(warc_writer) is str) else warc_writer
+        self.warc_archive = WarcArchive(warc_archive) if (type(warc_archive) in (str, list)) else warc_archive
+        self.robots_cache = RobotsCache(robots_cache) if (type(robots_cache) is str) else robots_cache
+
+        #: :class:`.AdaptiveRateController` choosing the pause of each host (``None`` if ``adaptive_pause_time`` is disabled
+        #: in the :class:`.CrawlingAttributes`). After crawling, its ``host_rates`` show the request rates it has chosen.
+        self.rate_controller = None
+        if crawling_attributes.adaptive_pause_time:
+            self.rate_controller = AdaptiveRateController(initial_delay=crawling_attributes.pause_time,
+                                                          min_delay=min(crawling_attributes.pause_time,
+                                                                        crawling_attributes.min_pause_time))
+        #: :class:`.CircuitBreaker` keeping track of unreachable hosts (``None`` if ``circuit_breaker_threshold`` is ``None``).
+        self.circuit_breaker = None
+        if crawling_attributes.circuit_breaker_threshold is not None:
+            self.circuit_breaker = CircuitBreaker(failure_threshold=crawling_attributes.circuit_breaker_threshold)
+
+        self.frontier_store = SQLiteFrontierStore(frontier_store) if (type(frontier_store) is str) else frontier_store
+
         self._progress_bar = ProgressBar(custom_message="Sites scraped:")
 
         self.data = None
@@ -85,6 +143,59 @@ class Crawler:
             The second layer (representing each crawled domain) is a list with one entry per processed URL (domain = [url1, url2, ...]).
             The third layer (representing each URL) is a list with one entry per extracted datapoint (url = [datapoint1, datapoint2, ...]).
         """
+        if self.frontier_store is not None:     # start from scratch
+            self.frontier_store.clear()
+
+        return self._crawl(export_immediately=export_immediately)
+
+    @timing_decorator
+    def resume(self, export_immediately: bool = False) -> List[List[List[Any]]]:
+        """Continue an interrupted crawling from the state saved in the ``frontier_store``.
+        URLs that have already been processed are not fetched again, and the data extracted from them is included in the results.
+        Domains without a saved state are crawled from the start.
+
+        :param export_immediately: See :meth:`run`.
+        :return: See :meth:`run`.
+        """
+        if self.frontier_store is None:
+            raise ValueError("No frontier store has been passed. Resuming is only possible if the crawling state has been saved.")
+
+        return self._crawl(export_immediately=export_immediately)
+
+    def iter_results(self) -> Iterator[Tuple[int, str, List[Any]]]:
+        """Execute the crawling task and yield the data of each URL as soon as it has been extracted,
+        instead of collecting all data first. This allows to process the results with constant memory.
+        Note that the results are neither kept in :attr:`data` nor exported.
+
+        :return: Iterator over tuples ``(domain_index, url, url_data)``, where ``domain_index`` is the index of the crawled domain
+            in the list of start URLs and ``url_data`` is a list with one entry per extracted datapoint.
+            The results of different domains are yielded in the order they arrive.
+        """
+        return iterate_synchronously(self.iter_results_async())
+
+    async def iter_results_async(self) -> AsyncIterator[Tuple[int, str, List[Any]]]:
+        """Asynchronous version of :meth:`iter_results`, to be used with ``async for``."""
+        if self.frontier_store is not None:     # start from scratch
+            self.frontier_store.clear()
+
+        if self.backend == backends.MULTITHREADING:
+            def produce(on_result):
+                return asyncio.get_event_loop().run_in_executor(None, functools.partial(
+                    self._crawl_with_threads, export_attrs=None, return_type="none", on_result=on_result))
+
+            results = iterate_results(produce, threaded=True, max_queue_size=self.parallel_processes)
+        elif self.backend == backends.ASYNCIO:
+            def produce(on_result):
+                return self._crawl_async(export_attrs=None, return_type="none", on_result=on_result)
+
+            results = iterate_results(produce, max_queue_size=self.parallel_processes)
+        else:
+            raise ValueError(f'Backend "{self.backend}" not supported.')
+
+        async for result in results:
+            yield result
+
+    def _crawl(self, export_immediately: bool = False) -> List[List[List[Any]]]:
         if export_immediately:
             return_type = "none"
             export_attrs = self.export_attrs
@@ -93,40 +204,79 @@ class Crawler:
             export_attrs = None
 
         if self.backend == backends.MULTITHREADING:
-            # Prepare argument list
-            urls_and_index = list(enumerate(self.urls))  # all URLs with their respective index
-
-            # Define function with constant parameters pre-filled
-            def crawl_domain_prefilled_params(current_index: int, domain: str):
-                return multithreading_backend.crawl_domain(start_url=domain, search_attributes=self.search_attrs,
-                                                           export_attrs=export_attrs, user_agent=self.user_agent,
-                                                           current_index=current_index, return_type=return_type,
-                                                           progress_bar=self._progress_bar,
-                                                           **self.crawling_attrs.__dict__)
-
-            # Map crawl_domain() function over all domains to have it work in parallel
-            pool = ThreadPool(processes=self.parallel_processes)
-            self.data = pool.starmap(crawl_domain_prefilled_params, urls_and_index)
-            pool.close()
-            pool.join()
+            self.data = self._crawl_with_threads(export_attrs=export_attrs, return_type=return_type)
         elif self.backend == backends.ASYNCIO:
-            async def crawl_all_urls(urls: Union[str, List[str]]):
-                semaphore = asyncio.BoundedSemaphore(self.parallel_processes)
-                async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                    tasks = [asyncio_backend.async_crawl_domain(start_url=url, session=session, search_attributes=self.search_attrs,
-                                                                export_attrs=export_attrs, user_agent=self.user_agent,
-                                                                return_type=return_type, progress_bar=self._progress_bar, current_index=i,
-                                                                semaphore=semaphore,
-                                                                **self.crawling_attrs.__dict__)
-                             for i, url in enumerate(urls)]
-                    return await asyncio.gather(*tasks)
-
-            self.data = asyncio.get_event_loop().run_until_complete(crawl_all_urls(self.urls))  # instead of asyncio.run() which throws RuntimeErrors, see https://github.com/aio-libs/aiohttp/issues/4324#issuecomment-676675779
+            self.data = asyncio.get_event_loop().run_until_complete(self._crawl_async(export_attrs=export_attrs, return_type=return_type))  # instead of asyncio.run() which throws RuntimeErrors, see https://github.com/aio-libs/aiohttp/issues/4324#issuecomment-676675779
         else:
             raise ValueError(f'Backend "{self.backend}" not supported.')
 
         return self.data
 
+    def _crawl_with_threads(self, export_attrs: ExportAttributes = None, return_type: str = "data",
+                            on_result: Callable[[int, str, list], None] = None) -> list:
+        # Prepare argument list
+        urls_and_index = list(enumerate(self.urls))  # all URLs with their respective index
+
+        # Define function with constant parameters pre-filled
+        def crawl_domain_prefilled_params(current_index: int, domain: str):
+            return multithreading_backend.crawl_domain(start_url=domain, search_attributes=self.search_attrs,
+                                                       export_attrs=export_attrs, user_agent=self.user_agent,
+                                                       current_index=current_index, return_type=return_type,
+                                                       progress_bar=self._progress_bar,
+                                                       frontier_store=self.frontier_store, on_result=on_result,
+                                                       html_parser=self.html_parser, http_cache=self.http_cache,
+                                                       warc_writer=self.warc_writer, warc_archive=self.warc_archive,
+                                                       robots_cache=self.robots_cache, rate_controller=self.rate_controller,
+                                                       circuit_breaker=self.circuit_breaker,
+                                                       **self.crawling_attrs.__dict__)
+
+        # Map crawl_domain() function over all domains to have it work in parallel
+        pool = ThreadPool(processes=self.parallel_processes)
+        try:
+            return pool.starmap(crawl_domain_prefilled_params, urls_and_index)
+        finally:
+            pool.close()
+            pool.join()
+
+    async def _crawl_async(self, export_attrs: ExportAttributes = None, return_type: str = "data",
+                           on_result: Callable[[int, str, list], Awaitable] = None) -> list:
+        semaphore = asyncio.BoundedSemaphore(self.parallel_processes)
+        executor = None
+        if self.parsing_processes is not None:
+            executor = asyncio_backend.create_parsing_pool(self.search_attrs, self.parsing_processes, html_parser=self.html_parser)
+        try:
+            connector = self.connection_attrs.create_connector(default_limit=max(self.parallel_processes, DEFAULT_CONNECTION_LIMIT))
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
+                if self.crawling_attrs.scheduling is not None:    # one scheduler for the frontiers of all domains
+                    return await asyncio_backend.async_crawl_domains(start_urls=self.urls, session=session,
+                                                                     search_attributes=self.search_attrs,
+                                                                     export_attrs=export_attrs, user_agent=self.user_agent,
+                                                                     return_type=return_type, progress_bar=self._progress_bar,
+                                                                     parallel_processes=self.parallel_processes,
+                                                                     frontier_store=self.frontier_store, on_result=on_result,
+                                                                     executor=executor, html_parser=self.html_parser,
+                                                                     http_cache=self.http_cache,
+                                                                     warc_writer=self.warc_writer, warc_archive=self.warc_archive,
+                                                                     robots_cache=self.robots_cache, rate_controller=self.rate_controller,
+                                                                     circuit_breaker=self.circuit_breaker,
+                                                                     **self.crawling_attrs.__dict__)
+
+                tasks = [asyncio_backend.async_crawl_domain(start_url=url, session=session, search_attributes=self.search_attrs,
+                                                            export_attrs=export_attrs, user_agent=self.user_agent,
+                                                            return_type=return_type, progress_bar=self._progress_bar, current_index=i,
+                                                            semaphore=semaphore, frontier_store=self.frontier_store,
+                                                            on_result=on_result, executor=executor, html_parser=self.html_parser,
+                                                            http_cache=self.http_cache,
+                                                            warc_writer=self.warc_writer, warc_archive=self.warc_archive,
+                                                            robots_cache=self.robots_cache, rate_controller=self.rate_controller,
+                                                            circuit_breaker=self.circuit_breaker,
+                                                            **self.crawling_attrs.__dict__)
+                         for i, url in enumerate(self.urls)]
+                return await asyncio.gather(*tasks)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
     def run_and_export(self, export_attrs: ExportAttributes = None) -> None:
         """Shorthand for ``Crawler.run(export_immediately=True)``.
 
@@ -155,6 +305,6 @@ class Crawler:
             return
 
         if len(self.data) == 1:
-            export_to_csv(self.data[0], **ea.__dict__)
+            export_dataset(self.data[0], column_types=self.search_attrs.column_types, **ea.__dict__)
         else:
-            multithreaded_csv_export(self.data, **ea.__dict__)
+            multithreaded_csv_export(self.data, column_types=self.search_attrs.column_types, **ea.__dict__)
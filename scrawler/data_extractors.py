@@ -7,7 +7,8 @@ from bs4 import BeautifulSoup, Tag, NavigableString
 import readability
 
 from scrawler.utils.general_utils import sanitize_text
-from scrawler.website import Website
+from scrawler.website import Website, URL, HEADERS, TEXT, DOM
+from scrawler.parsers import SelectolaxTag, TagQuery
 from scrawler.utils.web_utils import get_directory_depth
 from scrawler.defaults import DEFAULT_EMPTY_FIELD_STRING
 
@@ -70,7 +71,13 @@ def supports_dynamic_parameters(func) -> Callable:
 
 
 class BaseExtractor:
-    def __init__(self, *args, dynamic_parameters: bool = False, n_return_values: int = None, **kwargs) -> None:
+    #: Parts of the website the extractor needs (``url``, ``headers``, ``text`` and/or ``dom``).
+    #: The HTML tree is only built if at least one extractor requires the ``dom`` (see :attr:`.SearchAttributes.requires`).
+    #: Custom extractors may need anything by default.
+    requires = frozenset({URL, HEADERS, TEXT, DOM})
+
+    def __init__(self, *args, dynamic_parameters: bool = False, n_return_values: int = None,
+                 column_type: type = None, **kwargs) -> None:
         """Provides the basic architecture for each data extractor.
         Every data extractor has to inherit from :class:`.BaseExtractor`.
 
@@ -81,10 +88,23 @@ class BaseExtractor:
         :param n_return_values: Specifies the number of values that will be returned by the extractor.
             This is almost always 1, but there are cases such as :class:`.DateExtractor` which may return more values.
             See also `here <custom_data_extractors.html#n-return-values>`__.
+        :param column_type: Python type of the returned value(s) (``str``, ``int``, ``float``, ``bool`` or ``datetime``).
+            Used for typed export formats such as Parquet. Defaults to ``str``.
+            See also `here <custom_data_extractors.html#column-type>`__.
         :param kwargs: Keyword arguments to be used by children inheriting from :class:`.BaseExtractor`.
         """
         self.dynamic_parameters = dynamic_parameters
         self.n_return_values = n_return_values if (n_return_values is not None) else 1
+        self.column_type = column_type if (column_type is not None) else str
+
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        """HTML tags the extractor looks up with :meth:`.Website.find` or :meth:`.Website.find_all`.
+        If all extractors that require the ``dom`` register their queries here, the tags are collected in a single pass
+        over the HTML text (see :meth:`.Website.scan_tags`) instead of building the HTML tree.
+        Extractors that return no queries (the default) use the HTML tree.
+        """
+        return []
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None):
@@ -100,6 +120,8 @@ class BaseExtractor:
 
 
 class GeneralHtmlTagExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, tag_types: tuple, tag_attrs: dict, attr_to_extract: str,
                  fill_empty_field: bool = True, **kwargs):
         """General purpose extractor for extracting HTML tags and then extracting a single attribute from the tag.
@@ -120,6 +142,10 @@ class GeneralHtmlTagExtractor(BaseExtractor):
         self.fill_empty_field = fill_empty_field
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(self.tag_types, attrs=self.tag_attrs)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
         html_tag = website.find(self.tag_types, attrs=self.tag_attrs)
@@ -138,6 +164,8 @@ class GeneralHtmlTagExtractor(BaseExtractor):
 
 
 class GeneralHttpHeaderFieldExtractor(BaseExtractor):
+    requires = frozenset({HEADERS})
+
     def __init__(self, field_to_extract: str, fill_empty_field: bool = True, **kwargs):
         """General purpose extractor for extracting `HTTP header <https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers>`__ fields."""
         self.field_to_extract = field_to_extract
@@ -160,9 +188,12 @@ class GeneralHttpHeaderFieldExtractor(BaseExtractor):
 
 
 class AccessTimeExtractor(BaseExtractor):
+    requires = frozenset()
+
     def __init__(self, **kwargs):
         """Returns the current time as time of access. To be exact, the time of processing."""
         super().__init__(**kwargs)
+        self.column_type = datetime
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> datetime:
@@ -170,6 +201,8 @@ class AccessTimeExtractor(BaseExtractor):
 
 
 class CmsExtractor(BaseExtractor):
+    requires = frozenset({TEXT, DOM})
+
     def __init__(self, **kwargs):
         """Extract the Content Management System (CMS) used for building the website.
 
@@ -177,6 +210,10 @@ class CmsExtractor(BaseExtractor):
         Therefore, not all systems will be identified correctly."""
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(_DEFAULT_CMS_TAG_TYPE, attrs=_DEFAULT_CMS_ATTRS, content=True)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
         cms_tag = website.find(_DEFAULT_CMS_TAG_TYPE, attrs=_DEFAULT_CMS_ATTRS, content=True)
@@ -192,6 +229,8 @@ class CmsExtractor(BaseExtractor):
 
 
 class ContactNameExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, tag_types: tuple = _DEFAULT_CONTACT_TAG_TYPES,
                  tag_attrs: dict = _DEFAULT_CONTACT_TAG_ATTRS,
                  separator: str = ";", **kwargs):
@@ -206,6 +245,10 @@ class ContactNameExtractor(BaseExtractor):
         self.separator = separator
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(self.tag_types, attrs=self.tag_attrs, find_all=True, text=True)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
         contact_tags = website.find_all(self.tag_types, attrs=self.tag_attrs)
@@ -218,6 +261,8 @@ class ContactNameExtractor(BaseExtractor):
 
 
 class CustomStringPutter(BaseExtractor):
+    requires = frozenset()
+
     def __init__(self, string: Union[str, list], **kwargs):
         """Simply returns a given string or entry from a list of strings. Background: Sometimes, a column should be appended with a custom label for a given website (for example, an external ID).
 
@@ -237,6 +282,8 @@ class CustomStringPutter(BaseExtractor):
 
 
 class DateExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, tag_types: tuple = _DEFAULT_DATE_TAG_TYPES,
                  tag_attrs: dict = _DEFAULT_DATE_TAG_ATTRS,
                  return_year_month_day: bool = False, **kwargs):
@@ -254,6 +301,11 @@ class DateExtractor(BaseExtractor):
         self.tag_attrs = tag_attrs
         self.return_year_month_day = return_year_month_day
         self.n_return_values = 3 if self.return_year_month_day else 1
+        self.column_type = int if self.return_year_month_day else datetime
+
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(self.tag_types, attrs=self.tag_attrs, content=True)]
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> Union[datetime, Tuple[int, int, int]]:
@@ -273,10 +325,17 @@ class DateExtractor(BaseExtractor):
 
 
 class DescriptionExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Get website description (the one shown in search engine results) using two common description fields."""
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(_DEFAULT_DESCRIPTION_TAG_TYPE, attrs=_DESCRIPTION_TAG_ATTRS_1, content=True),
+                TagQuery(_DEFAULT_DESCRIPTION_TAG_TYPE, attrs=_DESCRIPTION_TAG_ATTRS_2, content=True)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
         standard_desc_tag = website.find(_DEFAULT_DESCRIPTION_TAG_TYPE, attrs=_DESCRIPTION_TAG_ATTRS_1, content=True)
@@ -295,18 +354,23 @@ class DescriptionExtractor(BaseExtractor):
 
 
 class DirectoryDepthExtractor(BaseExtractor):
+    requires = frozenset({URL})
+
     def __init__(self, **kwargs):
         """Returns the directory level that a given document is in.
 
         For example, ``https://www.sub.example.com/dir1/dir2/file.html`` returns 3."""
         super().__init__(**kwargs)
+        self.column_type = int
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
-        return get_directory_depth(website.url)
+        return get_directory_depth(website.parsed_url)
 
 
 class ExpiryDateExtractor(GeneralHttpHeaderFieldExtractor, DateExtractor, BaseExtractor):
+    requires = frozenset({HEADERS, DOM})
+
     def __init__(self, return_year_month_day: bool = False, **kwargs):
         """Get website ``expiry`` date from HTTP header or HTML Meta tag."""
         GeneralHttpHeaderFieldExtractor.__init__(self, field_to_extract="Expires", **kwargs)
@@ -327,6 +391,8 @@ class ExpiryDateExtractor(GeneralHttpHeaderFieldExtractor, DateExtractor, BaseEx
 
 
 class HtmlTextExtractor(BaseExtractor):
+    requires = frozenset({TEXT})
+
     def __init__(self, **kwargs):
         """Get plain HTML text of website."""
         super().__init__(**kwargs)
@@ -337,9 +403,12 @@ class HtmlTextExtractor(BaseExtractor):
 
 
 class HttpStatusCodeExtractor(BaseExtractor):
+    requires = frozenset({HEADERS})
+
     def __init__(self, **kwargs):
         """Get status code of HTTP request."""
         super().__init__(**kwargs)
+        self.column_type = int
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
@@ -350,6 +419,8 @@ class HttpStatusCodeExtractor(BaseExtractor):
 
 
 class KeywordsExtractor(GeneralHtmlTagExtractor, BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Get keywords from HTML keyword meta tag (if present)."""
         super().__init__(tag_types=_DEFAULT_KEYWORDS_TAG_TYPE, tag_attrs=_DEFAULT_KEYWORDS_TAG_ATTRS,
@@ -361,6 +432,8 @@ class KeywordsExtractor(GeneralHtmlTagExtractor, BaseExtractor):
 
 
 class LanguageExtractor(GeneralHtmlTagExtractor, BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Get language of a given website from its HTML tag ``lang`` attribute."""
         super().__init__(tag_types="html", tag_attrs={}, attr_to_extract="lang", **kwargs)
@@ -371,6 +444,8 @@ class LanguageExtractor(GeneralHtmlTagExtractor, BaseExtractor):
 
 
 class LastModifiedDateExtractor(GeneralHttpHeaderFieldExtractor, DateExtractor, BaseExtractor):
+    requires = frozenset({HEADERS, DOM})
+
     def __init__(self, return_year_month_day: bool = False, **kwargs):
         """Get website ``last-modified`` date from HTTP header or HTML Meta tag."""
         GeneralHttpHeaderFieldExtractor.__init__(self, field_to_extract="Last-Modified", **kwargs)
@@ -391,10 +466,16 @@ class LastModifiedDateExtractor(GeneralHttpHeaderFieldExtractor, DateExtractor,
 
 
 class LinkExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Find all links from a website (without duplicates)."""
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery("a", find_all=True, href=True)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> set:
         link_tags = website.find_all("a", href=True)  # find all link tags <a> that have the attribute href
@@ -404,6 +485,8 @@ class LinkExtractor(BaseExtractor):
 
 
 class ServerProductExtractor(GeneralHttpHeaderFieldExtractor, BaseExtractor):
+    requires = frozenset({HEADERS})
+
     def __init__(self, **kwargs):
         """Get website ``Server`` info from HTTP header."""
         super().__init__(field_to_extract="Server", **kwargs)
@@ -414,9 +497,12 @@ class ServerProductExtractor(GeneralHttpHeaderFieldExtractor, BaseExtractor):
 
 
 class StepsFromStartPageExtractor(BaseExtractor):
+    requires = frozenset()
+
     def __init__(self, **kwargs):
         """Returns the number of links that have to be followed from the start page to arrive at this website."""
         super().__init__(**kwargs)
+        self.column_type = int
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
@@ -424,9 +510,16 @@ class StepsFromStartPageExtractor(BaseExtractor):
 
 
 class MobileOptimizedExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Checks whether website is optimized for mobile usage by looking up HTML ``viewport`` meta tag."""
         super().__init__(**kwargs)
+        self.column_type = int
+
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery(_DEFAULT_IS_MOBILE_OPTIMIZED_TAG_TYPE, attrs=_DEFAULT_IS_MOBILE_OPTIMIZED_TAG_ATTRS, content=True)]
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
@@ -437,6 +530,8 @@ class MobileOptimizedExtractor(BaseExtractor):
 
 
 class TermOccurrenceExtractor(BaseExtractor):
+    requires = frozenset({TEXT})
+
     def __init__(self, terms: Union[List[str], str], ignore_case: bool = False, **kwargs):
         """Checks if the given terms occur in the website's HTML text.
         Returns 0 if no term occurs in the soup's text, 1 if at least one occurs.
@@ -449,6 +544,7 @@ class TermOccurrenceExtractor(BaseExtractor):
         self.ignore_case = ignore_case
 
         super().__init__(**kwargs)
+        self.column_type = int
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
@@ -465,6 +561,8 @@ class TermOccurrenceExtractor(BaseExtractor):
 
 
 class TermOccurrenceCountExtractor(BaseExtractor):
+    requires = frozenset({TEXT})
+
     def __init__(self, terms: Union[List[str], str], ignore_case: bool = False, **kwargs):
         """Count the number of times the given terms occur in the website's HTML text.
 
@@ -477,6 +575,7 @@ class TermOccurrenceCountExtractor(BaseExtractor):
         self.ignore_case = ignore_case
 
         super().__init__(**kwargs)
+        self.column_type = int
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> int:
@@ -489,19 +588,27 @@ class TermOccurrenceCountExtractor(BaseExtractor):
 
 
 class TitleExtractor(BaseExtractor):
+    requires = frozenset({DOM})
+
     def __init__(self, **kwargs):
         """Get title of a website (the same that is shown in a browser in the tabs tray)."""
         super().__init__(**kwargs)
 
+    @property
+    def tag_queries(self) -> List[TagQuery]:
+        return [TagQuery("title", text=True)]
+
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
         try:
-            return sanitize_text(website.title.string)
+            return sanitize_text(website.find("title").string)
         except AttributeError:
             return DEFAULT_EMPTY_FIELD_STRING
 
 
 class UrlExtractor(BaseExtractor):
+    requires = frozenset({URL})
+
     def __init__(self, **kwargs):
         """Returns the website's URL."""
         super().__init__(**kwargs)
@@ -512,6 +619,8 @@ class UrlExtractor(BaseExtractor):
 
 
 class UrlBranchNameExtractor(BaseExtractor):
+    requires = frozenset({URL})
+
     def __init__(self, branch_name_position: int = 1, **kwargs):
         """Extract sub-domain names from URLs like ``subdomain.example.com``, which often refer to an entity's sub-branches.
 
@@ -536,6 +645,8 @@ class UrlBranchNameExtractor(BaseExtractor):
 
 
 class UrlCategoryExtractor(BaseExtractor):
+    requires = frozenset({URL})
+
     def __init__(self, category_position: int = 2, **kwargs):
         """
         Try to identify the category of a given URL as the directory specified by :attr:`category_position`.
@@ -554,6 +665,8 @@ class UrlCategoryExtractor(BaseExtractor):
 
 
 class WebsiteTextExtractor(BaseExtractor):
+    requires = frozenset({TEXT, DOM})
+
     def __init__(self, mode: str = "auto",
                  min_length: int = 30,
                  tag_types: tuple = _DEFAULT_TEXT_TAG_TYPES,
@@ -591,7 +704,9 @@ class WebsiteTextExtractor(BaseExtractor):
 
     @supports_dynamic_parameters
     def run(self, website: Website, index: int = None) -> str:
-        def get_txt(obj: Union[Website, BeautifulSoup, Tag]) -> str:
+        def get_txt(obj: Union[Website, BeautifulSoup, Tag, SelectolaxTag]) -> str:
+            if isinstance(obj, SelectolaxTag):  # found with the selectolax engine, which has no string types
+                return obj.get_text(separator=self.separator, strip=True)
             return BeautifulSoup.get_text(obj, separator=self.separator, strip=True, types=self.allowed_string_types)
 
         if self.mode == "auto":
@@ -6,15 +6,41 @@ from scrawler import backends
 # Request
 DEFAULT_REQUEST_TIMEOUT = 15  # in seconds
 DEFAULT_REQUEST_TLS_VERIFICATION = True
+DEFAULT_MAX_RETRIES = 0  # number of retries of a request that failed for a transient reason (e.g. a connection reset or status 503)
+DEFAULT_RETRY_BACKOFF = 1.0  # in seconds, base of the exponential backoff between two attempts
+DEFAULT_MAX_RETRY_BACKOFF = 60  # in seconds, longest wait before a retry (a longer Retry-After is not waited for)
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD = 5  # number of consecutive failed requests after which a host is considered unreachable
+DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT = 5 * 60  # in seconds, time after which an unreachable host is tried again
 DEFAULT_NO_CONCURRENT_REQUESTS_PER_HOST = 10
+DEFAULT_CONNECTION_LIMIT = 100  # maximum number of simultaneous connections of the Scraper (the Crawler uses its number of parallel processes)
+DEFAULT_DNS_CACHE_TTL = 5 * 60  # in seconds, time for which resolved host names are reused
+DEFAULT_KEEPALIVE_TIMEOUT = 30  # in seconds, time for which an idle connection is kept open for the next request to the same host
+DEFAULT_SESSION_POOL_CONNECTIONS = 100  # number of hosts whose connections a requests session keeps open (multithreading backend)
+DEFAULT_SESSION_POOL_MAXSIZE = 2  # connections kept open per host by a requests session (each thread makes one request at a time)
 
 # Crawling
 DEFAULT_BACKEND = backends.ASYNCIO
 DEFAULT_PAUSE_TIME = 0.5  # in seconds
+DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN = 1
+DEFAULT_MIN_PAUSE_TIME = 0.1  # in seconds, lower bound when adapting the pause time to the server's responses
+DEFAULT_MAX_PAUSE_TIME = 60  # in seconds, upper bound when adapting the pause time to the server's responses
+DEFAULT_RATE_INCREASE = 0.2  # in requests per second, added to the request rate of a host after each successful response
+DEFAULT_RATE_DECREASE_FACTOR = 0.5  # the request rate of a host is multiplied by this factor when the server is overloaded
+DEFAULT_CHECKPOINT_INTERVAL = 100   # number of processed URLs per domain after which the crawling state is saved
 DEFAULT_MAX_NO_PARALLEL_PROCESSES = 2 * os.cpu_count()
+DEFAULT_ROBOTS_TXT_TTL = 24 * 60 * 60  # in seconds, time for which a retrieved robots.txt file is reused
+DEFAULT_ROBOTS_TXT_NEGATIVE_TTL = 60 * 60  # in seconds, time for which a missing/unreachable robots.txt file is not requested again
+DEFAULT_REDIRECT_CACHE_TTL = 60 * 60  # in seconds, time for which a redirect of a start URL is reused for further start URLs
+# Query parameters that are removed when canonicalizing URLs (tracking and session IDs, matched case-insensitively)
+DEFAULT_STRIPPED_URL_PARAMETERS = ("fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "igshid",
+                                   "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok")
+DEFAULT_STRIPPED_URL_PARAMETER_PATTERN = r"utm_\w+|phpsessid|jsessionid|aspsessionid\w*|cfid|cftoken|session_?id"
+DEFAULT_BLOOM_FILTER_ERROR_RATE = 0.0001  # probability that a URL is falsely considered as already seen if seen_url_set="bloom"
+DEFAULT_BLOOM_FILTER_CAPACITY = 100000  # number of URLs the Bloom filter is sized for initially, grows as needed
+DEFAULT_PARSED_URL_CACHE_SIZE = 10000  # number of most recently parsed URLs whose ParsedUrl objects are reused
 
 # Data processing
-DEFAULT_HTML_PARSER = "html.parser"
+DEFAULT_HTML_PARSER = "auto"   # fastest installed parser, see scrawler.parsers
 DEFAULT_EMPTY_FIELD_STRING = "NULL"
 
 # CSV data export
@@ -22,4 +48,5 @@ DEFAULT_CSV_ENCODING = "utf-8"
 DEFAULT_CSV_SEPARATOR = ","
 DEFAULT_CSV_QUOTING = csv.QUOTE_MINIMAL
 DEFAULT_CSV_ESCAPECHAR = None
+DEFAULT_PARQUET_ROW_GROUP_SIZE = 10000
 # Matching SQL loading parameters (MySQL/MariaDB syntax): CHARACTER SET utf8 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' LINES TERMINATED BY '\r\n' IGNORE 1 LINES
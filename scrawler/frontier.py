@@ -0,0 +1,511 @@
+"""Bookkeeping of the URLs found, processed and discarded while crawling a domain."""
+from typing import Union, Iterable, Callable, Tuple, Optional, Dict
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+import logging
+import pickle
+import sqlite3
+import threading
+
+from scrawler.defaults import DEFAULT_CHECKPOINT_INTERVAL, DEFAULT_BLOOM_FILTER_ERROR_RATE
+from scrawler.canonicalization import UrlCanonicalizer
+from scrawler.url_sets import EXACT, create_url_set
+from scrawler.utils.general_utils import ProgressBar
+from scrawler.utils.web_utils import (get_directory_depth, strip_unnecessary_url_parts, fix_relative_urls,
+                                      filter_urls, extract_same_host_pattern)
+
+
+class CrawlFrontier:
+    def __init__(self, start_url: str,
+                 max_no_urls: int = float("inf"),
+                 max_distance_from_start_url: int = float("inf"),
+                 max_subdirectory_depth: int = float("inf"),
+                 filter_non_standard_schemes: bool = True,
+                 filter_media_files: bool = True,
+                 blocklist: Iterable = (),
+                 filter_foreign_urls: Union[str, Callable] = "auto",
+                 strip_url_parameters: bool = False,
+                 strip_url_fragments: bool = True,
+                 url_canonicalizer: UrlCanonicalizer = None,
+                 seen_url_set: str = EXACT,
+                 bloom_filter_error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE,
+                 robots_txt_parser: RobotFileParser = None,
+                 user_agent: str = None,
+                 progress_bar: ProgressBar = None,
+                 frontier_store: "SQLiteFrontierStore" = None,
+                 index: int = None,
+                 **kwargs):
+        """Keeps track of the crawling state of one domain: which URLs still have to be crawled, which are currently
+        being fetched and which have already been processed or discarded.
+        All URL filtering and all crawling limits are applied here, so that the crawling backends only have to fetch
+        the URLs handed out by :meth:`pop` and report back the results.
+
+        :param start_url: The first URL to be accessed (after redirects have been resolved).
+        :param max_no_urls: Maximum number of URLs to be crawled (safety limit for very large crawls).
+            URLs that are currently being fetched count towards this limit.
+        :param max_distance_from_start_url: Maximum number of links that have to be followed to arrive at a certain URL from the start_url.
+        :param max_subdirectory_depth: Maximum sub-level of the host up to which to crawl.
+        :param filter_non_standard_schemes: See :func:`.filter_urls`.
+        :param filter_media_files: See :func:`.filter_urls`.
+        :param blocklist: See :func:`.filter_urls`.
+        :param filter_foreign_urls: See :func:`.filter_urls`. If ``auto``, the matching pattern is extracted from the start URL.
+        :param strip_url_parameters: See :func:`.strip_unnecessary_url_parts`.
+        :param strip_url_fragments: See :func:`.strip_unnecessary_url_parts`.
+        :param url_canonicalizer: If passed, the start URL and all found URLs are brought into their canonical form
+            with this :class:`.UrlCanonicalizer` before they are compared with the URLs already known.
+        :param seen_url_set: How the processed and discarded URLs are stored (see :func:`.create_url_set`).
+            ``exact`` keeps the URL strings in sets. For very large crawls, ``fingerprints`` only keeps a 64-bit fingerprint per URL
+            (:class:`.FingerprintSet`) and ``bloom`` a Bloom filter (:class:`.BloomFilter`), which needs even less memory,
+            but skips a found URL with a probability of up to ``bloom_filter_error_rate`` because it is falsely considered as already seen.
+            In both cases, :attr:`processed` and :attr:`discarded` can't be iterated and the distance from the start URL is only kept
+            for the URLs still to be crawled.
+        :param bloom_filter_error_rate: False positive rate of the Bloom filters if ``seen_url_set`` is ``bloom``.
+        :param robots_txt_parser: If passed, URLs disallowed by the ``robots.txt`` file are discarded.
+        :param user_agent: User agent used for checking the ``robots.txt`` rules.
+        :param progress_bar: If a :class:`.ProgressBar` object is passed, it is updated with the crawling progress.
+        :param frontier_store: If passed, all changes are recorded in this :class:`.SQLiteFrontierStore`, so that the crawling can be resumed.
+            To continue from a stored state, use :meth:`restore` instead of creating a new object.
+        :param index: Index of the domain in the list of crawled domains (used as key in the ``frontier_store``).
+        """
+        if url_canonicalizer is not None:
+            start_url = url_canonicalizer.canonicalize(start_url)
+        self.start_url = start_url
+
+        self.max_no_urls = max_no_urls
+        self.max_distance_from_start_url = max_distance_from_start_url
+        self.max_subdirectory_depth = max_subdirectory_depth
+
+        self.filter_non_standard_schemes = filter_non_standard_schemes
+        self.filter_media_files = filter_media_files
+        self.blocklist = blocklist
+        self.filter_foreign_urls = extract_same_host_pattern(start_url) if (filter_foreign_urls == "auto") else filter_foreign_urls
+        self.strip_url_parameters = strip_url_parameters
+        self.strip_url_fragments = strip_url_fragments
+        self.url_canonicalizer = url_canonicalizer
+        self.seen_url_set = seen_url_set
+
+        self.robots_txt_parser = robots_txt_parser
+        self.user_agent = "*" if (user_agent is None) else user_agent
+
+        self.progress_bar = progress_bar
+
+        self.frontier_store = frontier_store
+        self.index = index
+
+        self.to_crawl = {start_url}
+        self.in_progress = set()
+        self.processed = create_url_set(seen_url_set, bloom_filter_error_rate=bloom_filter_error_rate)
+        self.discarded = create_url_set(seen_url_set, bloom_filter_error_rate=bloom_filter_error_rate)
+        self.url_and_distance = {start_url: 0}  # for parameter max_distance_from_start_url
+        self._ignored_parameters: Dict[str, frozenset] = {}     # URL without query -> parameters that don't change the page (learned from rel=canonical)
+
+        #: Number of URLs that were fetched successfully (used for the ``max_no_urls`` limit).
+        self.no_processed_urls = 0
+
+        if self.frontier_store is not None:
+            self.frontier_store.add_domain(self.index, start_url)
+
+        if self.progress_bar is not None:
+            self.progress_bar.update(iterations=0, total_length_update=1)
+
+    @classmethod
+    def restore(cls, state: dict, frontier_store: "SQLiteFrontierStore", index: int, **kwargs) -> "CrawlFrontier":
+        """Recreate a frontier from a state saved in a :class:`.SQLiteFrontierStore`.
+
+        :param state: Saved state as returned by :meth:`.SQLiteFrontierStore.load_domain`.
+        :param frontier_store: Store containing the saved state. Further changes are recorded there.
+        :param index: Index of the domain in the list of crawled domains.
+        :param kwargs: Passed on to the constructor (crawling limits, filters, ``robots_txt_parser``, ...).
+        """
+        progress_bar = kwargs.pop("progress_bar", None)
+        frontier = cls(state["start_url"], **kwargs)    # the store is only attached after restoring to avoid re-recording the start URL
+        frontier.to_crawl = state["to_crawl"]
+        frontier.processed.update(state["processed"])
+        frontier.discarded.update(state["discarded"])
+        frontier.url_and_distance = state["url_and_distance"]
+        if frontier.seen_url_set != EXACT:
+            frontier.url_and_distance = {url: frontier.url_and_distance[url] for url in frontier.to_crawl}
+        frontier.no_processed_urls = max(state.get("no_processed_urls", 0), len(state["data"]))    # URLs without data count as well
+        frontier.frontier_store = frontier_store
+        frontier.index = index
+
+        frontier.progress_bar = progress_bar
+        if progress_bar is not None:
+            progress_bar.update(iterations=frontier.no_processed_urls,
+                                total_length_update=frontier.no_processed_urls + len(frontier.to_crawl))
+
+        logging.info(f"Restored crawling state of {frontier.start_url}: {frontier.no_processed_urls} URLs processed, {len(frontier.to_crawl)} URLs left to crawl.")
+        return frontier
+
+    @property
+    def limit_reached(self) -> bool:
+        """``True`` if no further URLs may be handed out because of the ``max_no_urls`` limit."""
+        return (self.no_processed_urls + len(self.in_progress)) >= self.max_no_urls
+
+    @property
+    def has_pending_urls(self) -> bool:
+        """``True`` if :meth:`pop` may currently return a URL."""
+        return (len(self.to_crawl) > 0) and not self.limit_reached
+
+    @property
+    def is_finished(self) -> bool:
+        """``True`` if there are neither URLs left to crawl nor URLs currently being fetched."""
+        return (len(self.in_progress) == 0) and not self.has_pending_urls
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Hand out the next URL to be fetched, together with its distance from the start URL.
+        URLs that are disallowed by ``robots.txt`` or exceed the depth limits are discarded on the way.
+
+        :return: Tuple ``(url, steps_from_start_page)`` or ``None`` if no URL can currently be handed out.
+        """
+        while self.has_pending_urls:
+            next_url = self.to_crawl.pop()
+            current_steps_from_start_page = self.url_and_distance[next_url]
+            if self.seen_url_set != EXACT:  # the distance is only kept for the URLs still to be crawled
+                del self.url_and_distance[next_url]
+
+            # Check if URL access is disallowed by robots.txt
+            if (self.robots_txt_parser is not None) and not self.robots_txt_parser.can_fetch(self.user_agent, next_url):
+                logging.info(f"URL access disallowed for crawler by robots.txt: {next_url}")
+                self._discard(next_url, current_steps_from_start_page)
+                continue
+
+            # Crawl only up to the subdirectory depth specified in the parameter
+            current_directory_depth = get_directory_depth(next_url)
+            if (current_directory_depth is not None) and (current_directory_depth > self.max_subdirectory_depth):
+                logging.warning(f"Subdirectory depth too deep ({current_directory_depth}): {next_url}")
+                self._discard(next_url, current_steps_from_start_page)
+                continue
+
+            # Crawl only up to a certain distance (links that had to be followed) from the start_url
+            if current_steps_from_start_page > self.max_distance_from_start_url:
+                logging.warning(f"Too many steps from start page ({current_steps_from_start_page}): {next_url}")
+                self._discard(next_url, current_steps_from_start_page)
+                continue
+
+            self.in_progress.add(next_url)
+            return next_url, current_steps_from_start_page
+
+        return None
+
+    def should_follow_links(self, steps_from_start_page: int) -> bool:
+        """Whether links found on a page with the given distance from the start URL can still be crawled."""
+        return steps_from_start_page < self.max_distance_from_start_url
+
+    def mark_failed(self, url: str) -> None:
+        """Report that a URL handed out by :meth:`pop` could not be fetched."""
+        self.in_progress.discard(url)
+        self._discard(url)
+
+    def claim_canonical_url(self, url: str, steps_from_start_page: int, canonical_url: Optional[str]) -> Optional[str]:
+        """Decide under which URL a fetched page is processed, given the canonical URL it declares (see :func:`.get_rel_canonical_url`).
+
+        - If the page declares no canonical URL, declares itself or a URL that is not crawled (e.g. a foreign URL or one disallowed by
+          ``robots.txt``), ``url`` is returned.
+        - If the canonical page has already been processed (or is being fetched), the page is a duplicate: It is marked as processed
+          without data and ``None`` is returned. Its links don't have to be followed, as they are the links of the canonical page.
+        - Otherwise, the page stands in for the canonical page, which is not fetched anymore: ``url`` is marked as processed
+          and the canonical URL, which takes its place among the URLs in progress, is returned.
+
+        If the canonical URL only lacks some query parameters of ``url`` (e.g. ``/article`` for ``/article?ref=home``),
+        these parameters are considered irrelevant for all URLs with the same path: They are removed from the URLs to crawl and from all
+        links found later, so that further variants are not fetched at all.
+
+        Afterwards, report the outcome for the returned URL with :meth:`mark_processed` or :meth:`mark_failed`.
+
+        :param url: URL handed out by :meth:`pop` that has been fetched.
+        :param steps_from_start_page: Distance of ``url`` from the start URL.
+        :param canonical_url: Absolute canonical URL declared by the page (or ``None``).
+        """
+        if canonical_url is None:
+            return url
+        canonical_url = strip_unnecessary_url_parts([canonical_url], parameters=self.strip_url_parameters,
+                                                    fragments=self.strip_url_fragments).pop()
+        if self.url_canonicalizer is not None:
+            canonical_url = self.url_canonicalizer.canonicalize(canonical_url)
+        if (canonical_url == url) or (canonical_url in self.discarded) or not self._is_crawlable(canonical_url):
+            return url
+        self._learn_ignored_parameters(url, canonical_url)
+
+        if (canonical_url in self.processed) or (canonical_url in self.in_progress):
+            logging.debug(f"Skipping {url}, duplicate of {canonical_url}")
+            self.mark_processed(url, steps_from_start_page)
+            return None
+
+        # The canonical URL takes the place of the fetched URL
+        self.in_progress.discard(url)
+        self.processed.add(url)
+        self.in_progress.add(canonical_url)
+        if self.seen_url_set == EXACT:
+            self.url_and_distance[canonical_url] = min(self.url_and_distance.get(canonical_url, steps_from_start_page),
+                                                       steps_from_start_page)
+        else:
+            self.url_and_distance.pop(canonical_url, None)
+        was_pending = canonical_url in self.to_crawl
+        self.to_crawl.discard(canonical_url)
+
+        if self.frontier_store is not None:
+            self.frontier_store.record_url(self.index, url, "processed", steps_from_start_page)
+        if (self.progress_bar is not None) and was_pending:     # both URLs were counted, but only one is processed
+            self.progress_bar.update(iterations=1)
+        return canonical_url
+
+    def mark_processed(self, url: str, steps_from_start_page: int, found_urls: Iterable = (), url_data: list = None,
+                       aliases: Iterable = ()) -> None:
+        """Report that a URL handed out by :meth:`pop` has been processed and add the links found on it to the frontier.
+
+        :param url: Processed URL.
+        :param steps_from_start_page: Distance of the processed URL from the start URL.
+        :param found_urls: Raw links found on the page (they are cleaned and filtered here).
+        :param url_data: Data extracted from the URL. Only needed to save it in the ``frontier_store``.
+        :param aliases: Other URLs of the same page, e.g. its redirect chain (see :func:`.get_redirect_chain`).
+            They are marked as processed as well, so that links to them are not crawled again.
+        """
+        found_urls = strip_unnecessary_url_parts(found_urls, parameters=self.strip_url_parameters,
+                                                 fragments=self.strip_url_fragments)
+        found_urls = fix_relative_urls(urls=found_urls, base_url=self.start_url)
+        if self.url_canonicalizer is not None:
+            found_urls = self.url_canonicalizer.canonicalize_all(found_urls)
+        if self._ignored_parameters:
+            found_urls = {self._strip_ignored_parameters(found_url) for found_url in found_urls}
+        found_urls, filtered = filter_urls(found_urls, base_url=self.start_url,
+                                           filter_foreign_urls=self.filter_foreign_urls,
+                                           filter_non_standard_schemes=self.filter_non_standard_schemes,
+                                           filter_media_files=self.filter_media_files,
+                                           blocklist=self.blocklist,
+                                           return_discarded=True)
+        newly_discarded = {filtered_url for filtered_url in filtered if filtered_url not in self.discarded}
+        self.discarded.update(newly_discarded)
+
+        # URLs redirecting to the page (or the page it was redirected to) don't have to be fetched anymore
+        aliases = strip_unnecessary_url_parts(aliases, parameters=self.strip_url_parameters,
+                                              fragments=self.strip_url_fragments)
+        if self.url_canonicalizer is not None:
+            aliases = self.url_canonicalizer.canonicalize_all(aliases)
+        aliases = {alias for alias in aliases if (alias != url) and not self._is_known(alias, pending=False)}
+        self.processed.update(aliases)
+        skipped = aliases.intersection(self.to_crawl)
+        self.to_crawl.difference_update(skipped)
+
+        # All newly found URLs to working list (to_crawl) except those processed, discarded or in progress already
+        self.in_progress.discard(url)
+        self.processed.add(url)
+        self.no_processed_urls += 1
+        urls_to_add = {found_url for found_url in found_urls if not self._is_known(found_url)}
+        self.to_crawl.update(urls_to_add)
+
+        # Add URL depth (distance from start) to each newly found URL (URL depths that are already included are not overwritten)
+        for new_url in urls_to_add:
+            self.url_and_distance.setdefault(new_url, steps_from_start_page + 1)
+
+        if self.frontier_store is not None:
+            self.frontier_store.record_url(self.index, url, "processed", steps_from_start_page)
+            for alias in aliases:
+                self.frontier_store.record_url(self.index, alias, "processed", self.url_and_distance.get(alias))
+            if url_data is not None:
+                self.frontier_store.record_row(self.index, url, url_data)
+            self.frontier_store.record_no_processed_urls(self.index, self.no_processed_urls)
+            for new_url in urls_to_add:
+                self.frontier_store.record_url(self.index, new_url, "to_crawl", self.url_and_distance[new_url])
+            for filtered_url in newly_discarded:
+                self.frontier_store.record_url(self.index, filtered_url, "discarded", self.url_and_distance.get(filtered_url))
+            if (self.no_processed_urls % self.frontier_store.checkpoint_interval) == 0:
+                self.frontier_store.checkpoint()
+        if self.seen_url_set != EXACT:
+            for alias in skipped:
+                del self.url_and_distance[alias]
+
+        logging.debug(f"Processed {url}")
+
+        if self.progress_bar is not None:
+            self.progress_bar.update(iterations=1 + len(skipped), total_length_update=len(urls_to_add))
+
+    def close(self) -> None:
+        """Mark the domain as finished in the ``frontier_store`` (if used) and write a checkpoint."""
+        if self.frontier_store is not None:
+            self.frontier_store.mark_finished(self.index)
+
+    def _learn_ignored_parameters(self, url: str, canonical_url: str) -> None:
+        """If ``canonical_url`` equals ``url`` without some of its query parameters, remember that these parameters don't change
+        the pages with this path and replace the URLs to crawl with their stripped versions."""
+        parts, canonical_parts = urlsplit(url), urlsplit(canonical_url)
+        if (parts[:3] != canonical_parts[:3]) or not parts.query:   # scheme, host or path differ
+            return
+        parameters = parts.query.split("&")
+        canonical_parameters = canonical_parts.query.split("&") if canonical_parts.query else []
+        kept = {parameter.split("=", 1)[0] for parameter in canonical_parameters}
+        ignored = {parameter.split("=", 1)[0] for parameter in parameters if parameter not in canonical_parameters}
+        if (not set(canonical_parameters).issubset(parameters)) or (ignored & kept):
+            return
+
+        key = urlunsplit(parts[:3] + ("", ""))
+        known = self._ignored_parameters.get(key, frozenset())
+        if ignored.issubset(known):
+            return
+        self._ignored_parameters[key] = known.union(ignored)
+        logging.debug(f"Ignoring parameters {sorted(ignored)} of {key} (declared by rel=canonical)")
+
+        for pending_url in [pending_url for pending_url in self.to_crawl if pending_url.startswith(key)]:
+            stripped_url = self._strip_ignored_parameters(pending_url)
+            if stripped_url == pending_url:
+                continue
+            self.to_crawl.discard(pending_url)
+            if not self._is_known(stripped_url):
+                self.to_crawl.add(stripped_url)
+                self.url_and_distance.setdefault(stripped_url, self.url_and_distance[pending_url])
+                if self.frontier_store is not None:
+                    self.frontier_store.record_url(self.index, stripped_url, "to_crawl", self.url_and_distance[stripped_url])
+                if self.progress_bar is not None:
+                    self.progress_bar.update(iterations=0, total_length_update=1)
+            self._discard(pending_url, self.url_and_distance[pending_url])
+            if self.seen_url_set != EXACT:
+                del self.url_and_distance[pending_url]
+
+    def _strip_ignored_parameters(self, url: str) -> str:
+        if "?" not in url:
+            return url
+        parts = urlsplit(url)
+        ignored = self._ignored_parameters.get(urlunsplit(parts[:3] + ("", "")))
+        if ignored is None:
+            return url
+        query = "&".join(parameter for parameter in parts.query.split("&") if parameter.split("=", 1)[0] not in ignored)
+        return urlunsplit(parts[:3] + (query, parts.fragment))
+
+    def _is_known(self, url: str, pending: bool = True) -> bool:
+        """Whether a URL has been processed or discarded, is being fetched or (if ``pending``) is still to be crawled."""
+        return ((url in self.processed) or (url in self.discarded) or (url in self.in_progress)
+                or (pending and (url in self.to_crawl)))
+
+    def _is_crawlable(self, url: str) -> bool:
+        """Whether a URL passes the URL filters and the ``robots.txt`` rules."""
+        if not filter_urls({url}, base_url=self.start_url, filter_foreign_urls=self.filter_foreign_urls,
+                           filter_non_standard_schemes=self.filter_non_standard_schemes,
+                           filter_media_files=self.filter_media_files, blocklist=self.blocklist):
+            return False
+        return (self.robots_txt_parser is None) or self.robots_txt_parser.can_fetch(self.user_agent, url)
+
+    def _discard(self, url: str, steps_from_start_page: int = None) -> None:
+        self.discarded.add(url)
+        if self.frontier_store is not None:
+            self.frontier_store.record_url(self.index, url, "discarded",
+                                           self.url_and_distance.get(url) if (steps_from_start_page is None) else steps_from_start_page)
+        if self.progress_bar is not None:
+            self.progress_bar.update(iterations=1)
+
+
+class SQLiteFrontierStore:
+    def __init__(self, path: str, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """On-disk store for the state of :class:`.CrawlFrontier` objects, backed by a local SQLite file.
+        Allows to resume a crawling (see :meth:`.Crawler.resume`) after a crash or restart without re-fetching
+        URLs that have already been processed.
+
+        Changes are buffered in memory and written to disk in checkpoints: after every ``checkpoint_interval``
+        processed URLs of a domain and when a domain is finished.
+        URLs that were being fetched when the crawling stopped are still stored as URLs to crawl.
+
+        :param path: Path to the SQLite file. Is created if it does not exist.
+        :param checkpoint_interval: Number of processed URLs per domain after which a checkpoint is written.
+        """
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+
+        self._lock = threading.Lock()   # the store may be shared by the threads of the multithreading backend
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS domains (domain_index INTEGER PRIMARY KEY, start_url TEXT NOT NULL,
+                                                finished INTEGER NOT NULL DEFAULT 0,
+                                                no_processed_urls INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS urls (domain_index INTEGER NOT NULL, url TEXT NOT NULL, state TEXT NOT NULL,
+                                             distance INTEGER, PRIMARY KEY (domain_index, url));
+            CREATE TABLE IF NOT EXISTS rows (domain_index INTEGER NOT NULL, url TEXT NOT NULL, data BLOB NOT NULL,
+                                             PRIMARY KEY (domain_index, url));
+        """)
+        columns = [column[1] for column in self._connection.execute("PRAGMA table_info(domains)")]
+        if "no_processed_urls" not in columns:  # store created by an older version
+            self._connection.execute("ALTER TABLE domains ADD COLUMN no_processed_urls INTEGER NOT NULL DEFAULT 0")
+        self._connection.commit()
+
+        self._pending_urls = []
+        self._pending_rows = []
+        self._pending_counts = {}   # domain index -> number of processed URLs
+
+    def clear(self) -> None:
+        """Delete all stored crawling states."""
+        with self._lock:
+            self._pending_urls, self._pending_rows, self._pending_counts = [], [], {}
+            self._connection.executescript("DELETE FROM domains; DELETE FROM urls; DELETE FROM rows;")
+            self._connection.commit()
+
+    def add_domain(self, index: int, start_url: str) -> None:
+        """Register a new domain with its (redirected) start URL as the first URL to crawl.
+        Both are written right away, so that a crawl interrupted before the first checkpoint still resumes from the start URL."""
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO domains (domain_index, start_url) VALUES (?, ?)",
+                                     (index, start_url))
+            self._connection.execute("INSERT OR REPLACE INTO urls (domain_index, url, state, distance) VALUES (?, ?, ?, ?)",
+                                     (index, start_url, "to_crawl", 0))
+            self._connection.commit()
+
+    def load_domain(self, index: int) -> Optional[dict]:
+        """Load the stored state of a domain.
+
+        :return: ``None`` if nothing is stored for the domain. Otherwise, a dictionary with the keys ``start_url``,
+            ``finished``, ``no_processed_urls`` (including the URLs processed without data), ``to_crawl``, ``processed``,
+            ``discarded``, ``url_and_distance`` and ``data`` (the rows extracted so far, in the order they were extracted).
+        """
+        with self._lock:
+            domain = self._connection.execute("SELECT start_url, finished, no_processed_urls FROM domains WHERE domain_index = ?",
+                                              (index,)).fetchone()
+            if domain is None:
+                return None
+
+            state = {"start_url": domain[0], "finished": bool(domain[1]), "no_processed_urls": domain[2],
+                     "to_crawl": set(), "processed": set(), "discarded": set(), "url_and_distance": {}}
+            for url, url_state, distance in self._connection.execute(
+                    "SELECT url, state, distance FROM urls WHERE domain_index = ?", (index,)):
+                state[url_state].add(url)
+                if distance is not None:
+                    state["url_and_distance"][url] = distance
+            state["data"] = [pickle.loads(row[0]) for row in self._connection.execute(
+                "SELECT data FROM rows WHERE domain_index = ? ORDER BY rowid", (index,))]
+
+        return state
+
+    def record_url(self, index: int, url: str, state: str, distance: int = None) -> None:
+        """Buffer the state (``to_crawl``, ``processed`` or ``discarded``) of a URL until the next checkpoint."""
+        with self._lock:
+            self._pending_urls.append((index, url, state, distance))
+
+    def record_row(self, index: int, url: str, data: list) -> None:
+        """Buffer the data extracted from a URL until the next checkpoint."""
+        with self._lock:
+            self._pending_rows.append((index, url, pickle.dumps(data)))
+
+    def record_no_processed_urls(self, index: int, no_processed_urls: int) -> None:
+        """Buffer the number of processed URLs of a domain (see :attr:`.CrawlFrontier.no_processed_urls`) until the next checkpoint."""
+        with self._lock:
+            self._pending_counts[index] = no_processed_urls
+
+    def mark_finished(self, index: int) -> None:
+        """Mark a domain as finished and write a checkpoint."""
+        self.checkpoint()
+        with self._lock:
+            self._connection.execute("UPDATE domains SET finished = 1 WHERE domain_index = ?", (index,))
+            self._connection.commit()
+
+    def checkpoint(self) -> None:
+        """Write all buffered changes to disk."""
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO urls (domain_index, url, state, distance) VALUES (?, ?, ?, ?)",
+                                         self._pending_urls)
+            self._connection.executemany("INSERT OR REPLACE INTO rows (domain_index, url, data) VALUES (?, ?, ?)",
+                                         self._pending_rows)
+            self._connection.executemany("UPDATE domains SET no_processed_urls = ? WHERE domain_index = ?",
+                                         [(count, index) for index, count in self._pending_counts.items()])
+            self._connection.commit()
+            self._pending_urls, self._pending_rows, self._pending_counts = [], [], {}
+
+    def close(self) -> None:
+        """Write a final checkpoint and close the connection to the SQLite file."""
+        self.checkpoint()
+        self._connection.close()
@@ -0,0 +1,152 @@
+"""On-disk cache of HTTP responses that is revalidated with conditional requests (``ETag`` / ``Last-Modified``)."""
+from typing import Union, Optional
+from urllib.parse import urlsplit, urlunsplit
+import json
+import sqlite3
+import threading
+import time
+
+import aiohttp
+import requests
+
+from scrawler.utils.web_utils import StoredResponse
+
+# Header fields of a ``304 Not Modified`` response that replace the stored ones
+UPDATED_HEADER_FIELDS = ("etag", "last-modified", "date", "expires", "cache-control")
+
+
+class CachedResponse(StoredResponse):
+    def __init__(self, url: str, status: int, headers: Union[dict, list] = None, reason: str = None,
+                 body: bytes = b"", encoding: str = "utf-8"):
+        """Response served from a :class:`SQLiteHttpCache`, including the body.
+
+        :param body: Raw response body.
+        :param encoding: Encoding that was used to decode the body when it was first retrieved.
+        """
+        super().__init__(url, status, headers=headers, reason=reason)
+        self.body = body
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        """Decoded response body."""
+        return self.body.decode(self.encoding, errors="replace")
+
+
+class SQLiteHttpCache:
+    def __init__(self, path: str):
+        """On-disk HTTP cache backed by a local SQLite file. Stores the body and the validators (``ETag`` and
+        ``Last-Modified`` header fields) of responses, keyed by normalized URL.
+
+        When a cached URL is requested again (e.g. when re-running a crawling), the validators are sent along as
+        ``If-None-Match`` / ``If-Modified-Since`` header fields. If the server answers with ``304 Not Modified``,
+        the body is served from disk instead of being transferred again.
+        Only successful responses with at least one validator and without ``Cache-Control: no-store`` are stored.
+
+        :param path: Path to the SQLite file. Is created if it does not exist.
+        """
+        self.path = path
+        self.no_hits = 0    #: Number of responses served from the cache (after a ``304 Not Modified``)
+
+        self._lock = threading.Lock()   # the cache may be shared by the threads of the multithreading backend
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL,
+                                                  reason TEXT, headers TEXT NOT NULL, body BLOB NOT NULL,
+                                                  encoding TEXT NOT NULL, etag TEXT, last_modified TEXT,
+                                                  stored_at REAL NOT NULL);
+        """)
+        self._connection.commit()
+
+    def clear(self) -> None:
+        """Delete all cached responses."""
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the connection to the SQLite file."""
+        self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def conditional_headers(self, url: str) -> dict:
+        """Return the header fields for a conditional request of the URL (empty if the URL is not cached)."""
+        with self._lock:
+            row = self._connection.execute("SELECT etag, last_modified FROM responses WHERE key = ?",
+                                           (normalize_cache_key(url),)).fetchone()
+        if row is None:
+            return {}
+
+        etag, last_modified = row
+        headers = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the cached response of the URL or ``None`` if it is not cached."""
+        with self._lock:
+            row = self._connection.execute("SELECT url, status, reason, headers, body, encoding FROM responses WHERE key = ?",
+                                           (normalize_cache_key(url),)).fetchone()
+        if row is None:
+            return None
+
+        response_url, status, reason, headers, body, encoding = row
+        return CachedResponse(response_url, status, headers=json.loads(headers), reason=reason,
+                              body=body, encoding=encoding)
+
+    def revalidate(self, url: str, not_modified_response: Union[aiohttp.ClientResponse, requests.Response]) -> Optional[CachedResponse]:
+        """Return the cached response of the URL after the server answered a conditional request with ``304 Not Modified``.
+        The stored header fields are updated with the ones of the ``304`` response (e.g. a new ``ETag``).
+
+        :return: ``None`` if the URL is not cached (anymore).
+        """
+        cached = self.get(url)
+        if cached is None:
+            return None
+
+        for field in UPDATED_HEADER_FIELDS:
+            if field in not_modified_response.headers:
+                cached.headers[field] = not_modified_response.headers[field]
+        self._write(url, cached)
+        self.no_hits += 1
+        return cached
+
+    def store(self, url: str, response: Union[aiohttp.ClientResponse, requests.Response], body: bytes,
+              encoding: str) -> bool:
+        """Store a response in the cache, if it can be revalidated later.
+
+        :param url: Requested URL (may differ from the URL of the response after redirects).
+        :param response: Response object.
+        :param body: Raw response body.
+        :param encoding: Encoding used to decode the body.
+        :return: Whether the response has been stored.
+        """
+        stored = StoredResponse.from_response(response)
+        if (stored.status != 200) or ("no-store" in stored.headers.get("cache-control", "").lower()):
+            return False
+        if ("etag" not in stored.headers) and ("last-modified" not in stored.headers):
+            return False
+
+        self._write(url, CachedResponse(stored.url, stored.status, headers=stored.headers, reason=stored.reason,
+                                        body=body, encoding=encoding or "utf-8"))
+        return True
+
+    def _write(self, url: str, cached: CachedResponse) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                     (normalize_cache_key(url), cached.url, cached.status, cached.reason,
+                                      json.dumps(list(cached.headers.items())), cached.body, cached.encoding,
+                                      cached.headers.get("etag"), cached.headers.get("last-modified"), time.time()))
+            self._connection.commit()
+
+
+def normalize_cache_key(url: str) -> str:
+    """Normalize a URL for use as cache key: Lowercase scheme and host, empty path replaced by ``/`` and fragment removed."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
@@ -0,0 +1,461 @@
+"""HTML parser engines that can be used to construct a :class:`.Website`, including an adapter for the fast `selectolax <https://github.com/rushter/selectolax>`__ parser,
+and a :class:`TagScanner` that collects the tags needed by the data extractors without building an HTML tree."""
+from typing import Union, List, Dict, Tuple
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import html as html_module
+import copy
+import functools
+import importlib.util
+import re
+
+HTML_PARSER = "html.parser"
+LXML = "lxml"
+HTML5LIB = "html5lib"
+SELECTOLAX = "selectolax"
+AUTO = "auto"
+
+#: Parser engines in the order of preference when using ``auto`` (fastest first).
+#: ``html5lib`` is never chosen automatically because it is by far the slowest engine.
+PARSERS_BY_SPEED = (SELECTOLAX, LXML, HTML_PARSER)
+SUPPORTED_PARSERS = (HTML_PARSER, LXML, HTML5LIB, SELECTOLAX, AUTO)
+
+_MULTI_VALUED_ATTRIBUTES = ("class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone")
+_CSS_IDENTIFIER = re.compile(r"[A-Za-z_][\w-]*")
+_NON_TEXT_TAGS = ("script", "style", "template")
+_VOID_TAGS = ("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr")
+
+
+@functools.lru_cache(maxsize=None)
+def is_parser_available(parser: str) -> bool:
+    """Check whether the package needed for the given parser engine is installed."""
+    if parser == HTML_PARSER:
+        return True
+    return importlib.util.find_spec(parser) is not None
+
+
+def resolve_parser(parser: str = AUTO) -> str:
+    """Return the name of the parser engine to use.
+
+    :param parser: One of ``html.parser``, ``lxml``, ``html5lib``, ``selectolax`` or ``auto``.
+        ``auto`` chooses the fastest installed engine (see :data:`PARSERS_BY_SPEED`).
+    :raises ValueError: If the parser is not supported or not installed.
+    """
+    if parser == AUTO:
+        return next(p for p in PARSERS_BY_SPEED if is_parser_available(p))
+
+    if parser not in SUPPORTED_PARSERS:
+        raise ValueError(f'HTML parser "{parser}" not supported. Has to be one of: {", ".join(SUPPORTED_PARSERS)}')
+    if not is_parser_available(parser):
+        raise ValueError(f'HTML parser "{parser}" is not installed. Install it with: pip install {parser}')
+
+    return parser
+
+
+def best_bs4_parser() -> str:
+    """Fastest installed parser engine that can be used by BeautifulSoup."""
+    return next(p for p in PARSERS_BY_SPEED if (p != SELECTOLAX) and is_parser_available(p))
+
+
+def build_css_selector(name=None, attrs=None, **kwargs) -> Union[str, None]:
+    """Translate the arguments of BeautifulSoup's :meth:`~bs4.Tag.find_all` into an equivalent CSS selector.
+
+    Supported are tag names (string or list of strings) and attribute filters whose values are ``True``, ``None``,
+    a string or a list of strings. Returns ``None`` if the query can't be expressed as CSS selector (e.g. regular expressions or functions).
+    """
+    query = _normalize_query(name, attrs, **kwargs)
+    if query is None:
+        return None
+    names, filters = query
+
+    selectors = ["*"] if (names is None) else list(names)
+    for key, value in filters:
+        if value is True:
+            alternatives = [f"[{key}]"]
+        elif value is None:
+            alternatives = [f":not([{key}])"]
+        else:
+            alternatives = [_attribute_selector(key, v) for v in value]
+
+        selectors = [selector + alternative for selector in selectors for alternative in alternatives]
+
+    return ", ".join(selectors) if (len(selectors) > 0) else None
+
+
+def _normalize_query(name=None, attrs=None, **kwargs) -> Union[Tuple[Union[Tuple[str, ...], None], tuple], None]:
+    """Normalize the arguments of BeautifulSoup's :meth:`~bs4.Tag.find_all` to a hashable tuple ``(names, filters)``.
+    ``names`` is ``None`` for any tag, each filter value is ``True``, ``None`` or a tuple of strings.
+    Returns ``None`` for unsupported queries."""
+    if (name is None) or (name is True):
+        names = None
+    elif isinstance(name, str):
+        names = (name,)
+    elif isinstance(name, (list, tuple, set)) and all(isinstance(n, str) for n in name):
+        names = tuple(name)
+    else:
+        return None
+    if (names is not None) and not all(_CSS_IDENTIFIER.fullmatch(n) for n in names):
+        return None
+
+    filters = {"class": attrs} if isinstance(attrs, str) else attrs
+    if filters is None:
+        filters = {}
+    elif not isinstance(filters, dict):
+        return None
+    filters = dict(filters)
+    for key, value in kwargs.items():
+        filters["class" if (key == "class_") else key] = value
+
+    normalized_filters = []
+    for key, value in filters.items():
+        if not _CSS_IDENTIFIER.fullmatch(key):
+            return None
+
+        if (value is True) or (value is None):
+            normalized_filters.append((key, value))
+        elif isinstance(value, str):
+            normalized_filters.append((key, (value,)))
+        elif isinstance(value, (list, tuple, set)) and all(isinstance(v, str) for v in value):
+            normalized_filters.append((key, tuple(value)))
+        else:
+            return None
+
+    return names, tuple(normalized_filters)
+
+
+def _attribute_selector(key: str, value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    if (key in _MULTI_VALUED_ATTRIBUTES) and (" " not in value):     # like BeautifulSoup, match any of the values
+        return f'[{key}~="{escaped}"]'
+    return f'[{key}="{escaped}"]'
+
+
+class SelectolaxTag:
+    def __init__(self, node):
+        """Wraps a selectolax node so that it can be used like a BeautifulSoup :class:`~bs4.Tag`
+        by the built-in data extractors (``attrs``, item access, ``text``, ``string``, ``get_text()``, ``find()`` and ``find_all()``).
+
+        :param node: ``selectolax.lexbor.LexborNode`` to wrap.
+        """
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    @property
+    def attrs(self) -> Dict[str, Union[str, List[str]]]:
+        attrs = {}
+        for key, value in self._node.attributes.items():
+            value = "" if (value is None) else value
+            attrs[key] = value.split() if (key in _MULTI_VALUED_ATTRIBUTES) else value
+        return attrs
+
+    def __getitem__(self, key: str):
+        return self.attrs[key]
+
+    def get(self, key: str, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key: str) -> bool:
+        return key in self._node.attributes
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    @property
+    def string(self) -> str:
+        return self._node.text(deep=True)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        """Concatenate all readable strings in the tag (i.e. excluding scripts, styles, templates and comments)."""
+        strings = []
+        for node in self._node.traverse(include_text=True):
+            if (node.tag != "-text") or (node.parent is not None and node.parent.tag in _NON_TEXT_TAGS):
+                continue
+            string = node.text_content
+            if strip:
+                string = string.strip()
+                if string == "":
+                    continue
+            strings.append(string)
+        return separator.join(strings)
+
+    def find(self, name=None, attrs=None, **kwargs) -> Union["SelectolaxTag", None]:
+        results = self.find_all(name, attrs, limit=1, **kwargs)
+        return results[0] if (len(results) > 0) else None
+
+    def find_all(self, name=None, attrs=None, limit: int = None, **kwargs) -> List["SelectolaxTag"]:
+        selector = build_css_selector(name, attrs, **kwargs)
+        if selector is None:
+            raise ValueError("Query not supported by the selectolax adapter.")
+        return select(self._node, selector, limit)
+
+    def __repr__(self) -> str:
+        return self._node.html
+
+
+class SelectolaxTree:
+    def __init__(self, html_text: str):
+        """Parses HTML with selectolax (using the `Lexbor <https://github.com/lexbor/lexbor>`__ engine)."""
+        from selectolax.lexbor import LexborHTMLParser   # optional dependency
+        self._tree = LexborHTMLParser(html_text)
+
+    def select(self, selector: str, limit: int = None) -> List[SelectolaxTag]:
+        """Find all tags matching the CSS selector (in document order), optionally only the first ``limit`` tags."""
+        return select(self._tree, selector, limit)
+
+
+def select(node, selector: str, limit: int = None) -> List[SelectolaxTag]:
+    if limit == 1:
+        first = node.css_first(selector)
+        return [] if (first is None) else [SelectolaxTag(first)]
+
+    nodes = node.css(selector)
+    if limit is not None:
+        nodes = nodes[:limit]
+    return [SelectolaxTag(n) for n in nodes]
+
+
+class TagQuery:
+    def __init__(self, name=None, attrs=None, find_all: bool = False, text: bool = False, **kwargs):
+        """Tags a data extractor is interested in, given with the same arguments as to BeautifulSoup's :meth:`~bs4.Tag.find`.
+        Data extractors register these queries (see :attr:`.BaseExtractor.tag_queries`), so that the tags for all of them
+        can be collected in a single pass over the HTML text with :class:`TagScanner` instead of building and searching the HTML tree.
+
+        :param name: Tag name(s), e.g. ``meta``.
+        :param attrs: Attribute filters in a key-value dict format, e.g. ``{"name": "description"}``.
+        :param find_all: Whether all matching tags are needed (as with ``find_all()``) or only the first one (as with ``find()``).
+        :param text: Whether the text inside the tags is needed (``text`` and ``string`` attributes).
+        :param kwargs: Further attribute filters, e.g. ``content=True``.
+        :raises ValueError: If the query is not supported (see :func:`build_css_selector`).
+        """
+        self.key = _normalize_query(name, attrs, **kwargs)
+        if self.key is None:
+            raise ValueError("Query not supported by the tag scanner.")
+        self.find_all = find_all
+        self.text = text
+
+    @staticmethod
+    def key_of(name=None, attrs=None, **kwargs) -> Union[tuple, None]:
+        """Key of the query that :meth:`~bs4.Tag.find` or :meth:`~bs4.Tag.find_all` would be called with (``None`` if not supported)."""
+        return _normalize_query(name, attrs, **kwargs)
+
+    def matches(self, name: str, attrs: Dict[str, str]) -> bool:
+        names, filters = self.key
+        if (names is not None) and (name not in names):
+            return False
+
+        for key, value in filters:
+            actual = attrs.get(key)
+            if value is True:
+                if actual is None:
+                    return False
+            elif value is None:
+                if actual is not None:
+                    return False
+            elif actual is None:
+                return False
+            elif (actual not in value) and not ((key in _MULTI_VALUED_ATTRIBUTES)
+                                                 and any(v in value for v in actual.split())):
+                return False
+
+        return True
+
+
+class ScannedTag:
+    def __init__(self, name: str, attrs: Dict[str, str]):
+        """Tag found by the :class:`TagScanner`. Provides the same basic interface as a BeautifulSoup :class:`~bs4.Tag`
+        (``name``, ``attrs``, item access, ``text`` and ``string``), but has no children."""
+        self.name = name
+        self.attrs = {key: value.split() if (key in _MULTI_VALUED_ATTRIBUTES) else value for key, value in attrs.items()}
+        self._strings = None    # list of the strings inside the tag, only collected if requested
+        self._has_child_tags = False
+
+    def __getitem__(self, key: str):
+        return self.attrs[key]
+
+    def get(self, key: str, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key: str) -> bool:
+        return key in self.attrs
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    @property
+    def string(self) -> Union[str, None]:
+        if self._has_child_tags or (self._strings is None) or (len(self._strings) != 1):
+            return None
+        return self._strings[0]
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        """Concatenate all readable strings in the tag (i.e. excluding scripts, styles, templates and comments)."""
+        strings = self._strings or []
+        if strip:
+            strings = [string.strip() for string in strings if string.strip() != ""]
+        return separator.join(strings)
+
+    def __repr__(self) -> str:
+        return f"<{self.name} {self.attrs}>"
+
+
+class TagScanner(HTMLParser):
+    #: Number of characters fed to the tokenizer at once. The scanning stops after the first chunk that answers all queries.
+    CHUNK_SIZE = 16384
+
+    def __init__(self, queries: List[TagQuery]):
+        """Collects the tags for several :class:`TagQuery` objects in a single pass over the HTML text,
+        without building an HTML tree. If only the first match of each query is needed, the scanning stops
+        as soon as all of them have been found (for example after the ``<head>`` for most meta tags).
+
+        :param queries: Queries to collect tags for. Queries with the same key are merged.
+        """
+        super().__init__(convert_charrefs=True)
+        self.queries: Dict[tuple, TagQuery] = {}
+        for query in queries:
+            merged = self.queries.get(query.key)
+            if merged is None:
+                self.queries[query.key] = copy.copy(query)
+            else:
+                merged.find_all = merged.find_all or query.find_all
+                merged.text = merged.text or query.text
+
+        self.results: Dict[tuple, List[ScannedTag]] = {key: [] for key in self.queries}
+        self._open_queries = dict(self.queries)     # queries still looking for (more) tags
+        self._collecting: List[list] = []    # [tag, name, depth] of open tags whose text is collected
+        self._non_text_depth = 0
+        self._after_data = False    # text split by the chunks (or character references) arrives in several parts
+
+    def scan(self, html_text: str) -> Dict[tuple, Tuple[List[ScannedTag], bool]]:
+        """Scan the HTML text.
+
+        :return: Dict mapping the key of each query to a tuple of the tags found and whether they are all tags matching
+            the query (``False`` if only the first match was searched for).
+        """
+        for start in range(0, len(html_text), self.CHUNK_SIZE):
+            self.feed(html_text[start:start + self.CHUNK_SIZE])
+            if (len(self._open_queries) == 0) and (len(self._collecting) == 0):
+                break
+        else:
+            self.close()
+
+        return {key: (self.results[key], query.find_all) for key, query in self.queries.items()}
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        self._after_data = False
+        if tag in _NON_TEXT_TAGS:
+            self._non_text_depth += 1
+        for collecting in self._collecting:
+            collecting[0]._has_child_tags = True
+            if collecting[1] == tag:
+                collecting[2] += 1
+
+        if len(self._open_queries) == 0:
+            return
+
+        attrs = {key: ("" if (value is None) else value) for key, value in attrs}
+        scanned_tag = None
+        for key, query in list(self._open_queries.items()):
+            if not query.matches(tag, attrs):
+                continue
+
+            if scanned_tag is None:
+                scanned_tag = ScannedTag(tag, attrs)
+            self.results[key].append(scanned_tag)
+            if query.text and (scanned_tag._strings is None):
+                scanned_tag._strings = []
+                if tag not in _VOID_TAGS:
+                    self._collecting.append([scanned_tag, tag, 0])
+            if not query.find_all:
+                del self._open_queries[key]
+
+    def handle_endtag(self, tag: str) -> None:
+        self._after_data = False
+        if (tag in _NON_TEXT_TAGS) and (self._non_text_depth > 0):
+            self._non_text_depth -= 1
+        for collecting in list(self._collecting):
+            if collecting[1] == tag:
+                if collecting[2] == 0:
+                    self._collecting.remove(collecting)
+                else:
+                    collecting[2] -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._non_text_depth == 0:
+            for collecting in self._collecting:
+                strings = collecting[0]._strings
+                if self._after_data and (len(strings) > 0):
+                    strings[-1] += data
+                else:
+                    strings.append(data)
+        self._after_data = True
+
+    def handle_comment(self, data: str) -> None:
+        self._after_data = False    # like BeautifulSoup, the strings before and after a comment stay separate
+
+
+class LinkScanner:
+    # Comments and the content of scripts/styles are matched (and skipped) so that links inside them are not found
+    _TAG_PATTERN = r"""<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(a|area|base|link)\b((?:[^>"']|"[^"]*"|'[^']*')*)>"""
+    _ATTRIBUTE_PATTERN = r"""[\s"'/](href|rel)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))"""
+
+    def __init__(self, area_links: bool = False, next_links: bool = False, encoding: str = "utf-8"):
+        """Finds the links in a website's HTML text with regular expressions, without parsing the HTML.
+        Finds the same links as :class:`.LinkExtractor` (``href`` of ``<a>`` tags), but respects the document's ``<base href>``.
+        One instance can be reused for all websites of a crawl.
+
+        :param area_links: Also return the links of image map areas (``<area href>``).
+        :param next_links: Also return links to the next page of paginated content (``<link rel="next" href>``).
+        :param encoding: Encoding used to decode links if the HTML is passed as :class:`bytes`.
+        """
+        self.area_links = area_links
+        self.next_links = next_links
+        self.encoding = encoding
+
+        self._tag_regex = re.compile(self._TAG_PATTERN, re.IGNORECASE | re.DOTALL)
+        self._attribute_regex = re.compile(self._ATTRIBUTE_PATTERN, re.IGNORECASE)
+
+    def scan(self, html: Union[str, bytes]) -> set:
+        """Return all links found in the HTML (without duplicates).
+        Relative links are resolved against the ``<base href>`` if the document declares one, otherwise they are returned as found.
+
+        :param html: HTML text or the undecoded response body.
+        """
+        if not html:
+            return set()
+        if isinstance(html, bytes):
+            html = html.decode(self.encoding, errors="replace")
+
+        base = None
+        links = set()
+        for match in self._tag_regex.finditer(html):
+            tag = match.group(2)
+            if tag is None:     # comment, script or style
+                continue
+            tag = tag.lower()
+            if ((tag == "area") and not self.area_links) or ((tag == "link") and not self.next_links):
+                continue
+
+            attributes = {}
+            for name, *values in self._attribute_regex.findall(" " + match.group(3)):
+                attributes.setdefault(name.lower(), next((v for v in values if v != ""), ""))
+            href = attributes.get("href")
+            if href is None:
+                continue
+            if "&" in href:
+                href = html_module.unescape(href)
+            href = href.strip()
+
+            if tag == "base":
+                if base is None:    # only the first <base> counts
+                    base = href
+            elif (tag != "link") or ("next" in attributes.get("rel", "").lower().split()):
+                links.add(href)
+
+        if base:
+            links = {urljoin(base, link) for link in links}
+        return links
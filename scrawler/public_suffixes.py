@@ -0,0 +1,101 @@
+"""Lookup of public suffixes (like ``com`` or ``co.uk``) for splitting host names into subdomain, domain and suffix (see :class:`.ParsedUrl`)."""
+from typing import List
+import functools
+import os
+
+import tld.exceptions
+from tld.helpers import project_dir
+from tld.utils import MozillaTLDSourceParser
+
+
+class _SuffixNode:
+    __slots__ = ("children", "exceptions", "leaf")   # using __slots__ for performance purposes
+
+    def __init__(self):
+        self.children = None    # label -> _SuffixNode (created on demand to save memory)
+        self.exceptions = None  # set of labels excluded from a wildcard rule (``!city.kawasaki.jp``), created on demand
+        self.leaf = False       # True if a rule ends here
+
+
+class PublicSuffixList:
+    def __init__(self, path: str = None):
+        """`Public suffix list <https://publicsuffix.org/>`__ stored in a trie of the reversed labels of its rules
+        (``uk`` -> ``co`` -> ...), so that the public suffix of a host name is found by walking its labels from right to left.
+
+        The rules are interpreted exactly like the `TLD package <https://github.com/barseghyanartur/tld>`__ does
+        (including the private domains section), so that the parts of a :class:`.ParsedUrl` stay the same.
+        Use :func:`get_public_suffix_list` to load a list only once.
+
+        :param path: Path to a local copy of the public suffix list (``public_suffix_list.dat``).
+            By default, the list bundled with (and updated by) the TLD package is used.
+        :raises tld.exceptions.TldIOError: If the file can't be read.
+        """
+        self.path = project_dir(MozillaTLDSourceParser.local_path) if (path is None) else os.path.abspath(path)
+        self._root = _SuffixNode()
+        self._no_rules = 0
+
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if "// xn--" in line:   # punycode version of the internationalized TLD in the following line
+                        line = line.split()[1]
+                    if line[0] in ("/", "\n"):  # comments and empty lines
+                        continue
+                    self._add_rule(line.strip())
+        except OSError as e:
+            raise tld.exceptions.TldIOError(e)
+
+    def __len__(self) -> int:
+        """Number of rules."""
+        return self._no_rules
+
+    def get_suffix_length(self, labels: List[str]) -> int:
+        """Return the number of labels that make up the public suffix of a host name, or ``0`` if no rule matches.
+
+        :param labels: Labels of the lowercased host name, e.g. ``["www", "example", "co", "uk"]`` (returns 2).
+        """
+        node = self._root
+        length = 0
+        suffix_length = 0
+        for label in reversed(labels):
+            if node.children is None:   # no longer rule
+                break
+            if (node.exceptions is not None) and (label in node.exceptions):
+                break
+            child = node.children.get(label)
+            if child is None:
+                child = node.children.get("*")
+                if child is None:
+                    break
+            length += 1
+            node = child
+            if node.leaf:
+                suffix_length = length
+        return suffix_length
+
+    def _add_rule(self, rule: str) -> None:
+        node = self._root
+        labels = rule.split(".")
+        labels.reverse()
+        for label in labels:
+            if label.startswith("!"):
+                if node.exceptions is None:
+                    node.exceptions = set()
+                node.exceptions.add(label[1:])
+                break
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _SuffixNode()
+            node = child
+        node.leaf = True
+        self._no_rules += 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_public_suffix_list(path: str = None) -> PublicSuffixList:
+    """Return the :class:`PublicSuffixList` loaded from ``path`` (the list of the TLD package by default).
+    Each file is only loaded once per process.
+    """
+    return PublicSuffixList(path)
@@ -0,0 +1,199 @@
+"""Adaptive per-host rate limiting, driven by the latency and the status codes of the responses."""
+from typing import Dict, Tuple, Optional, Union
+from email.utils import parsedate_to_datetime
+import asyncio
+import threading
+import time
+
+import aiohttp
+import requests
+
+from scrawler.defaults import (DEFAULT_PAUSE_TIME, DEFAULT_MIN_PAUSE_TIME, DEFAULT_MAX_PAUSE_TIME, DEFAULT_RATE_INCREASE,
+                               DEFAULT_RATE_DECREASE_FACTOR)
+from scrawler.utils.web_utils import StoredResponse
+
+# Status codes with which servers signal that they are overloaded
+OVERLOAD_STATUS_CODES = (429, 503)
+LATENCY_SMOOTHING = 0.2     # weight of the latest response in the moving average of the latency
+LATENCY_SLACK = 0.05    # in seconds, latency increase that is always tolerated (avoids reacting to jitter of very fast servers)
+BASELINE_ADAPTATION = 0.01  # share by which the baseline latency follows slower responses (so that it can adapt to a permanently slower server)
+
+
+class _HostState:
+    __slots__ = ("delay", "min_delay", "latency", "baseline_latency", "blocked_until", "last_decrease")
+
+    def __init__(self, delay: float, min_delay: float):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.latency = None     # moving average
+        self.baseline_latency = None
+        self.blocked_until = 0.0    # set by Retry-After
+        self.last_decrease = float("-inf")
+
+
+class AdaptiveRateController:
+    def __init__(self, initial_delay: float = DEFAULT_PAUSE_TIME,
+                 min_delay: float = DEFAULT_MIN_PAUSE_TIME,
+                 max_delay: float = DEFAULT_MAX_PAUSE_TIME,
+                 rate_increase: float = DEFAULT_RATE_INCREASE,
+                 decrease_factor: float = DEFAULT_RATE_DECREASE_FACTOR,
+                 latency_tolerance: float = 2.0):
+        """Chooses the pause between two requests to the same host with additive increase, multiplicative decrease (AIMD),
+        like TCP congestion control.
+
+        After each successful response whose latency stays close to the host's baseline latency, the request rate of the host
+        is increased by ``rate_increase`` requests per second. If the server signals that it is overloaded
+        (status ``429`` or ``503``, a ``Retry-After`` header field, a timeout or a rising latency), the rate is multiplied by ``decrease_factor``.
+        The rate is decreased at most once per round of requests: Responses to requests that were sent before the last decrease
+        don't decrease it again. If a ``Retry-After`` is given, no request is made to the host before it has passed.
+
+        One controller can be shared by the crawlings of several domains (also across threads).
+
+        :param initial_delay: Pause between two requests (in seconds) for hosts that have not answered yet.
+        :param min_delay: Lower bound of the pause (in seconds). Can be raised for individual hosts, e.g. to their ``Crawl-delay``.
+        :param max_delay: Upper bound of the pause (in seconds), except for ``Retry-After``.
+        :param rate_increase: Requests per second that are added to the rate of a host after a successful response.
+        :param decrease_factor: Factor (between 0 and 1) by which the rate of a host is multiplied when its server is overloaded.
+        :param latency_tolerance: The latency of a host is considered to be rising if its moving average exceeds
+            its baseline (lowest observed) latency by this factor.
+        """
+        if not (0 < decrease_factor < 1):
+            raise ValueError(f"Parameter decrease_factor has to be between 0 and 1: {decrease_factor}")
+
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.rate_increase = rate_increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()   # the controller may be shared by the threads of the multithreading backend
+
+    @property
+    def host_delays(self) -> Dict[str, float]:
+        """Pause between two requests currently chosen for each host (in seconds)."""
+        with self._lock:
+            return {host: state.delay for host, state in self._hosts.items()}
+
+    @property
+    def host_rates(self) -> Dict[str, float]:
+        """Request rate currently chosen for each host (in requests per second, not counting the time the requests take)."""
+        return {host: (1 / delay) if (delay > 0) else float("inf") for host, delay in self.host_delays.items()}
+
+    def add_host(self, host: str, initial_delay: float = None, min_delay: float = None) -> None:
+        """Register a host. If it is already registered (e.g. the start URL of another domain on the same host), the chosen pause is kept.
+
+        :param initial_delay: Pause to start with (in seconds). Defaults to the ``initial_delay`` of the controller.
+        :param min_delay: Lower bound of the pause for this host (e.g. the ``Crawl-delay`` of its ``robots.txt`` file).
+        """
+        min_delay = self.min_delay if (min_delay is None) else min_delay
+        initial_delay = self.initial_delay if (initial_delay is None) else initial_delay
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                self._hosts[host] = _HostState(self._clamp(initial_delay, min_delay), min_delay)
+            else:
+                state.min_delay = max(state.min_delay, min_delay)
+                state.delay = self._clamp(state.delay, state.min_delay)
+
+    def get_delay(self, host: str) -> float:
+        """Return the pause between two requests currently chosen for the host (in seconds)."""
+        with self._lock:
+            return self._get_state(host).delay
+
+    def wait_time(self, host: str) -> float:
+        """Return the time to wait before the next request to the host (in seconds), taking a ``Retry-After`` into account."""
+        with self._lock:
+            state = self._get_state(host)
+            return max(state.delay, state.blocked_until - time.monotonic(), 0)
+
+    def record(self, host: str, latency: float,
+               response: Union[aiohttp.ClientResponse, requests.Response, StoredResponse] = None,
+               error: Exception = None) -> None:
+        """Adapt the request rate of the host to the outcome of a request.
+
+        :param host: Requested host.
+        :param latency: Time the request took (in seconds).
+        :param response: Response of the request (if one has been received).
+        :param error: Exception raised while making the request (if any). Timeouts and exceptions with the status code
+            of an unsuccessful response count as overload signal, other exceptions are ignored.
+        """
+        if response is not None:
+            status, retry_after = get_status_and_retry_after(response=response)
+        elif isinstance(error, (asyncio.TimeoutError, requests.Timeout)):
+            status, retry_after = OVERLOAD_STATUS_CODES[-1], None
+        else:
+            status, retry_after = get_status_and_retry_after(error=error)
+            if status is None:
+                return
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._get_state(host)
+            if retry_after is not None:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            overloaded = (status in OVERLOAD_STATUS_CODES) or (retry_after is not None)
+            if (status is not None) and (status < 400):
+                overloaded = overloaded or self._update_latency(state, latency)
+
+            if overloaded:
+                if now - latency >= state.last_decrease:   # only once for all requests that were sent before the last decrease
+                    rate = 1 / max(state.delay, self.min_delay, latency, 1e-3)
+                    state.delay = self._clamp(1 / (rate * self.decrease_factor), state.min_delay)
+                    state.last_decrease = now
+            elif (status is not None) and (status < 400):
+                if state.delay > 0:
+                    state.delay = self._clamp(1 / (1 / state.delay + self.rate_increase), state.min_delay)
+
+    def _get_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self._clamp(self.initial_delay, self.min_delay), self.min_delay)
+        return state
+
+    def _update_latency(self, state: _HostState, latency: float) -> bool:
+        """Update the moving average and the baseline of the latency. Returns whether the latency is rising."""
+        if state.latency is None:
+            state.latency = state.baseline_latency = latency
+            return False
+
+        state.latency += LATENCY_SMOOTHING * (latency - state.latency)
+        if latency < state.baseline_latency:
+            state.baseline_latency = latency
+        else:
+            state.baseline_latency += BASELINE_ADAPTATION * (latency - state.baseline_latency)
+        return state.latency > (self.latency_tolerance * state.baseline_latency + LATENCY_SLACK)
+
+    def _clamp(self, delay: float, min_delay: float) -> float:
+        return min(max(delay, min_delay), max(self.max_delay, min_delay))
+
+
+def get_status_and_retry_after(response: Union[aiohttp.ClientResponse, requests.Response, StoredResponse] = None,
+                               error: Exception = None) -> Tuple[Optional[int], Optional[float]]:
+    """Return the status code and the ``Retry-After`` (in seconds) of a response or of the exception raised for an unsuccessful response
+    (:class:`aiohttp:aiohttp.ClientResponseError` or :class:`requests:requests.HTTPError`). Both are ``None`` if unknown."""
+    if response is None:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status, parse_retry_after((error.headers or {}).get("retry-after"))
+        response = getattr(error, "response", None) if isinstance(error, requests.HTTPError) else None
+        if response is None:
+            return None, None
+
+    response = StoredResponse.from_response(response)
+    return response.status, parse_retry_after(response.headers.get("retry-after"))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse the value of a ``Retry-After`` header field (seconds or HTTP date) into the number of seconds to wait.
+    Returns ``None`` if the value is missing or invalid."""
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
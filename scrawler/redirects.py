@@ -0,0 +1,125 @@
+"""Finding redirects in HTML documents and caching the redirects of the crawled hosts."""
+from typing import Optional, Iterable
+from urllib.parse import urljoin, urlsplit
+import html
+import re
+import threading
+import time
+
+from scrawler.defaults import DEFAULT_REDIRECT_CACHE_TTL
+
+HEAD_SCAN_LIMIT = 64 * 1024     # number of characters scanned for a meta refresh if the document has no recognizable head
+HEAD_END_PATTERN = re.compile(r"</head\s*>|<body[\s>]", flags=re.IGNORECASE)
+META_TAG_PATTERN = re.compile(r"<meta\s[^>]*>", flags=re.IGNORECASE)
+HTTP_EQUIV_REFRESH_PATTERN = re.compile(r"""http-equiv\s*=\s*["']?\s*refresh""", flags=re.IGNORECASE)
+CONTENT_ATTRIBUTE_PATTERN = re.compile(r"""content\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", flags=re.IGNORECASE)
+REFRESH_URL_PATTERN = re.compile(r"""url\s*=\s*["']?([^"']*)""", flags=re.IGNORECASE)
+
+
+def get_meta_refresh_url(html_text: str, base_url: str) -> Optional[str]:
+    """Return the absolute URL that an HTML document redirects to with a refresh meta tag
+    (``<meta http-equiv="refresh" content="0; url=...">``), or ``None``.
+    Only the head of the document is scanned, where the tag has to be placed.
+
+    :param html_text: HTML text of the document.
+    :param base_url: URL of the document, against which relative URLs are resolved.
+    """
+    head_end = HEAD_END_PATTERN.search(html_text, 0, HEAD_SCAN_LIMIT)
+    head = html_text[:head_end.start()] if (head_end is not None) else html_text[:HEAD_SCAN_LIMIT]
+
+    for tag in META_TAG_PATTERN.finditer(head):
+        tag = tag.group()
+        if HTTP_EQUIV_REFRESH_PATTERN.search(tag):
+            content = CONTENT_ATTRIBUTE_PATTERN.search(tag)
+            if content is not None:
+                return get_refresh_url(html.unescape(next(group for group in content.groups() if group is not None)), base_url)
+    return None
+
+
+def get_refresh_url(refresh: str, base_url: str) -> Optional[str]:
+    """Return the absolute URL given in the value of a ``Refresh`` header field or meta tag (e.g. ``5; url=/new``),
+    or ``None`` if it only reloads the page."""
+    match = REFRESH_URL_PATTERN.search(refresh)
+    if match is None:
+        return None
+    url = match.group(1).strip()
+    return urljoin(base=base_url, url=url) if url else None
+
+
+def _get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _get_origin_relative_part(url: str) -> str:
+    """Path (``/`` if empty) and query of the URL."""
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+class RedirectCache:
+    def __init__(self, ttl: float = DEFAULT_REDIRECT_CACHE_TTL, max_hops: int = 20):
+        """Cache of the redirects found while resolving start URLs, so that the redirect chain of a host
+        does not have to be requested again for every start URL on the host.
+
+        Each redirect (HTTP redirect, ``Refresh`` header field or refresh meta tag) is stored as one hop from a URL to its target.
+        If a redirect only changes the scheme and/or the host name of a URL (e.g. from ``http://example.com/``
+        to ``https://www.example.com/``), it is assumed to apply to all URLs of the host. Then, other start URLs on the host
+        (e.g. ``http://example.com/about``) are redirected to the new scheme and host name without requesting them first.
+
+        By default, one process-wide cache is used (:data:`REDIRECT_CACHE`).
+
+        :param ttl: Time (in seconds) for which a redirect is reused.
+        :param max_hops: Maximum number of cached redirects followed for one URL (guards against redirect loops).
+        """
+        self.ttl = ttl
+        self.max_hops = max_hops
+
+        self._urls = {}     # URL -> (target URL, expiry timestamp)
+        self._origins = {}  # origin (scheme and host) -> (target origin, expiry timestamp)
+        self._lock = threading.Lock()   # the cache may be shared by the threads of the multithreading backend
+
+    def add(self, url: str, target: str) -> None:
+        """Store that ``url`` redirects to ``target``."""
+        if url == target:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._urls[url] = (target, expires_at)
+            origin, target_origin = _get_origin(url), _get_origin(target)
+            if (origin != target_origin) and (_get_origin_relative_part(url) == _get_origin_relative_part(target)):
+                self._origins[origin] = (target_origin, expires_at)
+
+    def add_chain(self, urls: Iterable[str]) -> None:
+        """Store the redirects of a chain of URLs, each of which redirects to the next one."""
+        urls = list(urls)
+        for url, target in zip(urls, urls[1:]):
+            self.add(url, target)
+
+    def resolve(self, url: str) -> str:
+        """Return the URL that ``url`` redirects to according to the cached redirects (``url`` itself if none is cached).
+        The returned URL may redirect further, as only the cached redirects are followed."""
+        now = time.time()
+        with self._lock:
+            for _ in range(self.max_hops):
+                entry = self._urls.get(url)
+                if (entry is not None) and (entry[1] > now):
+                    url = entry[0]
+                    continue
+                origin = _get_origin(url)
+                entry = self._origins.get(origin)
+                if (entry is not None) and (entry[1] > now):
+                    url = entry[0] + url[len(origin):]
+                    continue
+                break
+        return url
+
+    def clear(self) -> None:
+        """Delete all cached redirects."""
+        with self._lock:
+            self._urls = {}
+            self._origins = {}
+
+
+#: Process-wide redirect cache, used if no other cache is passed.
+REDIRECT_CACHE = RedirectCache()
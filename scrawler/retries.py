@@ -0,0 +1,130 @@
+"""Retrying requests that failed for a transient reason and circuit breaking of unreachable hosts."""
+from typing import Dict, Optional
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+
+from scrawler.defaults import (DEFAULT_RETRY_BACKOFF, DEFAULT_MAX_RETRY_BACKOFF, DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+                               DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT)
+from scrawler.rate_control import AdaptiveRateController, get_status_and_retry_after
+
+# Status codes of responses that may succeed when requested again
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+# Exceptions raised when the connection fails or breaks off (or the server does not answer in time)
+TRANSIENT_EXCEPTIONS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                        requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a request that failed with this exception may succeed when it is made again:
+    Connection errors, timeouts and unsuccessful responses with one of the :data:`TRANSIENT_STATUS_CODES`."""
+    if isinstance(error, TRANSIENT_EXCEPTIONS):
+        return True
+    status, _ = get_status_and_retry_after(error=error)
+    return status in TRANSIENT_STATUS_CODES
+
+
+def get_retry_delay(error: Exception, attempt: int, max_retries: int, backoff: float = DEFAULT_RETRY_BACKOFF,
+                    max_backoff: float = DEFAULT_MAX_RETRY_BACKOFF) -> Optional[float]:
+    """Return the time to wait (in seconds) before retrying a request that failed with the given exception.
+
+    The time grows exponentially with each attempt (``backoff * 2 ** attempt``) and is jittered, so that the retries of
+    concurrently failed requests don't hit the server at the same time. A ``Retry-After`` sent by the server is used instead.
+
+    :param error: Exception raised by the failed attempt.
+    :param attempt: Number of the failed attempt (starting at 0).
+    :param max_retries: Maximum number of retries.
+    :param backoff: Base of the exponential backoff (in seconds).
+    :param max_backoff: Maximum time to wait (in seconds). If the server asks to wait longer (``Retry-After``), the request is not retried.
+    :return: ``None`` if the request should not be retried.
+    """
+    if (attempt >= max_retries) or not is_transient_error(error):
+        return None
+
+    _, retry_after = get_status_and_retry_after(error=error)
+    if retry_after is not None:
+        return retry_after if (retry_after <= max_backoff) else None
+
+    delay = min(backoff * (2 ** attempt), max_backoff)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def record_failed_attempt(error: Exception, latency: float, attempt: int, host: str, max_retries: int = 0,
+                          retry_backoff: float = DEFAULT_RETRY_BACKOFF, rate_controller: AdaptiveRateController = None,
+                          circuit_breaker: "CircuitBreaker" = None) -> Optional[float]:
+    """Report a failed attempt to the ``rate_controller`` and the ``circuit_breaker`` (if passed) and decide whether to retry.
+
+    :param error: Exception raised by the failed attempt.
+    :param latency: Time the attempt took (in seconds).
+    :param attempt: Number of the failed attempt (starting at 0).
+    :param host: Requested host.
+    :return: Time to wait before retrying (see :func:`get_retry_delay`) or ``None`` if the request should not be retried
+        (also if the circuit of the host has opened).
+    """
+    if rate_controller is not None:
+        rate_controller.record(host, latency, error=error)
+    if circuit_breaker is not None:
+        if is_transient_error(error):
+            circuit_breaker.record_failure(host)
+        if circuit_breaker.is_open(host):
+            return None
+    return get_retry_delay(error, attempt, max_retries, backoff=retry_backoff)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+                 reset_timeout: float = DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT):
+        """Keeps track of hosts that can't be reached, so that no more requests are wasted on them.
+
+        After ``failure_threshold`` consecutive requests to a host failed for a transient reason (see :func:`is_transient_error`),
+        the circuit of the host opens: :meth:`is_open` returns ``True`` and the crawling functions fail the remaining URLs of the host
+        without requesting them. After ``reset_timeout`` seconds, requests are let through again. If the next request fails as well,
+        the circuit opens again right away, otherwise it is closed.
+
+        One circuit breaker can be shared by the crawlings of several domains (also across threads).
+
+        :param failure_threshold: Number of consecutive failed requests after which the circuit of a host opens.
+        :param reset_timeout: Time (in seconds) after which requests to a host with an open circuit are let through again.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures: Dict[str, int] = {}     # host -> number of consecutive failures
+        self._opened_at: Dict[str, float] = {}
+        self._lock = threading.Lock()   # the circuit breaker may be shared by the threads of the multithreading backend
+
+    @property
+    def open_hosts(self) -> list:
+        """Hosts whose circuit is currently open."""
+        with self._lock:
+            return [host for host in self._opened_at if self._is_open(host)]
+
+    def is_open(self, host: str) -> bool:
+        """Whether requests to the host should currently be skipped."""
+        with self._lock:
+            return self._is_open(host)
+
+    def record_success(self, host: str) -> None:
+        """Report that a request to the host has been answered (with any status code that is not transient)."""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """Report that a request to the host failed for a transient reason."""
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold:
+                if not self._is_open(host):
+                    logging.warning(f"{self._failures[host]} consecutive requests to {host} failed. "
+                                    f"Skipping its URLs for {self.reset_timeout} seconds.")
+                self._opened_at[host] = time.monotonic()
+
+    def _is_open(self, host: str) -> bool:
+        opened_at = self._opened_at.get(host)
+        return (opened_at is not None) and (time.monotonic() - opened_at < self.reset_timeout)
@@ -0,0 +1,164 @@
+"""Caching of ``robots.txt`` files and politeness settings derived from them."""
+from typing import Tuple, Optional
+from urllib.robotparser import RobotFileParser
+import sqlite3
+import threading
+import time
+
+from scrawler.defaults import DEFAULT_ROBOTS_TXT_TTL, DEFAULT_ROBOTS_TXT_NEGATIVE_TTL
+
+
+class RobotsCache:
+    def __init__(self, path: str = None, ttl: float = DEFAULT_ROBOTS_TXT_TTL,
+                 negative_ttl: float = DEFAULT_ROBOTS_TXT_NEGATIVE_TTL):
+        """Cache of ``robots.txt`` files, shared by all crawled domains on the same host.
+        Besides retrieved files, it also remembers files that could not be retrieved (e.g. because of a ``404`` status code or a timeout),
+        so that they are not requested again for every start URL.
+
+        By default, one process-wide cache held in memory is used (:data:`ROBOTS_CACHE`).
+        If a ``path`` is passed, the files are also stored in a local SQLite file, so that they are reused across runs.
+
+        :param path: Optional path to a SQLite file. Is created if it does not exist.
+        :param ttl: Time (in seconds) for which a retrieved ``robots.txt`` file is reused.
+        :param negative_ttl: Time (in seconds) for which a ``robots.txt`` file that could not be retrieved is not requested again.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = {}  # robots.txt URL -> (RobotFileParser or None, expiry timestamp)
+        self._lock = threading.Lock()   # the cache may be shared by the threads of the multithreading backend
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS robots_txt (url TEXT PRIMARY KEY, text TEXT, expires_at REAL NOT NULL);
+            """)
+            self._connection.commit()
+
+    def get(self, robots_txt_url: str) -> Tuple[bool, Optional[RobotFileParser]]:
+        """Look up a ``robots.txt`` file.
+
+        :return: Tuple ``(found, robots_txt_parser)``. ``found`` is ``False`` if the URL is not cached or has expired.
+            ``robots_txt_parser`` is ``None`` if the file could not be retrieved.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(robots_txt_url)
+            if (entry is None) and (self._connection is not None):
+                row = self._connection.execute("SELECT text, expires_at FROM robots_txt WHERE url = ?",
+                                               (robots_txt_url,)).fetchone()
+                if row is not None:
+                    entry = (None if (row[0] is None) else parse_robots_txt(robots_txt_url, row[0]), row[1])
+                    self._entries[robots_txt_url] = entry
+
+        if (entry is None) or (entry[1] <= now):
+            return False, None
+        return True, entry[0]
+
+    def set(self, robots_txt_url: str, text: Optional[str]) -> Optional[RobotFileParser]:
+        """Store a ``robots.txt`` file.
+
+        :param text: Content of the file, or ``None`` if it could not be retrieved.
+        :return: Parser for the file (``None`` if ``text`` is ``None``).
+        """
+        robots_txt_parser = None if (text is None) else parse_robots_txt(robots_txt_url, text)
+        expires_at = time.time() + (self.negative_ttl if (text is None) else self.ttl)
+
+        with self._lock:
+            self._entries[robots_txt_url] = (robots_txt_parser, expires_at)
+            if self._connection is not None:
+                self._connection.execute("INSERT OR REPLACE INTO robots_txt VALUES (?, ?, ?)", (robots_txt_url, text, expires_at))
+                self._connection.commit()
+        return robots_txt_parser
+
+    def clear(self) -> None:
+        """Delete all cached ``robots.txt`` files."""
+        with self._lock:
+            self._entries = {}
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM robots_txt")
+                self._connection.commit()
+
+    def close(self) -> None:
+        """Close the connection to the SQLite file (if used)."""
+        if self._connection is not None:
+            self._connection.close()
+
+
+class RobotsTxtParser(RobotFileParser):
+    """:class:`~python:urllib.robotparser.RobotFileParser` that also supports fractional ``Crawl-delay`` values (e.g. ``0.2``),
+    which the standard library ignores."""
+
+    def parse(self, lines) -> None:
+        lines = list(lines)
+        super().parse(lines)
+
+        self._crawl_delays = []     # (user agents, delay) per group of rules, in file order
+        user_agents, delay, in_user_agent_lines = [], None, False
+        for line in lines:
+            name, _, value = line.split("#", 1)[0].partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "user-agent":
+                if not in_user_agent_lines:     # new group
+                    if len(user_agents) > 0:
+                        self._crawl_delays.append((user_agents, delay))
+                    user_agents, delay = [], None
+                user_agents.append(value.split("/")[0].lower())
+                in_user_agent_lines = True
+            elif name:
+                in_user_agent_lines = False
+                if name == "crawl-delay":
+                    try:
+                        delay = float(value)
+                    except ValueError:
+                        pass
+        if len(user_agents) > 0:
+            self._crawl_delays.append((user_agents, delay))
+
+    def crawl_delay(self, useragent: str) -> Optional[float]:
+        if not self.mtime():
+            return None
+        useragent = useragent.split("/")[0].lower()
+        for user_agents, delay in self._crawl_delays:   # specific user agents first, like RobotFileParser.can_fetch()
+            if any((agent != "*") and (agent in useragent) for agent in user_agents):
+                return delay
+        for user_agents, delay in self._crawl_delays:
+            if "*" in user_agents:
+                return delay
+        return None
+
+
+#: Process-wide ``robots.txt`` cache, used if no other cache is passed.
+ROBOTS_CACHE = RobotsCache()
+
+
+def parse_robots_txt(robots_txt_url: str, text: str) -> RobotsTxtParser:
+    """Create a :class:`RobotsTxtParser` from the content of a ``robots.txt`` file."""
+    robots_txt_parser = RobotsTxtParser(robots_txt_url)
+    robots_txt_parser.parse([line.strip() for line in text.split("\n") if line != ''])
+    return robots_txt_parser
+
+
+def get_crawl_delay(robots_txt_parser: Optional[RobotFileParser], user_agent: str = None,
+                    default: float = None) -> Optional[float]:
+    """Return the time to wait between two requests (in seconds) that a ``robots.txt`` file asks for,
+    based on its ``Crawl-delay`` and ``Request-rate`` fields. If both are given, the longer delay is used.
+
+    :param robots_txt_parser: Parsed ``robots.txt`` file (may be ``None``).
+    :param user_agent: User agent for which to look up the fields. If ``None``, the fields for all user agents (``*``) are used.
+    :param default: Returned if the file does not specify a delay.
+    """
+    if robots_txt_parser is None:
+        return default
+
+    user_agent = user_agent or "*"
+    delays = []
+    crawl_delay = robots_txt_parser.crawl_delay(user_agent)
+    if crawl_delay is not None:
+        delays.append(float(crawl_delay))
+    request_rate = robots_txt_parser.request_rate(user_agent)
+    if (request_rate is not None) and (request_rate.requests > 0):
+        delays.append(request_rate.seconds / request_rate.requests)
+
+    return max(delays) if (len(delays) > 0) else default
@@ -0,0 +1,157 @@
+"""Scheduling of requests across the frontiers of several crawled domains."""
+from typing import Dict, List, Tuple, Callable, Optional
+import asyncio
+
+from scrawler.defaults import DEFAULT_PAUSE_TIME, DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN
+from scrawler.frontier import CrawlFrontier
+from scrawler.utils.web_utils import parse_url
+
+ROUND_ROBIN = "round-robin"
+WEIGHTED = "weighted"
+
+
+class HostScheduler:
+    def __init__(self, mode: str = ROUND_ROBIN,
+                 host_delay: float = DEFAULT_PAUSE_TIME,
+                 max_requests_per_host: int = DEFAULT_CONCURRENT_REQUESTS_PER_DOMAIN,
+                 on_frontier_finished: Callable[[int, CrawlFrontier], None] = None):
+        """Hands out the URLs of all registered :class:`.CrawlFrontier` objects to a fixed number of workers,
+        so that the total number of concurrent requests stays saturated while each host is crawled politely.
+
+        Each frontier is assigned to the host of its start URL. A host is only eligible for a new request if
+        fewer than ``max_requests_per_host`` requests to it are in progress and its politeness delay has passed
+        since its last request finished.
+
+        :param mode: How to choose between eligible hosts.
+            ``round-robin`` serves all hosts in turn.
+            ``weighted`` uses smooth weighted round-robin, weighting each frontier by its number of URLs left to crawl,
+            so that large domains get a proportionally larger share of the requests without starving small ones.
+        :param host_delay: Default time to wait between two requests to the same host (in seconds).
+            Can be changed for individual hosts with :meth:`set_host_delay`.
+        :param max_requests_per_host: Maximum number of concurrent requests to the same host.
+        :param on_frontier_finished: Optional callback that is called with the index and the frontier as soon as a frontier is finished.
+        """
+        if mode not in (ROUND_ROBIN, WEIGHTED):
+            raise ValueError(f'Scheduling mode "{mode}" not supported. Has to be one of: {ROUND_ROBIN}, {WEIGHTED}')
+
+        self.mode = mode
+        self.host_delay = host_delay
+        self.max_requests_per_host = max_requests_per_host
+        self.on_frontier_finished = on_frontier_finished
+
+        self._frontiers: List[Tuple[int, CrawlFrontier, str]] = []    # (index, frontier, host) in round-robin order
+        self._hosts: Dict[int, str] = {}
+        self._host_delays: Dict[str, float] = {}
+        self._host_ready_at: Dict[str, float] = {}
+        self._host_requests_in_progress: Dict[str, int] = {}
+        self._current_weights: Dict[int, float] = {}
+
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+    @property
+    def host_delays(self) -> Dict[str, float]:
+        """Politeness delay currently used for each host (in seconds)."""
+        return {host: self.get_host_delay(host) for host in self._host_ready_at}
+
+    def get_host_delay(self, host: str) -> float:
+        return self._host_delays.get(host, self.host_delay)
+
+    def set_host_delay(self, host: str, delay: float) -> None:
+        """Use a different politeness delay for the given host."""
+        self._host_delays[host] = delay
+
+    async def add(self, index: int, frontier: CrawlFrontier) -> None:
+        """Register the frontier of a domain. Its URLs will be handed out by :meth:`next`."""
+        host = parse_url(frontier.start_url).hostname
+        self._host_ready_at.setdefault(host, 0)
+        self._host_requests_in_progress.setdefault(host, 0)
+
+        async with self._condition:
+            self._hosts[index] = host
+            self._frontiers.append((index, frontier, host))
+            self._current_weights[index] = 0
+            self._condition.notify_all()
+
+    async def close(self) -> None:
+        """Signal that no further frontiers will be added. Once all registered frontiers are finished, :meth:`next` returns ``None``."""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    async def next(self) -> Optional[Tuple[int, CrawlFrontier, str, int]]:
+        """Wait until a URL can be fetched and hand it out.
+        Every URL handed out has to be reported back with :meth:`done` after it was processed.
+
+        :return: Tuple ``(index, frontier, url, steps_from_start_page)`` or ``None`` if crawling is finished.
+        """
+        loop = asyncio.get_event_loop()
+
+        async with self._condition:
+            while True:
+                self._remove_finished_frontiers()
+                if self._closed and (len(self._frontiers) == 0):
+                    return None
+
+                now = loop.time()
+                eligible = [entry for entry in self._frontiers
+                            if entry[1].has_pending_urls
+                            and (self._host_requests_in_progress[entry[2]] < self.max_requests_per_host)]
+                ready = [entry for entry in eligible if self._host_ready_at[entry[2]] <= now]
+
+                if len(ready) > 0:
+                    index, frontier, host = self._choose(ready)
+                    next_url_and_distance = frontier.pop()
+                    if next_url_and_distance is None:   # all remaining URLs of the frontier were discarded
+                        continue
+
+                    self._host_requests_in_progress[host] += 1
+                    return (index, frontier) + next_url_and_distance
+
+                # Sleep until the next host becomes ready or until a request has finished
+                timeout = min([self._host_ready_at[entry[2]] for entry in eligible], default=None)
+                timeout = None if (timeout is None) else (timeout - now)
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def done(self, index: int, pause: bool = True) -> None:
+        """Report that a URL handed out by :meth:`next` for the frontier with the given index has been processed (successfully or not).
+        The frontier has to be updated before calling this method.
+
+        :param pause: Whether to wait the politeness delay before the next request to the host.
+            ``False`` if the URL has been skipped without making a request.
+        """
+        host = self._hosts[index]
+        loop = asyncio.get_event_loop()
+
+        async with self._condition:
+            self._host_requests_in_progress[host] -= 1
+            if pause:
+                self._host_ready_at[host] = loop.time() + self.get_host_delay(host)
+            self._condition.notify_all()
+
+    def _choose(self, ready: List[Tuple[int, CrawlFrontier, str]]) -> Tuple[int, CrawlFrontier, str]:
+        if self.mode == WEIGHTED:
+            total_weight = 0
+            for index, frontier, host in ready:
+                weight = len(frontier.to_crawl)
+                self._current_weights[index] += weight
+                total_weight += weight
+            chosen = max(ready, key=lambda entry: self._current_weights[entry[0]])
+            self._current_weights[chosen[0]] -= total_weight
+        else:
+            chosen = ready[0]
+
+        # Move chosen frontier to the end of the queue so that the other frontiers are served first next time
+        self._frontiers.remove(chosen)
+        self._frontiers.append(chosen)
+        return chosen
+
+    def _remove_finished_frontiers(self) -> None:
+        for entry in [entry for entry in self._frontiers if entry[1].is_finished]:
+            self._frontiers.remove(entry)
+            del self._current_weights[entry[0]]
+            if self.on_frontier_finished is not None:
+                self.on_frontier_finished(entry[0], entry[1])
@@ -1,14 +1,18 @@
-from typing import Union, List, Any
+from typing import Union, List, Any, Tuple, Callable, Awaitable, Iterator, AsyncIterator
 import asyncio
+import functools
 from multiprocessing.dummy import Pool as ThreadPool
 
 import aiohttp
 
-from scrawler.utils.general_utils import timing_decorator, ProgressBar
-from scrawler.attributes import SearchAttributes, ExportAttributes
-from scrawler.utils.file_io_utils import export_to_csv, multithreaded_csv_export
+from scrawler.utils.general_utils import timing_decorator, ProgressBar, iterate_results, iterate_synchronously
+from scrawler.attributes import SearchAttributes, ExportAttributes, ConnectionAttributes
+from scrawler.utils.file_io_utils import export_dataset, multithreaded_csv_export, StreamingWriter
 from scrawler.utils.validation_utils import validate_input_params
-from scrawler.defaults import DEFAULT_REQUEST_TIMEOUT, DEFAULT_NO_CONCURRENT_REQUESTS_PER_HOST, DEFAULT_BACKEND
+from scrawler.parsers import resolve_parser
+from scrawler.http_cache import SQLiteHttpCache
+from scrawler.warc import WarcWriter, WarcArchive
+from scrawler.defaults import DEFAULT_REQUEST_TIMEOUT, DEFAULT_BACKEND, DEFAULT_HTML_PARSER
 from scrawler import backends
 from scrawler.backends import asyncio_backend, multithreading_backend
 
@@ -19,7 +23,13 @@ class Scraper:
                  export_attributes: ExportAttributes = None,
                  user_agent: str = None,
                  timeout: Union[int, aiohttp.ClientTimeout] = None,
+                 connection_attributes: ConnectionAttributes = None,
                  backend: str = DEFAULT_BACKEND,
+                 parsing_processes: int = None,
+                 html_parser: str = DEFAULT_HTML_PARSER,
+                 http_cache: Union[str, SQLiteHttpCache] = None,
+                 warc_writer: Union[str, WarcWriter] = None,
+                 warc_archive: Union[str, List[str], WarcArchive] = None,
                  validate_input_parameters: bool = True):
         """Scrape website or multiple websites in parallel.
 
@@ -31,9 +41,20 @@ class Scraper:
             When using the :mod:`.asyncio_backend`, you can pass an :class:`aiohttp:aiohttp.ClientTimeout` object where you can specify detailed timeout settings.
             Alternatively, you can pass an integer that will be interpreted as total timeout for one request in seconds.
             If nothing is passed, a default timeout will be used.
+        :param connection_attributes: Only for the :mod:`.asyncio_backend`: Specify the connection pool, e.g. the maximum number of simultaneous connections,
+            how long resolved host names are cached or how long idle connections are kept open (see :class:`.ConnectionAttributes`).
         :param backend: "asyncio" to use the :mod:`.asyncio_backend` (faster when crawling many domains at once, but more unstable and may get hung).
                         "multithreading" to use the :mod:`~scrawler.backends.multithreading_backend` (more stable, but most likely slower).
                         See also `Why are there two backends? <getting_started.html#why-are-there-two-backends>`__
+        :param parsing_processes: Only for the :mod:`.asyncio_backend`: If specified, HTML parsing and data extraction are done
+            in a pool of this many worker processes instead of on the event loop (see :func:`.create_parsing_pool`).
+        :param html_parser: HTML parser engine used to parse the websites: ``html.parser``, ``lxml``, ``html5lib``, ``selectolax``
+            or ``auto`` (fastest installed engine). See :mod:`scrawler.parsers` for details.
+        :param http_cache: Path to a local SQLite file (or a :class:`.SQLiteHttpCache` object) where the fetched pages are cached.
+            When running again, unchanged pages are revalidated with conditional requests and served from the cache instead of being downloaded again.
+        :param warc_writer: Path to a WARC file (or a :class:`.WarcWriter` object) where all fetched responses are recorded (gzip-compressed).
+        :param warc_archive: Path to a WARC file or directory, list of them (or a :class:`.WarcArchive` object) from which the responses
+            are replayed instead of fetching them (offline replay, e.g. to run new data extractors on a recorded crawling).
         :param validate_input_parameters: Whether to validate input parameters.
             Note that this validates that all URLs work and that the various attributes work together.
             However, the attributes themselves are also validated independently.
@@ -60,6 +81,16 @@ class Scraper:
             else:
                 self.timeout = aiohttp.ClientTimeout(total=DEFAULT_REQUEST_TIMEOUT)
 
+        self.connection_attrs = connection_attributes if (connection_attributes is not None) else ConnectionAttributes()
+
+        if (parsing_processes is not None) and (self.backend != backends.ASYNCIO):
+            raise ValueError("Parsing in separate processes is only supported by the asyncio backend.")
+        self.parsing_processes = parsing_processes
+        self.html_parser = resolve_parser(html_parser)
+        self.http_cache = SQLiteHttpCache(http_cache) if (type(http_cache) is str) else http_cache
+        self.warc_writer = WarcWriter(warc_writer) if (type(warc_writer) is str) else warc_writer
+        self.warc_archive = WarcArchive(warc_archive) if (type(warc_archive) in (str, list)) else warc_archive
+
         self._progress_bar = ProgressBar(custom_message="Sites scraped:")
 
         self.data = None
@@ -75,35 +106,94 @@ class Scraper:
         """
         export_attrs = self.export_attrs if export_immediately else None
 
-        if self.backend == backends.MULTITHREADING:
-            urls_and_index = list(enumerate(self.urls))
+        # When streaming into one file, all sites share one writer instead of exporting each site on its own
+        writer = None
+        if (export_attrs is not None) and export_attrs.stream and (type(export_attrs.fn) is str):
+            writer = StreamingWriter(column_types=self.search_attrs.column_types, **export_attrs.__dict__)
+            export_attrs = None
+
+        try:
+            if self.backend == backends.MULTITHREADING:
+                on_result = None if (writer is None) else (lambda index, url, url_data: writer.write_row(url_data))
+                self.data = self._scrape_with_threads(export_attrs=export_attrs, on_result=on_result)
+            elif self.backend == backends.ASYNCIO:
+                async def write_row(index, url, url_data):
+                    writer.write_row(url_data)
+
+                on_result = None if (writer is None) else write_row
+                self.data = asyncio.get_event_loop().run_until_complete(self._scrape_async(export_attrs=export_attrs, on_result=on_result))  # instead of asyncio.run() which throws RuntimeErrors, see https://github.com/aio-libs/aiohttp/issues/4324#issuecomment-676675779
+            else:
+                raise ValueError(f'Backend "{self.backend}" not supported.')
+        finally:
+            if writer is not None:
+                writer.close()
 
-            # Define function with constant parameters pre-filled
-            def scrape_site_params_prefilled(current_index: int, url: str):
-                return multithreading_backend.scrape_site(url, export_attrs=export_attrs, search_attrs=self.search_attrs,
-                                                          current_index=current_index, user_agent=self.user_agent,
-                                                          progress_bar=self._progress_bar)
+        return self.data
 
-            # Map to ThreadPool
-            pool = ThreadPool()
-            self.data = pool.starmap(scrape_site_params_prefilled, urls_and_index)
-            pool.close()
-            pool.join()
+    def iter_results(self) -> Iterator[Tuple[int, str, List[Any]]]:
+        """Execute the scraping task and yield the data of each site as soon as it has been extracted,
+        instead of collecting all data first. Note that the results are neither kept in :attr:`data` nor exported.
+
+        :return: Iterator over tuples ``(index, url, url_data)``, where ``index`` is the index of the URL in the list of URLs
+            and ``url_data`` is a list with one entry per extracted datapoint. Results are yielded in the order they arrive.
+        """
+        return iterate_synchronously(self.iter_results_async())
+
+    async def iter_results_async(self) -> AsyncIterator[Tuple[int, str, List[Any]]]:
+        """Asynchronous version of :meth:`iter_results`, to be used with ``async for``."""
+        if self.backend == backends.MULTITHREADING:
+            def produce(on_result):
+                return asyncio.get_event_loop().run_in_executor(None, functools.partial(
+                    self._scrape_with_threads, on_result=on_result))
+
+            results = iterate_results(produce, threaded=True)
         elif self.backend == backends.ASYNCIO:
-            async def scrape_all_urls(urls):
-                connector = aiohttp.TCPConnector(limit_per_host=DEFAULT_NO_CONCURRENT_REQUESTS_PER_HOST)
-                async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
-                    tasks = [asyncio_backend.async_scrape_site(url, session=session, search_attrs=self.search_attrs,
-                                                               export_attrs=export_attrs, current_index=i,
-                                                               user_agent=self.user_agent, progress_bar=self._progress_bar)
-                             for i, url in enumerate(urls)]
-                    return await asyncio.gather(*tasks)
-
-            self.data = asyncio.get_event_loop().run_until_complete(scrape_all_urls(self.urls))  # instead of asyncio.run() which throws RuntimeErrors, see https://github.com/aio-libs/aiohttp/issues/4324#issuecomment-676675779
+            results = iterate_results(lambda on_result: self._scrape_async(on_result=on_result))
         else:
             raise ValueError(f'Backend "{self.backend}" not supported.')
 
-        return self.data
+        async for result in results:
+            yield result
+
+    def _scrape_with_threads(self, export_attrs: ExportAttributes = None,
+                             on_result: Callable[[int, str, list], None] = None) -> list:
+        urls_and_index = list(enumerate(self.urls))
+
+        # Define function with constant parameters pre-filled
+        def scrape_site_params_prefilled(current_index: int, url: str):
+            return multithreading_backend.scrape_site(url, export_attrs=export_attrs, search_attrs=self.search_attrs,
+                                                      current_index=current_index, user_agent=self.user_agent,
+                                                      progress_bar=self._progress_bar, on_result=on_result,
+                                                      html_parser=self.html_parser, http_cache=self.http_cache,
+                                                      warc_writer=self.warc_writer, warc_archive=self.warc_archive)
+
+        # Map to ThreadPool
+        pool = ThreadPool()
+        try:
+            return pool.starmap(scrape_site_params_prefilled, urls_and_index)
+        finally:
+            pool.close()
+            pool.join()
+
+    async def _scrape_async(self, export_attrs: ExportAttributes = None,
+                            on_result: Callable[[int, str, list], Awaitable] = None) -> list:
+        executor = None
+        if self.parsing_processes is not None:
+            executor = asyncio_backend.create_parsing_pool(self.search_attrs, self.parsing_processes, html_parser=self.html_parser)
+        try:
+            connector = self.connection_attrs.create_connector()
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
+                tasks = [asyncio_backend.async_scrape_site(url, session=session, search_attrs=self.search_attrs,
+                                                           export_attrs=export_attrs, current_index=i,
+                                                           user_agent=self.user_agent, progress_bar=self._progress_bar,
+                                                           on_result=on_result, executor=executor, html_parser=self.html_parser,
+                                                           http_cache=self.http_cache,
+                                                           warc_writer=self.warc_writer, warc_archive=self.warc_archive)
+                         for i, url in enumerate(self.urls)]
+                return await asyncio.gather(*tasks)
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
     def run_and_export(self, export_attrs: ExportAttributes = None) -> None:
         """Shorthand for ``Scraper.run(export_immediately=True)``.
@@ -134,9 +224,9 @@ class Scraper:
             return
 
         if export_as_one_file:
-            export_to_csv(self.data, **ea.__dict__)
+            export_dataset(self.data, column_types=self.search_attrs.column_types, **ea.__dict__)
         else:
             if len(self.data) == 1:
-                export_to_csv(self.data[0], **ea.__dict__)
+                export_dataset(self.data[0], column_types=self.search_attrs.column_types, **ea.__dict__)
             else:
-                multithreaded_csv_export(self.data, **ea.__dict__)
+                multithreaded_csv_export(self.data, column_types=self.search_attrs.column_types, **ea.__dict__)
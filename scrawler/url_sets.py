@@ -0,0 +1,195 @@
+"""Memory-compact sets for the URLs a crawl has already seen (see the ``seen_url_set`` parameter of :class:`.CrawlFrontier`)."""
+from array import array
+from typing import Iterable, Union
+import hashlib
+import math
+
+from scrawler.defaults import DEFAULT_BLOOM_FILTER_ERROR_RATE, DEFAULT_BLOOM_FILTER_CAPACITY
+
+EXACT = "exact"
+FINGERPRINTS = "fingerprints"
+BLOOM_FILTER = "bloom"
+
+
+def get_url_fingerprint(url: str) -> int:
+    """Return a 64-bit fingerprint of a URL (never ``0``)."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8", errors="surrogatepass"), digest_size=8).digest(), "little") or 1
+
+
+class FingerprintSet:
+    def __init__(self, urls: Iterable[str] = (), initial_capacity: int = 1024):
+        """Set of URLs that only stores a 64-bit fingerprint of each URL in an open-addressing hash table backed by an ``array``.
+
+        A URL takes 12 to 24 bytes instead of the about 100 bytes (and more for long URLs) of a string in a ``set``.
+        Two different URLs are only confused if their fingerprints collide, which is practically impossible
+        (the probability of any collision among 10 million URLs is below one in 300,000).
+        As the URLs themselves are not stored, the set can't be iterated and URLs can't be removed.
+
+        :param urls: URLs initially added to the set.
+        :param initial_capacity: Initial number of slots of the hash table (rounded up to a power of two). The table grows as needed.
+        """
+        capacity = 1 << max(int(initial_capacity) - 1, 1).bit_length()
+        self._table = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._length = 0
+        self.update(urls)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, url: str) -> bool:
+        fingerprint = get_url_fingerprint(url)
+        table, mask = self._table, self._mask
+        index = fingerprint & mask
+        while True:
+            slot = table[index]
+            if slot == fingerprint:
+                return True
+            if slot == 0:
+                return False
+            index = (index + 1) & mask
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {self._length} URLs>"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the hash table in bytes."""
+        return self._table.itemsize * len(self._table)
+
+    def add(self, url: str) -> None:
+        """Add a URL to the set."""
+        if self._insert(get_url_fingerprint(url)) and (3 * self._length > 2 * len(self._table)):   # keep the load factor below 2/3
+            self._resize(2 * len(self._table))
+
+    def update(self, urls: Iterable[str]) -> None:
+        """Add all URLs to the set."""
+        for url in urls:
+            self.add(url)
+
+    def _insert(self, fingerprint: int) -> bool:
+        """Insert a fingerprint, return ``False`` if it was already contained."""
+        table, mask = self._table, self._mask
+        index = fingerprint & mask
+        while True:
+            slot = table[index]
+            if slot == fingerprint:
+                return False
+            if slot == 0:
+                table[index] = fingerprint
+                self._length += 1
+                return True
+            index = (index + 1) & mask
+
+    def _resize(self, capacity: int) -> None:
+        old_table = self._table
+        self._table = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._length = 0
+        for fingerprint in old_table:
+            if fingerprint != 0:
+                self._insert(fingerprint)
+
+
+class BloomFilter:
+    def __init__(self, urls: Iterable[str] = (), error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE,
+                 capacity: int = DEFAULT_BLOOM_FILTER_CAPACITY):
+        """Set of URLs stored in a scalable Bloom filter: a URL takes only a few bytes
+        (about ``1.44 * log2(1 / error_rate)`` bits), but a URL that was never added is reported as contained
+        with a probability of up to ``error_rate`` (false positive). URLs that were added are always reported as contained.
+
+        When ``capacity`` URLs have been added, a further filter with twice the capacity and half the error rate is appended,
+        so that the total false positive rate stays below ``error_rate`` however many URLs are added.
+        As with :class:`FingerprintSet`, the set can't be iterated and URLs can't be removed.
+
+        :param urls: URLs initially added to the set.
+        :param error_rate: Maximum probability that a URL that was never added is reported as contained.
+        :param capacity: Number of URLs the first filter is sized for.
+        """
+        if not (0 < error_rate < 1):
+            raise ValueError(f"Parameter error_rate has to be between 0 and 1: {error_rate}")
+        self.error_rate = error_rate
+        self.capacity = capacity
+
+        self._filters = []  # list of [bit array, number of bits, number of hash functions, capacity, number of added URLs]
+        self._length = 0
+        self._add_filter()
+        self.update(urls)
+
+    def __len__(self) -> int:
+        """Number of URLs added (URLs that were falsely reported as contained when adding them are not counted)."""
+        return self._length
+
+    def __contains__(self, url: str) -> bool:
+        hash1, hash2 = self._hash(url)
+        return any(self._filter_contains(bloom_filter, hash1, hash2) for bloom_filter in self._filters)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {self._length} URLs>"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the bit arrays in bytes."""
+        return sum(len(bloom_filter[0]) for bloom_filter in self._filters)
+
+    def add(self, url: str) -> None:
+        """Add a URL to the set."""
+        hash1, hash2 = self._hash(url)
+        if any(self._filter_contains(bloom_filter, hash1, hash2) for bloom_filter in self._filters):
+            return
+        bloom_filter = self._filters[-1]
+        bits, no_bits, no_hashes = bloom_filter[:3]
+        for i in range(no_hashes):
+            position = (hash1 + i * hash2) % no_bits
+            bits[position >> 3] |= 1 << (position & 7)
+        bloom_filter[4] += 1
+        self._length += 1
+        if bloom_filter[4] >= bloom_filter[3]:
+            self._add_filter()
+
+    def update(self, urls: Iterable[str]) -> None:
+        """Add all URLs to the set."""
+        for url in urls:
+            self.add(url)
+
+    def _add_filter(self) -> None:
+        """Append a filter for twice as many URLs as the previous one, with half its error rate."""
+        no_filters = len(self._filters)
+        capacity = self.capacity * (2 ** no_filters)
+        error_rate = self.error_rate / (2 ** (no_filters + 1))  # the error rates of all filters sum up to less than error_rate
+        no_bits = max(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        no_hashes = max(round(-math.log2(error_rate)), 1)
+        self._filters.append([bytearray((no_bits + 7) // 8), no_bits, no_hashes, capacity, 0])
+
+    @staticmethod
+    def _hash(url: str) -> tuple:
+        """Two independent 64-bit hashes, combined to the positions of the URL in the bit arrays (double hashing)."""
+        digest = hashlib.blake2b(url.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    @staticmethod
+    def _filter_contains(bloom_filter: list, hash1: int, hash2: int) -> bool:
+        bits, no_bits, no_hashes = bloom_filter[:3]
+        for i in range(no_hashes):
+            position = (hash1 + i * hash2) % no_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def create_url_set(seen_url_set: str = EXACT, urls: Iterable[str] = (),
+                   bloom_filter_error_rate: float = DEFAULT_BLOOM_FILTER_ERROR_RATE) -> Union[set, FingerprintSet, BloomFilter]:
+    """Create a set of URLs of the given kind.
+
+    :param seen_url_set: ``exact`` (a ``set`` of the URL strings), ``fingerprints`` (a :class:`FingerprintSet`)
+        or ``bloom`` (a :class:`BloomFilter`).
+    :param urls: URLs initially added to the set.
+    :param bloom_filter_error_rate: False positive rate of the :class:`BloomFilter`.
+    """
+    if seen_url_set == EXACT:
+        return set(urls)
+    elif seen_url_set == FINGERPRINTS:
+        return FingerprintSet(urls)
+    elif seen_url_set == BLOOM_FILTER:
+        return BloomFilter(urls, error_rate=bloom_filter_error_rate)
+    raise ValueError(f'URL set "{seen_url_set}" not supported. Has to be one of: {EXACT}, {FINGERPRINTS}, {BLOOM_FILTER}')
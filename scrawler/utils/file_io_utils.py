@@ -1,12 +1,32 @@
 """Functions for local file import/export operations, e. g. CSV file reading and writing."""
 import os
+import csv
+import json
+import threading
 from multiprocessing.dummy import Pool as ThreadPool
-from typing import Union
+from typing import Union, Iterable, TYPE_CHECKING
 import logging
+from datetime import datetime
 
 import pandas as pd
 
-from scrawler.defaults import DEFAULT_CSV_ENCODING, DEFAULT_CSV_SEPARATOR, DEFAULT_CSV_QUOTING, DEFAULT_CSV_ESCAPECHAR
+try:    # optional dependency, only needed for Parquet export
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from scrawler.defaults import (DEFAULT_CSV_ENCODING, DEFAULT_CSV_SEPARATOR, DEFAULT_CSV_QUOTING, DEFAULT_CSV_ESCAPECHAR,
+                               DEFAULT_PARQUET_ROW_GROUP_SIZE)
+
+if TYPE_CHECKING:   # avoid circular imports, the attributes use the export formats
+    from scrawler.attributes import ExportAttributes
+
+CSV = "csv"
+JSONL = "jsonl"
+PARQUET = "parquet"
+EXPORT_FORMATS = (CSV, JSONL, PARQUET)
+PARQUET_SUPPORTED = pyarrow is not None
 
 
 def export_to_csv(data, directory: str, fn: str, header: Union[list, str, bool] = None,
@@ -56,18 +76,268 @@ def export_to_csv(data, directory: str, fn: str, header: Union[list, str, bool]
     logging.info(f"Data exported to {filepath}.")
 
 
+def export_dataset(data, directory: str, fn: str, export_format: str = CSV,
+                   max_rows_per_file: int = None, max_bytes_per_file: int = None,
+                   row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE, column_types: list = None,
+                   current_index: int = None, stream: bool = False, **kwargs) -> None:
+    """Export data in the given format. CSV files without a size limit are written with :func:`.export_to_csv`,
+    everything else with a :class:`.StreamingWriter`.
+
+    :param data: Two-dimensional data (list of rows).
+    :param directory: Path to directory where file will be saved.
+    :param fn: Filename (*without* file extension).
+    :param export_format: ``csv``, ``jsonl`` (JSON Lines) or ``parquet``.
+    :param max_rows_per_file: See :class:`.StreamingWriter`.
+    :param max_bytes_per_file: See :class:`.StreamingWriter`.
+    :param row_group_size: See :class:`.StreamingWriter`.
+    :param column_types: See :class:`.StreamingWriter`.
+    :param current_index: If ``fn`` is a list of filenames, use this to specify which filename to use.
+    :param stream: Ignored, only there so that all :class:`.ExportAttributes` can be passed.
+    :param kwargs: Keyword arguments that are passed on to :func:`.export_to_csv` or the :class:`.StreamingWriter`.
+    """
+    if (export_format == CSV) and (max_rows_per_file is None) and (max_bytes_per_file is None):
+        return export_to_csv(data, directory=directory, fn=fn, current_index=current_index, **kwargs)
+
+    if data is None or len(data) == 0:
+        logging.error("Can't export empty dataset.")
+        return
+
+    with StreamingWriter(directory, fn, export_format=export_format, max_rows_per_file=max_rows_per_file,
+                         max_bytes_per_file=max_bytes_per_file, row_group_size=row_group_size,
+                         column_types=column_types, current_index=current_index, **kwargs) as writer:
+        writer.write_rows(data)
+
+    logging.info(f"Data exported to {writer.filepaths}.")
+
+
+class StreamingWriter:
+    def __init__(self, directory: str, fn: Union[str, list], export_format: str = CSV,
+                 header: Union[list, str, bool] = None, encoding: str = DEFAULT_CSV_ENCODING,
+                 separator: str = DEFAULT_CSV_SEPARATOR, quoting: int = DEFAULT_CSV_QUOTING,
+                 escapechar: str = DEFAULT_CSV_ESCAPECHAR,
+                 max_rows_per_file: int = None, max_bytes_per_file: int = None,
+                 row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE, column_types: list = None,
+                 current_index: int = None, **kwargs):
+        """Append rows to a CSV, JSON Lines or Parquet file as soon as they are available, instead of writing all data at once.
+        Can be used as a context manager. Writing is thread-safe.
+
+        :param directory: Path to directory where file will be saved.
+        :param fn: Filename (*without* file extension).
+        :param export_format: ``csv``, ``jsonl`` (JSON Lines, one JSON array per row or one JSON object per row if a header list is given)
+            or ``parquet`` (requires `pyarrow <https://arrow.apache.org/docs/python/>`__).
+        :param header: If ``None`` or ``False``, no header will be written.
+            If ``first-row`` or ``True``, uses the first row written as header.
+            Else, pass list of strings of appropriate length.
+            Parquet files always have column names; if no header is given, the columns are named ``column_0``, ``column_1``, ...
+        :param encoding: Encoding to use to create the file.
+        :param separator: Column separator or delimiter to use for creating the CSV file.
+        :param quoting: Puts quotes around cells that contain the separator character.
+        :param escapechar: Escapes the separator character.
+        :param max_rows_per_file: If specified, a new file is started after this number of rows.
+            Files are then numbered: ``fn.csv``, ``fn_1.csv``, ``fn_2.csv``, ...
+        :param max_bytes_per_file: If specified, a new file is started once a file has reached this size (in bytes).
+            For Parquet files, the size is only known after a row group has been written.
+        :param row_group_size: Parquet only: Number of rows that are buffered and then written as one row group.
+        :param column_types: Parquet only: Python type of each column (see :attr:`.SearchAttributes.column_types`).
+            Values that can't be converted to the column type are written as null.
+            Columns without a type are written as strings.
+        :param current_index: If ``fn`` is a list of filenames, use this to specify which filename to use.
+        :param kwargs: Other export parameters (e.g. for :meth:`pandas:pandas.DataFrame.to_csv`) are ignored.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Export format "{export_format}" not supported. Has to be one of: {", ".join(EXPORT_FORMATS)}')
+        if (export_format == PARQUET) and not PARQUET_SUPPORTED:
+            raise ImportError("Parquet export requires pyarrow. Install it with: pip install pyarrow")
+
+        if type(fn) is not str and current_index is not None:
+            fn = fn[current_index]
+
+        self.directory = directory
+        self.fn = fn
+        self.export_format = export_format
+        self.header = header
+        self.encoding = encoding
+        self.separator = separator
+        self.quoting = quoting
+        self.escapechar = escapechar
+        self.max_rows_per_file = max_rows_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.row_group_size = row_group_size
+        self.column_types = column_types
+
+        self.filepaths = []     # all files written so far
+        self.no_rows = 0    # total number of rows written (without headers)
+
+        self._column_names = list(header) if isinstance(header, (list, tuple)) else None
+        self._file = None
+        self._csv_writer = None
+        self._parquet_writer = None
+        self._parquet_schema = None
+        self._row_group = []    # Parquet rows not yet written
+        self._no_rows_in_file = 0
+        self._lock = threading.Lock()
+
+    def write_row(self, row) -> None:
+        """Append one row. If the header should be taken from the first row, the first row written is used as header."""
+        if not isinstance(row, (list, tuple)):  # one data point only
+            row = [row]
+
+        with self._lock:
+            if (self.header == "first-row" or self.header is True) and (self._column_names is None):
+                self._column_names = list(row)
+                return
+
+            if (self._file is None) or self._file_is_full():
+                self._open_next_file(row)
+
+            if self.export_format == CSV:
+                self._csv_writer.writerow(row)
+            elif self.export_format == JSONL:
+                record = dict(zip(self._column_names, row)) if (self._column_names is not None) else list(row)
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            else:
+                self._row_group.append(row)
+                if len(self._row_group) >= self.row_group_size:
+                    self._write_row_group()
+
+            self._no_rows_in_file += 1
+            self.no_rows += 1
+
+    def write_rows(self, rows: Iterable) -> None:
+        """Append several rows."""
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self) -> None:
+        """Write buffered data to disk. Note that for Parquet files, this writes the buffered rows as a (smaller) row group."""
+        with self._lock:
+            if self._file is not None:
+                self._write_row_group()
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _file_is_full(self) -> bool:
+        if (self.max_rows_per_file is not None) and (self._no_rows_in_file >= self.max_rows_per_file):
+            return True
+        if (self.max_bytes_per_file is not None) and (self._file.tell() >= self.max_bytes_per_file):
+            return True
+        return False
+
+    def _open_next_file(self, first_row) -> None:
+        self._close_file()
+
+        part = len(self.filepaths)
+        fn = self.fn if (part == 0) else f"{self.fn}_{part}"
+        filepath = f"{self.directory}/{fn}.{self.export_format}"
+
+        if self.export_format == PARQUET:
+            self._file = open(filepath, "wb")
+            if self._parquet_schema is None:
+                self._parquet_schema = self._build_parquet_schema(len(first_row))
+            self._parquet_writer = pyarrow.parquet.ParquetWriter(self._file, self._parquet_schema)
+        else:
+            self._file = open(filepath, "w", encoding=self.encoding, newline="")
+
+        self.filepaths.append(filepath)
+        self._no_rows_in_file = 0
+
+        if self.export_format == CSV:
+            self._csv_writer = csv.writer(self._file, delimiter=self.separator, quoting=self.quoting,
+                                          escapechar=self.escapechar, lineterminator=os.linesep)
+            if self._column_names is not None:     # repeat header in each file
+                self._csv_writer.writerow(self._column_names)
+
+    def _close_file(self) -> None:
+        if self._file is None:
+            return
+
+        if self._parquet_writer is not None:
+            self._write_row_group()
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+        self._file.close()
+        self._file = None
+
+    def _build_parquet_schema(self, no_columns: int):
+        names = self._column_names if (self._column_names is not None) else [f"column_{i}" for i in range(no_columns)]
+        types = list(self.column_types or [])
+        types += [str] * (len(names) - len(types))
+
+        return pyarrow.schema([(str(name), _PARQUET_TYPES.get(column_type, "string"))
+                               for name, column_type in zip(names, types)])
+
+    def _write_row_group(self) -> None:
+        if (self._parquet_writer is None) or (len(self._row_group) == 0):
+            return
+
+        columns = []
+        for i, field in enumerate(self._parquet_schema):
+            convert = _PARQUET_CONVERTERS[str(field.type)]
+            columns.append(pyarrow.array([convert(row[i]) if (i < len(row)) else None for row in self._row_group],
+                                         type=field.type))
+
+        self._parquet_writer.write_table(pyarrow.Table.from_arrays(columns, schema=self._parquet_schema))
+        self._row_group = []
+
+
+def open_streaming_writer(export_attrs: "ExportAttributes", current_index: int = None,
+                          restored_data: list = None, column_types: list = None) -> Union[StreamingWriter, None]:
+    """Return a :class:`.StreamingWriter` if the export attributes ask for streaming, else ``None``.
+    Data restored from a frontier store is written first so that a resumed crawl produces complete files."""
+    if (export_attrs is None) or (not export_attrs.stream):
+        return None
+
+    writer = StreamingWriter(current_index=current_index, column_types=column_types, **export_attrs.__dict__)
+    writer.write_rows(restored_data or [])
+    return writer
+
+
+def _to_int(value) -> Union[int, None]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Union[float, None]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_PARQUET_TYPES = {str: "string", int: "int64", float: "double", bool: "bool", datetime: "timestamp[us]"}
+_PARQUET_CONVERTERS = {
+    "string": lambda value: None if (value is None) else str(value),
+    "int64": _to_int,
+    "double": _to_float,
+    "bool": lambda value: value if isinstance(value, bool) else None,
+    "timestamp[us]": lambda value: value if isinstance(value, datetime) else None,
+}
+
+
 def multithreaded_csv_export(list_of_datasets: list, **kwargs) -> None:
     """Export a list of multi-column dataset to a CSV file in parallel using ``multithreading``.
 
     :param list_of_datasets: List of two-dimensional data objects that will be parsed to a :class:`pandas:pandas.DataFrame`.
-    :param kwargs: Keywords arguments that are passed on to :func:`.export_to_csv`.
+    :param kwargs: Keywords arguments that are passed on to :func:`.export_dataset`.
     """
     # Prepare argument list
     args = list(enumerate(list_of_datasets))
 
     # Define function with constant parameters pre-filled
     def do_export(index, data):
-        return export_to_csv(data, current_index=index, **kwargs)
+        return export_dataset(data, current_index=index, **kwargs)
 
     # Map function for multi-threading
     pool = ThreadPool()
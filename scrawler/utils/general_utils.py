@@ -1,7 +1,11 @@
 """General purpose utility functions."""
+from typing import Callable, Awaitable, AsyncIterator, Iterator
+import asyncio
+import concurrent.futures
 import datetime
 import re
 import functools
+import threading
 
 
 def sanitize_text(text: str, lower: bool = False) -> str:
@@ -87,3 +91,87 @@ class ProgressBar:
         progress_in_numbers = f"{round(percentage * 100, 2)}% ({self.progress} / {self.total_length})"     # e.g. "99.00% (99/100)"
 
         print(f"\r{self.custom_msg} |{progress_bar}| {progress_in_numbers}", end="")
+
+
+class _ResultIteratorClosed(Exception):
+    """Raised in producer threads when the consumer of :func:`iterate_results` has stopped iterating."""
+
+
+async def iterate_results(produce: Callable[[Callable], Awaitable], threaded: bool = False,
+                          max_queue_size: int = 0) -> AsyncIterator:
+    """Run a producer and asynchronously yield every result it reports as soon as it is available.
+
+    :param produce: Function that is called with a callback ``on_result(*result)`` and returns an awaitable that runs the producer.
+        If ``threaded`` is ``False``, the callback is a coroutine function that has to be awaited by the producer.
+        Otherwise, it is a regular function that may be called from any thread.
+    :param threaded: Whether the producer reports its results from other threads.
+        Then, ``on_result`` blocks the calling thread while the buffer is full.
+    :param max_queue_size: Maximum number of results buffered before the producer has to wait for the consumer.
+        ``0`` means unlimited.
+    :return: Asynchronous iterator over the tuples passed to ``on_result``.
+    """
+    loop = asyncio.get_event_loop()
+    queue = asyncio.Queue(maxsize=max_queue_size)
+    finished = object()     # sentinel marking the end of the results
+    closed = False
+    pending_puts = set()    # futures of producer threads waiting for space in the queue
+    lock = threading.Lock()
+
+    async def on_result(*result):
+        await queue.put(result)
+
+    def on_result_threadsafe(*result):
+        with lock:
+            if closed:  # stop producer threads as soon as nobody is interested in their results anymore
+                raise _ResultIteratorClosed()
+            future = asyncio.run_coroutine_threadsafe(queue.put(result), loop)
+            pending_puts.add(future)
+        try:
+            future.result()
+        except concurrent.futures.CancelledError:
+            raise _ResultIteratorClosed()
+        finally:
+            with lock:
+                pending_puts.discard(future)
+
+    async def run_producer():
+        try:
+            await produce(on_result_threadsafe if threaded else on_result)
+        finally:
+            if not closed:
+                await queue.put(finished)
+
+    task = asyncio.ensure_future(run_producer())
+    try:
+        while True:
+            result = await queue.get()
+            if result is finished:
+                break
+            yield result
+        await task  # re-raise exceptions from the producer
+    finally:
+        with lock:
+            closed = True
+            for future in pending_puts:     # don't leave producer threads blocked on a queue that is not consumed anymore
+                future.cancel()
+        await asyncio.sleep(0)  # let the cancelled puts finish
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, _ResultIteratorClosed):
+                pass
+
+
+def iterate_synchronously(async_iterator: AsyncIterator, loop: asyncio.AbstractEventLoop = None) -> Iterator:
+    """Consume an asynchronous iterator from synchronous code by running the event loop until each next item is available.
+    While the consumer processes an item, the event loop (and thereby the producer) is paused."""
+    loop = asyncio.get_event_loop() if (loop is None) else loop
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
@@ -0,0 +1,215 @@
+"""Recording of HTTP responses into WARC files and offline replay of recorded responses."""
+from typing import Union, Iterable, Iterator, Tuple, Optional, BinaryIO
+from urllib.parse import urljoin
+import base64
+import gzip
+import hashlib
+import os
+import threading
+import time
+import uuid
+import zlib
+
+import aiohttp
+import requests
+
+from scrawler.http_cache import normalize_cache_key
+from scrawler.utils.web_utils import StoredResponse
+
+WARC_VERSION = "WARC/1.0"
+CHUNK_SIZE = 1 << 16
+
+# Header fields describing the transfer of the body, which don't apply to the recorded (already decoded) body
+TRANSFER_HEADER_FIELDS = ("content-encoding", "transfer-encoding", "content-length")
+MAX_REDIRECTS = 20
+
+
+class ArchivedResponse(StoredResponse):
+    def __init__(self, url: str, status: int, headers: Union[dict, list] = None, reason: str = None, body: bytes = b""):
+        """Response replayed from a :class:`WarcArchive`, including the body.
+
+        :param body: Raw response body.
+        """
+        super().__init__(url, status, headers=headers, reason=reason)
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        """Response body, decoded with the charset declared in the ``content-type`` header field (or UTF-8)."""
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+
+class WarcWriter:
+    def __init__(self, path: str):
+        """Records HTTP responses (status, header fields and body) into a gzip-compressed WARC file (``.warc.gz``),
+        one ``response`` record per response. Each record is compressed separately, so that records can be read individually.
+        If the file already exists, new records are appended.
+
+        The recorded body is the decoded body (without ``Content-Encoding``), therefore the header fields
+        ``Content-Encoding`` and ``Transfer-Encoding`` are not recorded and ``Content-Length`` is set to the recorded body length.
+
+        :param path: Path to the WARC file.
+        """
+        self.path = path
+        self.no_records = 0     #: Number of ``response`` records written
+
+        self._lock = threading.Lock()   # the writer may be shared by the threads of the multithreading backend
+        self._file = open(path, "ab")
+        self._write_record("warcinfo", None, b"software: scrawler\r\nformat: WARC File Format 1.0\r\n",
+                           content_type="application/warc-fields")
+
+    def write_response(self, response: Union[aiohttp.ClientResponse, requests.Response, StoredResponse], body: bytes) -> None:
+        """Record a response. Redirects that lead to the response are recorded as well.
+
+        :param response: Response object.
+        :param body: Raw response body.
+        """
+        for redirect in getattr(response, "history", ()):
+            self._write_http_response(StoredResponse.from_response(redirect), b"")
+        self._write_http_response(StoredResponse.from_response(response), body)
+
+    def close(self) -> None:
+        """Close the WARC file."""
+        with self._lock:
+            self._file.close()
+
+    def _write_http_response(self, response: StoredResponse, body: bytes) -> None:
+        header_lines = [f"HTTP/1.1 {response.status} {response.reason or ''}".rstrip()]
+        header_lines += [f"{name}: {value}" for name, value in response.headers.items()
+                         if name.lower() not in TRANSFER_HEADER_FIELDS]
+        header_lines.append(f"Content-Length: {len(body)}")
+        block = ("\r\n".join(header_lines) + "\r\n\r\n").encode("utf-8") + body
+
+        self._write_record("response", response.url, block, content_type="application/http; msgtype=response",
+                           extra_fields={"WARC-Payload-Digest": _digest(body)})
+        self.no_records += 1
+
+    def _write_record(self, record_type: str, url: Optional[str], block: bytes, content_type: str,
+                      extra_fields: dict = None) -> None:
+        fields = {"WARC-Type": record_type,
+                  "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+                  "WARC-Date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        if url is not None:
+            fields["WARC-Target-URI"] = url
+        fields.update(extra_fields or {})
+        fields.update({"WARC-Block-Digest": _digest(block), "Content-Type": content_type, "Content-Length": str(len(block))})
+
+        header = WARC_VERSION + "\r\n" + "".join(f"{name}: {value}\r\n" for name, value in fields.items()) + "\r\n"
+        record = gzip.compress(header.encode("utf-8") + block + b"\r\n\r\n")
+        with self._lock:
+            self._file.write(record)
+            self._file.flush()
+
+
+class WarcArchive:
+    def __init__(self, paths: Union[str, Iterable[str]]):
+        """Read access to the ``response`` records of gzip-compressed WARC files (e.g. written by :class:`WarcWriter`).
+        On creation, the files are indexed by URL. Records are only read from disk when requested.
+        If a URL has been recorded multiple times, the last record is used.
+
+        :param paths: Path to a WARC file or a directory containing WARC files (``.warc.gz``), or a list of them.
+        :raises ValueError: If a file is not a gzip-compressed WARC file.
+        """
+        paths = [paths] if (type(paths) is str) else list(paths)
+        self.paths = []
+        for path in paths:
+            if os.path.isdir(path):
+                self.paths += sorted(os.path.join(path, fn) for fn in os.listdir(path) if fn.endswith(".warc.gz"))
+            else:
+                self.paths.append(path)
+
+        self._index = {}    # normalized URL -> (path, offset of the record)
+        for path in self.paths:
+            for offset, record in _iter_gzip_members(path):
+                fields, _ = _parse_warc_record(record)
+                if (fields.get("warc-type") == "response") and ("warc-target-uri" in fields):
+                    self._index[normalize_cache_key(fields["warc-target-uri"])] = (path, offset)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, url: str) -> bool:
+        return normalize_cache_key(url) in self._index
+
+    def get(self, url: str, follow_redirects: bool = True) -> Optional[ArchivedResponse]:
+        """Return the recorded response of a URL.
+
+        :param url: Requested URL.
+        :param follow_redirects: If ``True`` and a redirect has been recorded for the URL, the response of the redirect target is returned.
+        :return: ``None`` if the URL (or the redirect target) has not been recorded.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            location = self._index.get(normalize_cache_key(url))
+            if location is None:
+                return None
+
+            path, offset = location
+            with open(path, "rb") as f:
+                f.seek(offset)
+                _, record = next(_iter_gzip_members(f))
+            response = _parse_http_response(*_parse_warc_record(record))
+
+            if not (follow_redirects and (300 <= response.status < 400) and ("location" in response.headers)):
+                return response
+            url = urljoin(response.url, response.headers["location"])
+
+        return None
+
+
+def _digest(data: bytes) -> str:
+    return "sha1:" + base64.b32encode(hashlib.sha1(data).digest()).decode("ascii")
+
+
+def _iter_gzip_members(file: Union[str, BinaryIO]) -> Iterator[Tuple[int, bytes]]:
+    """Yield the offset and the decompressed content of each member of a multi-member gzip file."""
+    f = open(file, "rb") if (type(file) is str) else file
+    try:
+        offset = f.tell()
+        buffer = b""
+        while True:
+            if not buffer:
+                buffer = f.read(CHUNK_SIZE)
+                if not buffer:
+                    return
+
+            decompressor = zlib.decompressobj(wbits=31)     # 31: gzip header
+            start, content = offset, []
+            while not decompressor.eof:
+                if not buffer:
+                    buffer = f.read(CHUNK_SIZE)
+                    if not buffer:
+                        raise ValueError(f"Truncated gzip file: {f.name}")
+                try:
+                    content.append(decompressor.decompress(buffer))
+                except zlib.error as e:
+                    raise ValueError(f"Not a gzip-compressed WARC file: {f.name}") from e
+                offset += len(buffer) - len(decompressor.unused_data)
+                buffer = decompressor.unused_data
+            yield start, b"".join(content)
+    finally:
+        if type(file) is str:
+            f.close()
+
+
+def _parse_warc_record(record: bytes) -> Tuple[dict, bytes]:
+    """Split a WARC record into its header fields (lowercase names) and its content block."""
+    header, _, rest = record.partition(b"\r\n\r\n")
+    lines = header.decode("utf-8", errors="replace").split("\r\n")
+    if not lines[0].startswith("WARC/"):
+        raise ValueError("Not a WARC record.")
+
+    fields = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        fields[name.strip().lower()] = value.strip()
+    return fields, rest[:int(fields.get("content-length", len(rest)))]
+
+
+def _parse_http_response(fields: dict, block: bytes) -> ArchivedResponse:
+    header, _, body = block.partition(b"\r\n\r\n")
+    lines = header.decode("utf-8", errors="replace").split("\r\n")
+
+    status_line = lines[0].split(" ", 2)    # e.g. HTTP/1.1 200 OK
+    headers = [tuple(part.strip() for part in line.split(":", 1)) for line in lines[1:] if ":" in line]
+    return ArchivedResponse(fields["warc-target-uri"], int(status_line[1]), headers=headers,
+                            reason=status_line[2] if (len(status_line) > 2) else None, body=body)
@@ -1,26 +1,52 @@
+from typing import Union, List
+
 import aiohttp
-from bs4 import BeautifulSoup
+import requests
+from bs4 import BeautifulSoup, Tag, UnicodeDammit
 
-from scrawler.utils.web_utils import ParsedUrl, get_html, async_get_html
+from scrawler.utils.web_utils import parse_url, StoredResponse, get_html, async_get_html
+from scrawler.parsers import (SELECTOLAX, SelectolaxTree, TagQuery, TagScanner, resolve_parser, best_bs4_parser,
+                              build_css_selector)
 from scrawler.defaults import DEFAULT_HTML_PARSER
 
+# Parts of a website that data extractors can require (see :attr:`.BaseExtractor.requires`)
+URL = "url"
+HEADERS = "headers"     # HTTP response, i.e. status code and header fields
+TEXT = "text"           # HTML text
+DOM = "dom"             # HTML tree
+
 
 class Website(BeautifulSoup):
-    def __init__(self, url: str, steps_from_start_page: int = None):
+    def __init__(self, url: str, steps_from_start_page: int = None, html_parser: str = DEFAULT_HTML_PARSER):
         """The Website object is a wrapper around a `BeautifulSoup <https://www.crummy.com/software/BeautifulSoup/bs4/doc/>`__ object from a website's HTML text,
         while adding additional information such as the URL and the HTTP response when fetching the website.
 
         :param url: Website URL.
         :param steps_from_start_page: Specifies number of steps from start URL to reach the given URL.
             Note that this is an optional parameter used in conjunction with the Crawler object.
+        :param html_parser: HTML parser engine: ``html.parser``, ``lxml``, ``html5lib``, ``selectolax`` or ``auto`` (fastest installed engine).
+            The HTML tree is only built on first access, so that no parsing is done if only the URL, the HTTP response or the HTML text are used.
+            With ``selectolax``, :meth:`find` and :meth:`find_all` are answered by selectolax (returning :class:`.SelectolaxTag` objects)
+            whenever the query can be expressed as CSS selector. The ``BeautifulSoup`` tree is then only built (with the fastest
+            BeautifulSoup engine installed) if other ``BeautifulSoup`` functionality is used.
+            See also :mod:`scrawler.parsers`.
 
         :raises: Exceptions raised during URL parsing.
+        :raises ValueError: If the parser engine is not supported or not installed.
         """
+        #: HTML parser engine used to construct the website.
+        self.html_parser = resolve_parser(html_parser)
+        self._selectolax_tree = None
+        self._scanned_tags = None   # tags collected by scan_tags(), by query key
+        self._soup_pending = False  # True if the BeautifulSoup tree has not been built yet, but will be built on first access
+        self._soup_attributes = set()   # attributes set by BeautifulSoup when building the tree
+
         #: Website URL.
         self.url = url
 
         #: :class:`.ParsedUrl` object for accessing the various URL parts (hostname, domain, path, ...).
-        self.parsed_url = ParsedUrl(self.url)
+        #: Shared with other users of the URL (see :func:`.parse_url`), so it must not be modified.
+        self.parsed_url = parse_url(self.url)
 
         #: Number of steps from start URL to reach the URL in crawlings.
         #: This has to be passed during object initialization, which is done automatically in
@@ -31,7 +57,8 @@ class Website(BeautifulSoup):
         self.html_text = None
 
         #: HTTP response as :class:`requests:requests.Response` or :class:`aiohttp:aiohttp.ClientResponse`
-        #: (depending on whether the website was fetched with :func:`fetch` or :func:`fetch_async`).
+        #: (depending on whether the website was fetched with :func:`fetch` or :func:`fetch_async`),
+        #: or :class:`.StoredResponse` if the website was constructed with :func:`parse`.
         #: Only available after retrieving the Website using :func:`fetch` or :func:`fetch_async`.
         self.http_response = None
 
@@ -45,7 +72,7 @@ class Website(BeautifulSoup):
         self.html_text, self.http_response = get_html(self.url, return_response_object=True, **kwargs)
 
         if self.html_text is not None:
-            super().__init__(self.html_text, DEFAULT_HTML_PARSER)
+            self._construct_tree()
 
         return self
 
@@ -61,7 +88,26 @@ class Website(BeautifulSoup):
                                                                   return_response_object=True, **kwargs)
 
         if self.html_text is not None:
-            super().__init__(self.html_text, DEFAULT_HTML_PARSER)
+            self._construct_tree()
+
+        return self
+
+    def parse(self, html: Union[str, bytes], http_response: Union[StoredResponse, aiohttp.ClientResponse, requests.Response] = None):
+        """Construct ``BeautifulSoup`` from HTML that has already been fetched, e.g. in another process.
+
+        :param html: HTML text. If :class:`bytes` are passed, they are decoded using the charset
+            declared in the HTTP response or the HTML document (or a detected one).
+        :param http_response: HTTP response the HTML was retrieved with.
+        :return: Website object with ``BeautifulSoup`` properties.
+        """
+        if isinstance(html, bytes):
+            charset = getattr(http_response, "charset", None)
+            html = UnicodeDammit(html, [charset] if charset else []).unicode_markup
+
+        self.html_text, self.http_response = html, http_response
+
+        if self.html_text is not None:
+            self._construct_tree()
 
         return self
 
@@ -70,7 +116,95 @@ class Website(BeautifulSoup):
         May be useful when inplace changes to the object have been made and you want to recreate the object without having the fetch the HTML text again.
         Note that object construction comes with a performance penalty.
         """
-        try:
-            super().__init__(self.html_text, DEFAULT_HTML_PARSER)
-        except (AttributeError, TypeError):
+        if self.html_text is None:
             print("Cannot reconstruct soup before HTML text has been fetched.")
+            return
+
+        self._construct_tree()
+        self._build_pending_soup()
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the HTML tree has been built (the tree is only built on first access, see :meth:`release`)."""
+        return (self.html_text is not None) and not self._soup_pending
+
+    def release(self) -> None:
+        """Free the HTML tree and the HTTP response object once all data has been extracted,
+        so that only the URL and the HTML text are kept in memory.
+        The tree is built again if it is accessed afterwards, the HTTP response is no longer available.
+        """
+        self.http_response = None
+        self._selectolax_tree = None
+        self._scanned_tags = None
+
+        if (self.html_text is not None) and not self._soup_pending:
+            for element in list(self.contents):
+                if isinstance(element, Tag):
+                    element.decompose()     # break the tree's reference cycles so that it can be freed right away
+            for attribute in self._soup_attributes:
+                self.__dict__.pop(attribute, None)
+            self._construct_tree()
+
+    def scan_tags(self, queries: List[TagQuery]) -> None:
+        """Collect the tags for all queries in a single pass over the HTML text (see :class:`.TagScanner`).
+        Afterwards, :meth:`find` and :meth:`find_all` calls with the same arguments as one of the queries are answered
+        from the collected tags, so that the HTML tree doesn't have to be built.
+        Does nothing if the tree has already been built, if the ``selectolax`` engine is used or if the tags have already been scanned.
+        """
+        if (self._soup_pending and (self._scanned_tags is None) and (self.html_parser != SELECTOLAX)
+                and (len(queries) > 0)):
+            self._scanned_tags = TagScanner(queries).scan(self.html_text)
+
+    def find(self, name=None, attrs=None, recursive: bool = True, string=None, **kwargs):
+        if self._soup_pending and (self._scanned_tags is not None) and recursive and (string is None):
+            scanned = self._scanned_tags.get(TagQuery.key_of(name, attrs, **kwargs))
+            if scanned is not None:
+                return scanned[0][0] if (len(scanned[0]) > 0) else None
+
+        if (self.html_parser == SELECTOLAX) and self._soup_pending and recursive and (string is None):
+            selector = build_css_selector(name, attrs, **kwargs)
+            if selector is not None:
+                results = self._get_selectolax_tree().select(selector, limit=1)
+                return results[0] if (len(results) > 0) else None
+
+        self._build_pending_soup()
+        return super().find(name, attrs or {}, recursive, string, **kwargs)
+
+    def find_all(self, name=None, attrs=None, recursive: bool = True, string=None, limit: int = None, **kwargs):
+        if self._soup_pending and (self._scanned_tags is not None) and recursive and (string is None):
+            scanned = self._scanned_tags.get(TagQuery.key_of(name, attrs, **kwargs))
+            if (scanned is not None) and scanned[1]:    # only if all matching tags have been collected
+                return scanned[0][:limit] if limit else scanned[0]
+
+        if (self.html_parser == SELECTOLAX) and self._soup_pending and recursive and (string is None):
+            selector = build_css_selector(name, attrs, **kwargs)
+            if selector is not None:
+                return self._get_selectolax_tree().select(selector, limit=limit)
+
+        self._build_pending_soup()
+        return super().find_all(name, attrs or {}, recursive, string, limit, **kwargs)
+
+    def __getattr__(self, item: str):
+        # Build BeautifulSoup tree on first access to any of its attributes
+        if (not item.startswith("__")) and self.__dict__.get("_soup_pending", False):
+            self._build_pending_soup()
+            return getattr(self, item)
+        return super().__getattr__(item)
+
+    def _construct_tree(self) -> None:
+        # The tree is built lazily, many data extractors only need the URL, the HTTP response or the HTML text
+        self._selectolax_tree = None
+        self._scanned_tags = None
+        self._soup_pending = True
+
+    def _get_selectolax_tree(self) -> SelectolaxTree:
+        if self._selectolax_tree is None:
+            self._selectolax_tree = SelectolaxTree(self.html_text)
+        return self._selectolax_tree
+
+    def _build_pending_soup(self) -> None:
+        if self._soup_pending:
+            self._soup_pending = False  # set before building, as BeautifulSoup's constructor accesses attributes
+            own_attributes = set(self.__dict__)
+            super().__init__(self.html_text, best_bs4_parser() if (self.html_parser == SELECTOLAX) else self.html_parser)
+            self._soup_attributes = set(self.__dict__) - own_attributes
@@ -36,5 +36,7 @@ setup(
                       'python-dateutil>=2.8.1',
                       'setuptools>=28.8.0',
                       'aiohttp>=3.7.3',
-                      'readability-lxml >= 0.8.1']
+                      'readability-lxml >= 0.8.1'],
+    extras_require={'parquet': ['pyarrow>=6.0.0'],
+                    'aiodns': ['aiodns>=3.0.0']}
 )
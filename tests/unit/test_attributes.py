@@ -0,0 +1,57 @@
+import unittest
+import asyncio
+import importlib.util
+
+from scrawler.attributes import ConnectionAttributes
+
+
+def run_in_new_loop(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestConnectionAttributes(unittest.TestCase):
+    def test_create_connector(self):
+        async def create_connectors():
+            connection_attrs = ConnectionAttributes(limit_per_host=4, dns_cache_ttl=60, keepalive_timeout=20)
+            connectors = [connection_attrs.create_connector(default_limit=500), connection_attrs.create_connector()]
+            for connector in connectors:
+                await connector.close()
+            return connection_attrs, connectors
+
+        connection_attrs, (connector, other_connector) = run_in_new_loop(create_connectors())
+        self.assertEqual(connector.limit, 500)
+        self.assertEqual(other_connector.limit, 100)
+        self.assertEqual(connector.limit_per_host, 4)
+        self.assertTrue(connector.use_dns_cache)
+        self.assertIs(connector._ssl, connection_attrs.ssl_context)   # one TLS context for all connections
+        self.assertIs(other_connector._ssl, connection_attrs.ssl_context)
+
+    def test_disable_dns_cache(self):
+        async def create_connector():
+            connector = ConnectionAttributes(limit=0, dns_cache_ttl=0).create_connector()
+            await connector.close()
+            return connector
+
+        connector = run_in_new_loop(create_connector())
+        self.assertFalse(connector.use_dns_cache)
+        self.assertEqual(connector.limit, 0)   # no limit
+        self.assertEqual(connector.limit_per_host, 0)  # not limited by default
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            ConnectionAttributes(limit=-1)
+        with self.assertRaises(ValueError):
+            ConnectionAttributes(resolver="threaded")
+
+    @unittest.skipIf(importlib.util.find_spec("aiodns") is not None, "aiodns is installed")
+    def test_async_resolver_requires_aiodns(self):
+        with self.assertRaises(ImportError):
+            ConnectionAttributes(resolver="async")
+
+
+if __name__ == "__main__":
+    unittest.main()
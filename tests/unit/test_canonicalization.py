@@ -0,0 +1,86 @@
+import unittest
+
+from scrawler.attributes import CrawlingAttributes
+from scrawler.canonicalization import UrlCanonicalizer, get_rel_canonical_url
+from scrawler.frontier import CrawlFrontier
+from scrawler.utils.web_utils import StoredResponse
+
+
+class TestUrlCanonicalizer(unittest.TestCase):
+    def test_equivalent_urls(self):
+        canonicalizer = UrlCanonicalizer()
+        equivalent_urls = ["http://Example.com:80/a/./b/?utm_source=x&b=2&a=1",
+                           "HTTP://example.COM/a/b/?a=1&b=2",
+                           "http://example.com/a/c/../b/?b=2&fbclid=123&a=1",
+                           "http://example.com/%61/b/?a=1&b=2&"]
+        self.assertEqual(canonicalizer.canonicalize_all(equivalent_urls), {"http://example.com/a/b/?a=1&b=2"})
+
+    def test_normalizations(self):
+        canonicalizer = UrlCanonicalizer()
+        self.assertEqual(canonicalizer("https://User@Example.com:443"), "https://User@example.com/")
+        self.assertEqual(canonicalizer("https://example.com:8443/%7euser/%2f%c3%a4"), "https://example.com:8443/~user/%2F%C3%A4")
+        self.assertEqual(canonicalizer("https://example.com/a/b/.."), "https://example.com/a/")
+        self.assertEqual(canonicalizer("https://example.com/../a"), "https://example.com/a")
+        self.assertEqual(canonicalizer("https://example.com/shop;jsessionid=A1/item?PHPSESSID=1&id=5"), "https://example.com/shop/item?id=5")
+        self.assertEqual(canonicalizer("https://example.com/?b=1&a=2&b=0#Top"), "https://example.com/?a=2&b=1&b=0#Top")
+        self.assertEqual(canonicalizer("mailto:Info@Example.com"), "mailto:Info@Example.com")
+
+    def test_configuration(self):
+        canonicalizer = UrlCanonicalizer(sort_query_parameters=False, stripped_parameters=["ref"], stripped_parameter_pattern=None)
+        self.assertEqual(canonicalizer("https://example.com/?utm_source=x&b=2&REF=home&a=1"), "https://example.com/?utm_source=x&b=2&a=1")
+
+
+class TestFrontierCanonicalization(unittest.TestCase):
+    def test_spellings_are_crawled_once(self):
+        frontier = CrawlFrontier("https://Example.com:443", url_canonicalizer=UrlCanonicalizer())
+        url, distance = frontier.pop()
+        self.assertEqual(url, "https://example.com/")
+
+        frontier.mark_processed(url, distance, ["/", "/index.html?utm_campaign=x", "/./index.html", "HTTPS://EXAMPLE.COM/index.html"])
+        self.assertEqual(frontier.to_crawl, {"https://example.com/index.html"})
+
+    def test_opt_in(self):
+        self.assertIsNone(CrawlingAttributes().url_canonicalizer)
+        self.assertIsInstance(CrawlingAttributes(canonicalize_urls=True).url_canonicalizer, UrlCanonicalizer)
+        canonicalizer = UrlCanonicalizer()
+        self.assertIs(CrawlingAttributes(canonicalize_urls=canonicalizer).url_canonicalizer, canonicalizer)
+
+
+class TestRelCanonical(unittest.TestCase):
+    def test_get_rel_canonical_url(self):
+        response = StoredResponse("https://example.com/news/article?ref=home", 200, {"Content-Type": "text/html; charset=utf-8"})
+        self.assertEqual(get_rel_canonical_url('<head><link rel="stylesheet" href="/s.css"><LINK HREF=article?id=1&amp;p=2 REL=Canonical></head>',
+                                               response), "https://example.com/news/article?id=1&p=2")
+        self.assertEqual(get_rel_canonical_url(b"<head><link rel='alternate canonical' href='/a'/></head>", response), "https://example.com/a")
+        self.assertIsNone(get_rel_canonical_url('<head></head><body><link rel="canonical" href="/a"></body>', response))
+
+        response.headers["Link"] = '<https://example.com/style.css>; rel="preload", <https://example.com/a>; rel="canonical"'
+        self.assertEqual(get_rel_canonical_url("<head></head>", response), "https://example.com/a")
+
+    def test_variants_are_collapsed(self):
+        frontier = CrawlFrontier("https://example.com/")
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, ["/article?v=1", "/article?v=2", "/article?id=5&v=3", "/other"])
+
+        frontier.to_crawl.discard("https://example.com/article?v=1")
+        frontier.in_progress.add("https://example.com/article?v=1")
+        # the variant stands in for the canonical page
+        self.assertEqual(frontier.claim_canonical_url("https://example.com/article?v=1", 1, "https://example.com/article"),
+                         "https://example.com/article")
+        self.assertEqual(frontier.in_progress, {"https://example.com/article"})
+        # parameter v does not change the page, so the other variants are not crawled
+        self.assertEqual(frontier.to_crawl, {"https://example.com/article?id=5", "https://example.com/other"})
+        frontier.mark_processed("https://example.com/article", 1, ["/article?v=4", "https://example.com/article?id=5&v=6"])
+        self.assertEqual(frontier.to_crawl, {"https://example.com/article?id=5", "https://example.com/other"})
+
+        # a page whose canonical page has been processed already is a duplicate
+        url, distance = frontier.pop()
+        self.assertIsNone(frontier.claim_canonical_url(url, distance, "https://example.com/article"))
+        self.assertIn(url, frontier.processed)
+        # canonical URLs that are not crawled are ignored
+        url, distance = frontier.pop()
+        self.assertEqual(frontier.claim_canonical_url(url, distance, "https://other.org/article"), url)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from scrawler.attributes import SearchAttributes
+from scrawler.data_extractors import (BaseExtractor, HttpStatusCodeExtractor, ServerProductExtractor, TitleExtractor,
+                                      TermOccurrenceExtractor, UrlExtractor)
+from scrawler.utils.web_utils import StoredResponse
+from scrawler.website import Website, URL, HEADERS, TEXT, DOM
+
+HTML = "<html><head><title>Title</title></head><body><a href='/a'>A</a></body></html>"
+
+
+class TestLazyDomConstruction(unittest.TestCase):
+    def setUp(self) -> None:
+        self.response = StoredResponse("https://example.com/", 200, {"Server": "nginx"})
+
+    def test_tree_is_only_built_if_needed(self):
+        search_attrs = SearchAttributes(UrlExtractor(), HttpStatusCodeExtractor(), ServerProductExtractor(),
+                                        TermOccurrenceExtractor("Title"))
+        self.assertEqual(search_attrs.requires, {URL, HEADERS, TEXT})
+
+        website = Website(self.response.url, html_parser="html.parser").parse(HTML, self.response)
+        self.assertEqual(search_attrs.extract_all_attrs_from_website(website), ["https://example.com/", 200, "nginx", 1])
+        self.assertFalse(website.is_parsed)
+
+        self.assertEqual(TitleExtractor().run(website), "Title")
+        self.assertTrue(website.is_parsed)
+
+    def test_release(self):
+        website = Website(self.response.url, html_parser="html.parser").parse(HTML, self.response)
+        self.assertEqual(website.find("a")["href"], "/a")
+
+        website.release()
+        self.assertFalse(website.is_parsed)
+        self.assertIsNone(website.http_response)
+        self.assertEqual(website.find("a")["href"], "/a")   # tree is built again on access
+
+    def test_custom_extractors_require_everything(self):
+        self.assertEqual(SearchAttributes(BaseExtractor()).requires, {URL, HEADERS, TEXT, DOM})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import json
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from scrawler.utils.file_io_utils import StreamingWriter, export_dataset, PARQUET_SUPPORTED
+
+
+class TestStreamingWriter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.ROWS = [[f"https://example.com/{i}", i] for i in range(5)]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_csv(self):
+        with StreamingWriter(self.directory.name, "data", header=["url", "number"]) as writer:
+            writer.write_row(self.ROWS[0])
+            writer.write_rows(self.ROWS[1:])
+
+        df = pd.read_csv(writer.filepaths[0])
+        self.assertEqual(list(df.columns), ["url", "number"])
+        self.assertEqual(df.values.tolist(), self.ROWS)
+
+    def test_jsonl(self):
+        with StreamingWriter(self.directory.name, "data", export_format="jsonl", header=["url", "number"]) as writer:
+            writer.write_rows(self.ROWS)
+
+        with open(os.path.join(self.directory.name, "data.jsonl"), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[1], {"url": "https://example.com/1", "number": 1})
+
+    def test_header_from_first_row(self):
+        with StreamingWriter(self.directory.name, "data", header="first-row") as writer:
+            writer.write_rows([["url", "number"]] + self.ROWS)
+
+        self.assertEqual(writer.no_rows, 5)
+        self.assertEqual(list(pd.read_csv(writer.filepaths[0]).columns), ["url", "number"])
+
+    def test_roll_by_row_count(self):
+        with StreamingWriter(self.directory.name, "data", header=["url", "number"], max_rows_per_file=2) as writer:
+            writer.write_rows(self.ROWS)
+
+        self.assertEqual([os.path.basename(path) for path in writer.filepaths], ["data.csv", "data_1.csv", "data_2.csv"])
+        self.assertEqual(sum(len(pd.read_csv(path)) for path in writer.filepaths), 5)
+
+    def test_roll_by_size(self):
+        with StreamingWriter(self.directory.name, "data", export_format="jsonl", max_bytes_per_file=1) as writer:
+            writer.write_rows(self.ROWS)
+
+        self.assertEqual(len(writer.filepaths), 5)
+
+    def test_export_dataset_with_list_of_filenames(self):
+        export_dataset(self.ROWS, self.directory.name, ["a", "b"], export_format="jsonl", current_index=1)
+        self.assertTrue(os.path.isfile(os.path.join(self.directory.name, "b.jsonl")))
+
+
+@unittest.skipUnless(PARQUET_SUPPORTED, "pyarrow is not installed")
+class TestParquetExport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.ACCESS_TIME = datetime(2021, 5, 1, 12, 30)
+        self.ROWS = [["https://example.com/", 200, self.ACCESS_TIME],
+                     ["https://example.com/missing", "NULL", "NULL"],
+                     ["https://example.com/a", 404, self.ACCESS_TIME]]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_column_types_and_row_groups(self):
+        import pyarrow.parquet
+
+        with StreamingWriter(self.directory.name, "data", export_format="parquet", header=["url", "status", "time"],
+                             column_types=[str, int, datetime], row_group_size=2) as writer:
+            writer.write_rows(self.ROWS)
+
+        parquet_file = pyarrow.parquet.ParquetFile(writer.filepaths[0])
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        self.assertEqual([str(field.type) for field in parquet_file.schema_arrow], ["string", "int64", "timestamp[us]"])
+
+        table = parquet_file.read().to_pydict()
+        self.assertEqual(table["status"], [200, None, 404])
+        self.assertEqual(table["time"][0], self.ACCESS_TIME)
+
+
+if __name__ == "__main__":
+    unittest.main()
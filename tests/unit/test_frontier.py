@@ -0,0 +1,143 @@
+import unittest
+import os
+import tempfile
+
+from scrawler.frontier import CrawlFrontier, SQLiteFrontierStore
+
+
+class TestCrawlFrontier(unittest.TestCase):
+    def setUp(self) -> None:
+        self.START_URL = "https://example.com/"
+
+    def test_links_are_filtered_and_deduplicated(self):
+        frontier = CrawlFrontier(self.START_URL)
+        url, distance = frontier.pop()
+        self.assertEqual((url, distance), (self.START_URL, 0))
+
+        frontier.mark_processed(url, distance, ["/a", "/a#frag", "https://other.org/", "mailto:info@example.com",
+                                                "/image.jpg", self.START_URL])
+        self.assertEqual(frontier.to_crawl, {"https://example.com/a"})
+        self.assertIn("https://other.org/", frontier.discarded)
+        self.assertEqual(frontier.url_and_distance["https://example.com/a"], 1)
+
+    def test_redirect_aliases_are_deduplicated(self):
+        frontier = CrawlFrontier(self.START_URL)
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, ["/a", "/b/"])
+        url, distance = frontier.pop()
+        other_url = ({"https://example.com/a", "https://example.com/b/"} - {url}).pop()
+
+        # the page redirected to the other URL, which therefore does not have to be fetched anymore
+        frontier.mark_processed(url, distance, ["/a", "/b", "/b/", "/c"], aliases=[url, other_url])
+        self.assertEqual(frontier.to_crawl, {"https://example.com/b", "https://example.com/c"} - {url, other_url})
+        self.assertIn(other_url, frontier.processed)
+        self.assertEqual(frontier.no_processed_urls, 2)
+
+    def test_compact_seen_url_sets(self):
+        for seen_url_set in ("fingerprints", "bloom"):
+            frontier = CrawlFrontier(self.START_URL, seen_url_set=seen_url_set)
+            url, distance = frontier.pop()
+            frontier.mark_processed(url, distance, ["/a", "https://other.org/", self.START_URL])
+            self.assertEqual(frontier.to_crawl, {"https://example.com/a"})
+
+            url, distance = frontier.pop()
+            self.assertEqual(distance, 1)
+            frontier.mark_processed(url, distance, ["/", "/a", "/b", "https://other.org/"])
+            self.assertEqual(frontier.to_crawl, {"https://example.com/b"})
+            self.assertIn("https://example.com/a", frontier.processed)
+            self.assertIn("https://other.org/", frontier.discarded)
+            self.assertEqual(frontier.url_and_distance, {"https://example.com/b": 2})   # only kept for the URLs to crawl
+
+    def test_max_no_urls_counts_urls_in_progress(self):
+        frontier = CrawlFrontier(self.START_URL, max_no_urls=2)
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, ["/a", "/b", "/c"])
+
+        self.assertIsNotNone(frontier.pop())
+        self.assertIsNone(frontier.pop())   # one processed + one in progress
+        self.assertFalse(frontier.is_finished)
+
+    def test_failed_urls_free_their_slot(self):
+        frontier = CrawlFrontier(self.START_URL, max_no_urls=1)
+        url, _ = frontier.pop()
+        frontier.mark_failed(url)
+
+        self.assertIn(url, frontier.discarded)
+        self.assertTrue(frontier.is_finished)
+
+    def test_max_distance_from_start_url(self):
+        frontier = CrawlFrontier(self.START_URL, max_distance_from_start_url=0)
+        url, distance = frontier.pop()
+        self.assertFalse(frontier.should_follow_links(distance))
+
+
+class TestSQLiteFrontierStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "frontier.sqlite")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_restore(self):
+        store = SQLiteFrontierStore(self.path, checkpoint_interval=1)
+        frontier = CrawlFrontier("https://example.com/", frontier_store=store, index=0)
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, ["/a", "/b", "https://other.org/"], url_data=[url, 200])
+        frontier.pop()  # in progress when "crashing", has to be crawled again after restoring
+        store.close()
+
+        store = SQLiteFrontierStore(self.path)
+        state = store.load_domain(0)
+        self.assertEqual(state["data"], [["https://example.com/", 200]])
+        self.assertIsNone(store.load_domain(1))
+
+        restored = CrawlFrontier.restore(state, frontier_store=store, index=0)
+        self.assertEqual(restored.processed, {"https://example.com/"})
+        self.assertEqual(restored.to_crawl, {"https://example.com/a", "https://example.com/b"})
+        self.assertIn("https://other.org/", restored.discarded)
+        self.assertEqual(restored.url_and_distance["https://example.com/a"], 1)
+        self.assertEqual(restored.no_processed_urls, 1)
+        store.close()
+
+    def test_restore_counts_urls_without_data(self):
+        store = SQLiteFrontierStore(self.path, checkpoint_interval=1)
+        frontier = CrawlFrontier("https://example.com/", frontier_store=store, index=0)
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, ["/a"], url_data=[url, 200])
+        url, distance = frontier.pop()
+        frontier.mark_processed(url, distance, [], url_data=None)     # e.g. not an HTML page
+        store.close()
+
+        store = SQLiteFrontierStore(self.path)
+        restored = CrawlFrontier.restore(store.load_domain(0), frontier_store=store, index=0)
+        self.assertEqual(len(store.load_domain(0)["data"]), 1)
+        self.assertEqual(restored.no_processed_urls, 2)
+        store.close()
+
+    def test_resume_before_first_checkpoint(self):
+        store = SQLiteFrontierStore(self.path)     # default checkpoint interval, no checkpoint is written below
+        frontier = CrawlFrontier("https://example.com/", frontier_store=store, index=0)
+        frontier.pop()  # interrupted while the start URL is fetched
+
+        resumed_store = SQLiteFrontierStore(self.path)
+        state = resumed_store.load_domain(0)
+        self.assertFalse(state["finished"])
+        restored = CrawlFrontier.restore(state, frontier_store=resumed_store, index=0)
+        self.assertEqual(restored.pop(), ("https://example.com/", 0))
+        self.assertFalse(restored.is_finished)
+        resumed_store.close()
+        store.close()
+
+    def test_clear(self):
+        store = SQLiteFrontierStore(self.path)
+        CrawlFrontier("https://example.com/", frontier_store=store, index=0).close()
+        self.assertTrue(store.load_domain(0)["finished"])
+
+        store.clear()
+        self.assertIsNone(store.load_domain(0))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
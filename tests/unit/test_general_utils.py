@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+import itertools
+import threading
+import time
+
+from scrawler.utils.general_utils import iterate_results, iterate_synchronously
+
+
+class TestIterateResults(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous_loop = asyncio.get_event_loop()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self) -> None:
+        self.loop.close()
+        asyncio.set_event_loop(self.previous_loop)
+
+    def test_async_producer(self):
+        async def produce(on_result):
+            for i in range(5):
+                await on_result(i, str(i))
+
+        results = list(iterate_synchronously(iterate_results(produce, max_queue_size=1)))
+        self.assertEqual(results, [(i, str(i)) for i in range(5)])
+
+    def test_threaded_producer(self):
+        def produce_in_thread(on_result):
+            for i in range(5):
+                on_result(i)
+
+        def produce(on_result):
+            return self.loop.run_in_executor(None, produce_in_thread, on_result)
+
+        results = list(iterate_synchronously(iterate_results(produce, threaded=True)))
+        self.assertEqual(results, [(i,) for i in range(5)])
+
+    def test_threaded_producer_waits_for_slow_consumer(self):
+        produced = []
+
+        def produce_in_thread(on_result):
+            for i in range(20):
+                on_result(i)
+                produced.append(i)
+
+        def produce(on_result):
+            return self.loop.run_in_executor(None, produce_in_thread, on_result)
+
+        ahead = []
+        for (i,) in iterate_synchronously(iterate_results(produce, threaded=True, max_queue_size=2)):
+            time.sleep(0.005)   # slow consumer
+            ahead.append(len(produced) - i)
+        self.assertEqual(len(ahead), 20)
+        self.assertLessEqual(max(ahead), 3)     # two results in the queue and the one being consumed
+
+    def test_early_stop_unblocks_threaded_producer(self):
+        stopped = threading.Event()
+
+        def produce_in_thread(on_result):
+            try:
+                for i in itertools.count():
+                    on_result(i)
+            finally:
+                stopped.set()
+
+        def produce(on_result):
+            return self.loop.run_in_executor(None, produce_in_thread, on_result)
+
+        results = list(itertools.islice(iterate_synchronously(iterate_results(produce, threaded=True, max_queue_size=1)), 3))
+        self.assertEqual(results, [(0,), (1,), (2,)])
+        self.assertTrue(stopped.wait(timeout=5))
+
+    def test_early_stop_cancels_producer(self):
+        cancelled = threading.Event()
+
+        async def produce(on_result):
+            try:
+                for i in itertools.count():
+                    await on_result(i)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        results = list(itertools.islice(iterate_synchronously(iterate_results(produce, max_queue_size=1)), 3))
+        self.assertEqual(results, [(0,), (1,), (2,)])
+        self.assertTrue(cancelled.is_set())
+
+    def test_producer_exceptions_are_raised(self):
+        async def produce(on_result):
+            await on_result(1)
+            raise RuntimeError("failed")
+
+        with self.assertRaises(RuntimeError):
+            list(iterate_synchronously(iterate_results(produce)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+
+from scrawler.http_cache import SQLiteHttpCache, normalize_cache_key
+from scrawler.utils.web_utils import StoredResponse, get_html, async_get_html
+
+
+class TestSQLiteHttpCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+        self.URL = "https://example.com/page"
+        self.BODY = "<html><title>Zürich</title></html>".encode("utf-8")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_store_and_revalidate(self):
+        cache = SQLiteHttpCache(self.path)
+        response = StoredResponse(self.URL, 200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Feb 2021 10:00:00 GMT",
+                                                  "Content-Type": "text/html"}, reason="OK")
+        self.assertTrue(cache.store(self.URL, response, self.BODY, encoding="utf-8"))
+        cache.close()
+
+        cache = SQLiteHttpCache(self.path)     # the next run
+        self.assertEqual(cache.conditional_headers("HTTPS://Example.com/page#section"),
+                         {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Feb 2021 10:00:00 GMT"})
+
+        cached = cache.revalidate(self.URL, StoredResponse(self.URL, 304, {"ETag": '"v2"'}))
+        self.assertEqual((cached.status, cached.headers["content-type"]), (200, "text/html"))
+        self.assertEqual(cached.text, "<html><title>Zürich</title></html>")
+        self.assertEqual(cache.conditional_headers(self.URL)["If-None-Match"], '"v2"')
+        self.assertEqual(cache.no_hits, 1)
+        cache.close()
+
+    def test_only_revalidatable_responses_are_stored(self):
+        cache = SQLiteHttpCache(self.path)
+        self.assertFalse(cache.store(self.URL, StoredResponse(self.URL, 200, {}), self.BODY, "utf-8"))
+        self.assertFalse(cache.store(self.URL, StoredResponse(self.URL, 404, {"ETag": '"v1"'}), self.BODY, "utf-8"))
+        self.assertFalse(cache.store(self.URL, StoredResponse(self.URL, 200, {"ETag": '"v1"', "Cache-Control": "no-store"}),
+                                     self.BODY, "utf-8"))
+        self.assertEqual(cache.conditional_headers(self.URL), {})
+        self.assertIsNone(cache.revalidate(self.URL, StoredResponse(self.URL, 304)))
+
+        cache.store(self.URL, StoredResponse(self.URL, 200, {"ETag": '"v1"'}), self.BODY, "utf-8")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_normalize_cache_key(self):
+        self.assertEqual(normalize_cache_key("HTTP://WWW.Example.com"), "http://www.example.com/")
+        self.assertEqual(normalize_cache_key("https://example.com/Path?q=1#top"), "https://example.com/Path?q=1")
+
+
+
+class EvictingHandler(BaseHTTPRequestHandler):
+    cache = None    # removes all entries from this cache before answering a conditional request with 304
+    requests = []
+
+    def do_GET(self):
+        conditional = "If-None-Match" in self.headers
+        EvictingHandler.requests.append(conditional)
+        if conditional:
+            EvictingHandler.cache.clear()
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+
+        body = b"<html><title>Page</title></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEvictedCacheEntry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SQLiteHttpCache(os.path.join(self.directory.name, "cache.sqlite"))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), EvictingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/page"
+        EvictingHandler.cache = self.cache
+        EvictingHandler.requests = []
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_get_html_requests_page_again(self):
+        self.assertIn("Page", get_html(self.url, http_cache=self.cache))
+        self.assertIn("Page", get_html(self.url, http_cache=self.cache))    # 304, but the entry is gone
+        self.assertEqual(EvictingHandler.requests, [False, True, False])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_async_get_html_requests_page_again(self):
+        async def get_twice():
+            # with a single connection, the second request can only be made once the 304 response has been released
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=1)) as session:
+                return [await asyncio.wait_for(async_get_html(self.url, session, http_cache=self.cache), timeout=10)
+                        for _ in range(2)]
+
+        loop = asyncio.new_event_loop()
+        try:
+            texts = loop.run_until_complete(get_twice())
+        finally:
+            loop.close()
+        self.assertTrue(all("Page" in text for text in texts))
+        self.assertEqual(EvictingHandler.requests, [False, True, False])
+        self.assertEqual(len(self.cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+
+from scrawler.parsers import (build_css_selector, resolve_parser, is_parser_available, TagQuery, TagScanner, LinkScanner,
+                              HTML_PARSER, SELECTOLAX)
+from scrawler.data_extractors import (ContactNameExtractor, DescriptionExtractor, LinkExtractor, TitleExtractor,
+                                      WebsiteTextExtractor)
+from scrawler.website import Website
+
+HTML = """<html><head><title>Title</title><meta name="description" content="A description"></head>
+<body><div class="employee_name">Jane Doe</div><div class="content main">Hello <b>world</b><script>var x;</script></div>
+<a href="/a">A</a><a href="https://example.org/b">B</a><a name="no-href">C</a></body></html>"""
+
+
+class TestBuildCssSelector(unittest.TestCase):
+    def test_supported_queries(self):
+        self.assertEqual(build_css_selector("a", href=True), "a[href]")
+        self.assertEqual(build_css_selector(["p", "div"], {"class": ["content", "main"]}),
+                         'p[class~="content"], p[class~="main"], div[class~="content"], div[class~="main"]')
+        self.assertEqual(build_css_selector("meta", attrs={"name": "description"}), 'meta[name="description"]')
+        self.assertEqual(build_css_selector(class_="employee_name"), '*[class~="employee_name"]')
+
+    def test_unsupported_queries(self):
+        self.assertIsNone(build_css_selector(lambda tag: True))
+        self.assertIsNone(build_css_selector("a", href=lambda value: True))
+
+
+class TestResolveParser(unittest.TestCase):
+    def test_resolve_parser(self):
+        self.assertEqual(resolve_parser(HTML_PARSER), HTML_PARSER)
+        self.assertTrue(is_parser_available(resolve_parser("auto")))
+        self.assertRaises(ValueError, resolve_parser, "not-a-parser")
+
+
+class TestTagScanner(unittest.TestCase):
+    def test_scan(self):
+        queries = [TagQuery("title", text=True), TagQuery("a", find_all=True, href=True),
+                   TagQuery("div", {"class": "content"}, find_all=True, text=True)]
+        results = TagScanner(queries).scan(HTML)
+
+        title, complete = results[queries[0].key]
+        self.assertEqual((title[0].string, complete), ("Title", False))
+        self.assertEqual([tag["href"] for tag in results[queries[1].key][0]], ["/a", "https://example.org/b"])
+        self.assertEqual(results[queries[2].key][0][0].text, "Hello world")     # without script
+        self.assertIsNone(results[queries[2].key][0][0].string)
+
+    def test_stops_when_all_queries_are_answered(self):
+        scanner = TagScanner([TagQuery("meta", {"name": "description"}, content=True)])
+        scanner.CHUNK_SIZE = 16
+        results = scanner.scan(HTML + "<p>" * 1000)
+        self.assertEqual(list(results.values())[0][0][0]["content"], "A description")
+        self.assertLess(scanner.getpos()[0], 3)
+
+    def test_text_split_across_chunks(self):
+        html = "<html><head><title>" + "x" * (TagScanner.CHUNK_SIZE - 10) + " A long title</title></head></html>"
+        query = TagQuery("title", text=True)
+        title = TagScanner([query]).scan(html)[query.key][0][0]
+        self.assertEqual(title.string, "x" * (TagScanner.CHUNK_SIZE - 10) + " A long title")
+
+        website = Website("https://example.com/", html_parser=HTML_PARSER).parse(html)
+        website.scan_tags(TitleExtractor().tag_queries)
+        self.assertTrue(TitleExtractor().run(website).endswith("A long title"))
+
+        scanner = TagScanner([TagQuery("p", text=True)])
+        scanner.CHUNK_SIZE = 4
+        paragraph = list(scanner.scan("<p>one<!-- c -->two <b>three</b></p>").values())[0][0][0]
+        self.assertEqual(paragraph.get_text("|"), "one|two |three")
+
+    def test_website_answers_find_from_scanned_tags(self):
+        website = Website("https://example.com/", html_parser=HTML_PARSER).parse(HTML)
+        website.scan_tags([TagQuery("title", text=True), TagQuery("a", find_all=True, href=True)])
+        self.assertEqual(TitleExtractor().run(website), "Title")
+        self.assertEqual(LinkExtractor().run(website), {"/a", "https://example.org/b"})
+        self.assertFalse(website.is_parsed)
+
+        self.assertEqual(website.find("b").text, "world")     # not scanned, uses the HTML tree
+        self.assertTrue(website.is_parsed)
+
+
+class TestLinkScanner(unittest.TestCase):
+    def test_same_links_as_link_extractor(self):
+        website = Website("https://example.com/", html_parser=HTML_PARSER).parse(HTML)
+        self.assertEqual(LinkScanner().scan(HTML), LinkExtractor().run(website))
+        self.assertEqual(LinkScanner().scan(HTML.encode()), LinkExtractor().run(website))
+
+    def test_scan(self):
+        html = """<head><base href="https://cdn.example.com/dir/"><link rel="next" href="page2"></head>
+        <!-- <a href="/commented-out"> --><script>var a = '<a href="/in-script">';</script>
+        <a title="a > b" HREF = ' /a?x=1&amp;y=2 '>A</a><a data-href="/no">B</a><map><area href="map"></map>"""
+        self.assertEqual(LinkScanner().scan(html), {"https://cdn.example.com/a?x=1&y=2"})
+        self.assertEqual(LinkScanner(area_links=True, next_links=True).scan(html),
+                         {"https://cdn.example.com/a?x=1&y=2", "https://cdn.example.com/dir/map",
+                          "https://cdn.example.com/dir/page2"})
+
+
+@unittest.skipUnless(is_parser_available(SELECTOLAX), "selectolax not installed")
+class TestSelectolaxEngine(unittest.TestCase):
+    def test_extractors_match_beautifulsoup(self):
+        extractors = [ContactNameExtractor(), DescriptionExtractor(), LinkExtractor(), TitleExtractor(),
+                      WebsiteTextExtractor(mode="search_in_tags")]
+        reference = Website("https://example.com/", html_parser=HTML_PARSER).parse(HTML)
+        website = Website("https://example.com/", html_parser=SELECTOLAX).parse(HTML)
+
+        for extractor in extractors:
+            self.assertEqual(extractor.run(website), extractor.run(reference), msg=type(extractor).__name__)
+
+    def test_soup_is_built_on_demand(self):
+        website = Website("https://example.com/", html_parser=SELECTOLAX).parse(HTML)
+        self.assertEqual(website.find("b").text, "world")
+        self.assertEqual(website.find("b", string="world").name, "b")    # not supported by selectolax
+        self.assertEqual(website.body.find("title"), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
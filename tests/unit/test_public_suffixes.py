@@ -0,0 +1,58 @@
+import unittest
+import os
+import tempfile
+
+import tld
+import tld.exceptions
+
+from scrawler.public_suffixes import PublicSuffixList, get_public_suffix_list
+from scrawler.utils.web_utils import ParsedUrl
+
+
+class TestPublicSuffixList(unittest.TestCase):
+    def test_suffix_length(self):
+        public_suffix_list = get_public_suffix_list()
+        self.assertEqual(public_suffix_list.get_suffix_length(["www", "example", "co", "uk"]), 2)
+        self.assertEqual(public_suffix_list.get_suffix_length(["example", "com"]), 1)
+        self.assertEqual(public_suffix_list.get_suffix_length(["www", "city", "kawasaki", "jp"]), 2)    # exception rule
+        self.assertEqual(public_suffix_list.get_suffix_length(["a", "b", "kawasaki", "jp"]), 3)     # wildcard rule
+        self.assertEqual(public_suffix_list.get_suffix_length(["localhost"]), 0)
+
+    def test_local_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "public_suffix_list.dat")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("// comment\n\ntest\n*.wild.test\n!keep.wild.test\n!also.wild.test\n")
+            public_suffix_list = PublicSuffixList(path)
+
+        self.assertEqual(len(public_suffix_list), 4)
+        self.assertEqual(public_suffix_list.get_suffix_length(["a", "b", "wild", "test"]), 3)
+        self.assertEqual(public_suffix_list.get_suffix_length(["a", "keep", "wild", "test"]), 2)     # both exceptions apply
+        self.assertEqual(public_suffix_list.get_suffix_length(["a", "also", "wild", "test"]), 2)
+        self.assertEqual(public_suffix_list.get_suffix_length(["example", "com"]), 0)
+        self.assertEqual(ParsedUrl("https://www.example.test/", public_suffix_list=public_suffix_list).fld, "example.test")
+
+    def test_missing_file(self):
+        self.assertRaises(tld.exceptions.TldIOError, PublicSuffixList, "/nonexistent/public_suffix_list.dat")
+
+
+class TestParsedUrl(unittest.TestCase):
+    def test_same_parts_as_tld(self):
+        urls = ["https://example.com", "http://user:pw@Sub.Example.COM:8080/a/b?c=1#d", "https://www.example.co.uk/",
+                "https://co.uk/", "https://www.city.kawasaki.jp/", "https://foo.blogspot.com/", "https://example.com./",
+                "https://a..example.com/", "https://münchen.de/", "https://xn--mnchen-3ya.de/"]
+        for url in urls:
+            expected = tld.get_tld(url, as_object=True)
+            parsed_url = ParsedUrl(url)
+            self.assertEqual((parsed_url.subdomain, parsed_url.domain, parsed_url.fld, parsed_url.tld, parsed_url.hostname),
+                             (expected.subdomain, expected.domain, expected.fld, expected.tld, expected.parsed_url.hostname), url)
+
+    def test_errors(self):
+        for url in ("example.com", "mailto:info@example.com", "https:///path"):
+            self.assertRaises(tld.exceptions.TldBadUrl, ParsedUrl, url)
+        for url in ("https://localhost/", "https://example.unknowntld/"):
+            self.assertRaises(tld.exceptions.TldDomainNotFound, ParsedUrl, url)
+
+
+if __name__ == "__main__":
+    unittest.main()
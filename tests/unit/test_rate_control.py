@@ -0,0 +1,70 @@
+import unittest
+from email.utils import formatdate
+import time
+
+from scrawler.rate_control import AdaptiveRateController, parse_retry_after
+from scrawler.utils.web_utils import StoredResponse
+
+HOST = "www.example.com"
+
+
+class TestAdaptiveRateController(unittest.TestCase):
+    def setUp(self) -> None:
+        self.controller = AdaptiveRateController(initial_delay=0.5, min_delay=0.1, max_delay=10,
+                                                 rate_increase=1, decrease_factor=0.5)
+        self.controller.add_host(HOST)
+
+    def record_status(self, status: int, latency: float = 0.0, headers: dict = None):
+        self.controller.record(HOST, latency, response=StoredResponse(f"https://{HOST}/", status, headers))
+
+    def test_additive_increase(self):
+        self.record_status(200)
+        self.assertAlmostEqual(self.controller.host_rates[HOST], 3)     # 2 + 1 requests per second
+        for _ in range(20):
+            self.record_status(200)
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 0.1)    # min_delay
+
+    def test_multiplicative_decrease(self):
+        self.record_status(429)
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 1.0)
+        self.record_status(503, latency=0.5)   # sent before the last decrease
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 1.0)
+        self.record_status(503)
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 2.0)
+
+        self.controller.record(HOST, 0.0, error=TimeoutError())
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 4.0)
+        self.controller.record(HOST, 0.0, error=ValueError("Content type is not text"))    # not an overload signal
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 4.0)
+
+    def test_retry_after(self):
+        self.record_status(429, headers={"Retry-After": "5"})
+        self.assertAlmostEqual(self.controller.get_delay(HOST), 1.0)
+        self.assertGreater(self.controller.wait_time(HOST), 4.9)
+
+    def test_rising_latency(self):
+        for _ in range(5):
+            self.record_status(200, latency=0.1)
+        delay = self.controller.get_delay(HOST)
+        for _ in range(10):
+            self.record_status(200, latency=1.0)
+        self.assertGreater(self.controller.get_delay(HOST), delay)
+
+    def test_min_delay_per_host(self):
+        self.controller.add_host(HOST, min_delay=2)   # e.g. Crawl-delay
+        self.assertEqual(self.controller.get_delay(HOST), 2)
+        self.record_status(200)
+        self.assertEqual(self.controller.get_delay(HOST), 2)
+        self.assertEqual(self.controller.get_delay("unknown.example.com"), 0.5)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrawler.redirects import RedirectCache, get_meta_refresh_url, get_refresh_url
+from scrawler.utils.web_utils import get_redirected_url
+
+
+class TestMetaRefresh(unittest.TestCase):
+    def test_meta_refresh_url(self):
+        base_url = "https://example.com/dir/page"
+        self.assertEqual(get_meta_refresh_url('<head><meta http-equiv="refresh" content="0; url=/new"></head>', base_url),
+                         "https://example.com/new")
+        self.assertEqual(get_meta_refresh_url("<head><META CONTENT='5;URL=other?a=1&amp;b=2' HTTP-EQUIV=Refresh></head>", base_url),
+                         "https://example.com/dir/other?a=1&b=2")
+        self.assertIsNone(get_meta_refresh_url('<head><meta http-equiv="refresh" content="30"></head>', base_url))
+        self.assertIsNone(get_meta_refresh_url('<head><meta name="refresh" content="0; url=/new"></head>', base_url))
+
+    def test_only_head_is_scanned(self):
+        html = '<html><head><title>Page</title></head><body><meta http-equiv="refresh" content="0; url=/new"></body></html>'
+        self.assertIsNone(get_meta_refresh_url(html, "https://example.com/"))
+
+    def test_refresh_header(self):
+        self.assertEqual(get_refresh_url("0;url='https://example.org/'", "https://example.com/"), "https://example.org/")
+        self.assertIsNone(get_refresh_url("10", "https://example.com/"))
+
+
+class TestRedirectCache(unittest.TestCase):
+    def test_resolve(self):
+        cache = RedirectCache()
+        cache.add_chain(["http://example.com/", "https://example.com/", "https://www.example.com/"])
+        self.assertEqual(cache.resolve("http://example.com/"), "https://www.example.com/")
+        # only the scheme and the host have changed, so the other URLs of the host are redirected in the same way
+        self.assertEqual(cache.resolve("http://example.com/about?lang=en"), "https://www.example.com/about?lang=en")
+
+        cache.add("https://www.example.com/old", "https://www.example.com/new")
+        self.assertEqual(cache.resolve("http://example.com/old"), "https://www.example.com/new")
+        self.assertEqual(cache.resolve("https://example.org/old"), "https://example.org/old")
+
+        cache.clear()
+        self.assertEqual(cache.resolve("http://example.com/"), "http://example.com/")
+
+    def test_expiry_and_loops(self):
+        cache = RedirectCache(ttl=0.05)
+        cache.add_chain(["https://example.com/a", "https://example.com/b", "https://example.com/a"])
+        self.assertIn(cache.resolve("https://example.com/a"), ("https://example.com/a", "https://example.com/b"))
+        time.sleep(0.1)
+        self.assertEqual(cache.resolve("https://example.com/b"), "https://example.com/b")
+
+
+class RedirectingHandler(BaseHTTPRequestHandler):
+    requested_paths = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with RedirectingHandler.lock:
+            RedirectingHandler.requested_paths.append(self.path)
+        host = self.headers["Host"]
+        if host.startswith("localhost"):     # redirects everything to the same path on 127.0.0.1
+            self.send_response(301)
+            self.send_header("Location", f"http://{host.replace('localhost', '127.0.0.1')}{self.path}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/meta":
+            body = b'<html><head><meta http-equiv="refresh" content="0; url=/start"></head></html>'
+        else:
+            body = b"<html><head><title>Page</title></head></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRedirectCaching(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+        RedirectingHandler.requested_paths = []
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_redirects_are_cached(self):
+        cache = RedirectCache()
+        self.assertEqual(get_redirected_url(f"http://localhost:{self.port}/meta", redirect_cache=cache),
+                         f"http://127.0.0.1:{self.port}/start")
+        self.assertEqual(RedirectingHandler.requested_paths, ["/meta", "/meta", "/start"])
+
+        # the host redirect is known, so the second start URL on the host is requested directly
+        RedirectingHandler.requested_paths = []
+        self.assertEqual(get_redirected_url(f"http://localhost:{self.port}/other", redirect_cache=cache),
+                         f"http://127.0.0.1:{self.port}/other")
+        self.assertEqual(RedirectingHandler.requested_paths, ["/other"])
+
+
+if __name__ == "__main__":
+    unittest.main()
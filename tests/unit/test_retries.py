@@ -0,0 +1,58 @@
+import unittest
+import time
+
+import requests
+
+from scrawler.retries import CircuitBreaker, is_transient_error, get_retry_delay
+
+
+def http_error(status: int, headers: dict = None) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class TestRetryDelay(unittest.TestCase):
+    def test_is_transient_error(self):
+        self.assertTrue(is_transient_error(requests.ConnectionError()))
+        self.assertTrue(is_transient_error(TimeoutError()))
+        self.assertTrue(is_transient_error(http_error(503)))
+        self.assertFalse(is_transient_error(http_error(404)))
+        self.assertFalse(is_transient_error(ValueError("Content type is not text: application/pdf")))
+
+    def test_exponential_backoff(self):
+        for attempt, (lowest, highest) in enumerate([(0.5, 1), (1, 2), (2, 4)]):
+            delay = get_retry_delay(requests.ConnectionError(), attempt, max_retries=3, backoff=1)
+            self.assertTrue(lowest <= delay <= highest, delay)
+        self.assertIsNone(get_retry_delay(requests.ConnectionError(), 3, max_retries=3))
+        self.assertIsNone(get_retry_delay(http_error(404), 0, max_retries=3))
+
+    def test_retry_after(self):
+        self.assertEqual(get_retry_delay(http_error(429, {"Retry-After": "7"}), 0, max_retries=1), 7)
+        self.assertIsNone(get_retry_delay(http_error(503, {"Retry-After": "3600"}), 0, max_retries=1, max_backoff=60))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_and_reset(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.1)
+        for _ in range(2):
+            breaker.record_failure("down.example.com")
+        breaker.record_success("down.example.com")     # only consecutive failures count
+        for _ in range(2):
+            breaker.record_failure("down.example.com")
+        self.assertFalse(breaker.is_open("down.example.com"))
+
+        with self.assertLogs(level="WARNING"):
+            breaker.record_failure("down.example.com")
+        self.assertEqual(breaker.open_hosts, ["down.example.com"])
+        self.assertFalse(breaker.is_open("up.example.com"))
+
+        time.sleep(0.15)
+        self.assertFalse(breaker.is_open("down.example.com"))   # let the next request through
+        breaker.record_failure("down.example.com")
+        self.assertTrue(breaker.is_open("down.example.com"))
+
+
+if __name__ == "__main__":
+    unittest.main()
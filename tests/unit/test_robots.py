@@ -0,0 +1,71 @@
+import unittest
+import os
+import tempfile
+import time
+
+from scrawler.robots import RobotsCache, parse_robots_txt, get_crawl_delay
+
+
+class TestRobotsCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "robots.sqlite")
+        self.URL = "https://example.com/robots.txt"
+        self.ROBOTS_TXT = "User-agent: *\nDisallow: /private\n"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_get_and_set(self):
+        cache = RobotsCache()
+        self.assertEqual(cache.get(self.URL), (False, None))
+
+        cache.set(self.URL, self.ROBOTS_TXT)
+        found, robots_txt_parser = cache.get(self.URL)
+        self.assertTrue(found)
+        self.assertFalse(robots_txt_parser.can_fetch("*", "https://example.com/private/page"))
+
+        cache.set("https://unavailable.com/robots.txt", None)     # could not be retrieved
+        self.assertEqual(cache.get("https://unavailable.com/robots.txt"), (True, None))
+
+        cache.clear()
+        self.assertEqual(cache.get(self.URL), (False, None))
+
+    def test_expiry(self):
+        cache = RobotsCache(ttl=0.05, negative_ttl=0)
+        cache.set(self.URL, self.ROBOTS_TXT)
+        cache.set("https://unavailable.com/robots.txt", None)
+        self.assertTrue(cache.get(self.URL)[0])
+        self.assertFalse(cache.get("https://unavailable.com/robots.txt")[0])
+
+        time.sleep(0.1)
+        self.assertFalse(cache.get(self.URL)[0])
+
+    def test_on_disk(self):
+        cache = RobotsCache(self.path)
+        cache.set(self.URL, self.ROBOTS_TXT)
+        cache.close()
+
+        cache = RobotsCache(self.path)     # the next run
+        found, robots_txt_parser = cache.get(self.URL)
+        self.assertTrue(found)
+        self.assertTrue(robots_txt_parser.can_fetch("*", "https://example.com/public"))
+        cache.close()
+
+
+class TestGetCrawlDelay(unittest.TestCase):
+    def test_crawl_delay(self):
+        robots_txt_parser = parse_robots_txt("https://example.com/robots.txt",
+                                             "User-agent: scrawler\nCrawl-delay: 0.2\n\n"
+                                             "User-agent: *\nCrawl-delay: 2\nRequest-rate: 1/10\n")
+        self.assertEqual(get_crawl_delay(robots_txt_parser, "scrawler/0.3"), 0.2)  # fractional values are supported
+        self.assertEqual(get_crawl_delay(robots_txt_parser), 10.0)     # the longer delay of both fields
+
+    def test_no_crawl_delay(self):
+        robots_txt_parser = parse_robots_txt("https://example.com/robots.txt", "User-agent: *\nDisallow:\n")
+        self.assertEqual(get_crawl_delay(robots_txt_parser, default=0.5), 0.5)
+        self.assertIsNone(get_crawl_delay(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import asyncio
+
+from scrawler.frontier import CrawlFrontier
+from scrawler.scheduling import HostScheduler
+
+
+class TestHostScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.START_URLS = ["https://example.com/", "https://example.org/"]
+
+    def run_scheduler(self, scheduler: HostScheduler, frontiers: list) -> list:
+        """Hand out all URLs and return the order of the frontier indices."""
+        async def run():
+            for i, frontier in enumerate(frontiers):
+                await scheduler.add(i, frontier)
+            await scheduler.close()
+
+            order = []
+            while True:
+                job = await scheduler.next()
+                if job is None:
+                    return order
+                index, frontier, url, steps_from_start_page = job
+                order.append(index)
+                found_urls = [f"/{i}" for i in range(3)] if (steps_from_start_page == 0) else []
+                frontier.mark_processed(url, steps_from_start_page, found_urls)
+                await scheduler.done(index)
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_round_robin(self):
+        frontiers = [CrawlFrontier(url) for url in self.START_URLS]
+        order = self.run_scheduler(HostScheduler(host_delay=0), frontiers)
+        self.assertEqual(order, [0, 1, 0, 1, 0, 1, 0, 1])
+
+    def test_finished_frontiers_are_reported(self):
+        finished = []
+        frontiers = [CrawlFrontier(url, max_no_urls=2) for url in self.START_URLS]
+        scheduler = HostScheduler(host_delay=0, on_frontier_finished=lambda i, f: finished.append(i))
+        self.run_scheduler(scheduler, frontiers)
+        self.assertEqual(sorted(finished), [0, 1])
+
+    def test_host_delay(self):
+        scheduler = HostScheduler(host_delay=0)
+        scheduler.set_host_delay("example.org", 0.01)
+        order = self.run_scheduler(scheduler, [CrawlFrontier(url) for url in self.START_URLS])
+        self.assertEqual(len(order), 8)
+        self.assertEqual(scheduler.host_delays, {"example.com": 0, "example.org": 0.01})
+
+
+if __name__ == "__main__":
+    unittest.main()
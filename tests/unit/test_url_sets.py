@@ -0,0 +1,42 @@
+import unittest
+
+from scrawler.url_sets import FingerprintSet, BloomFilter, create_url_set, EXACT, FINGERPRINTS, BLOOM_FILTER
+
+
+class TestFingerprintSet(unittest.TestCase):
+    def test_membership_and_growth(self):
+        urls = [f"https://example.com/page/{i}" for i in range(5000)]
+        url_set = FingerprintSet(urls[:10], initial_capacity=8)
+        url_set.update(urls)
+        url_set.add(urls[0])
+
+        self.assertEqual(len(url_set), len(urls))
+        self.assertTrue(all(url in url_set for url in urls))
+        self.assertFalse(any(f"https://example.com/other/{i}" in url_set for i in range(5000)))
+        self.assertLessEqual(url_set.nbytes, 24 * len(urls))
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives_and_bounded_error_rate(self):
+        urls = [f"https://example.com/page/{i}" for i in range(20000)]
+        url_set = BloomFilter(urls, error_rate=0.01, capacity=1000)    # has to grow several times
+
+        self.assertTrue(all(url in url_set for url in urls))
+        false_positives = sum(f"https://example.com/other/{i}" in url_set for i in range(20000))
+        self.assertLess(false_positives, 0.01 * 20000)
+        self.assertGreater(len(url_set), 0.99 * len(urls))
+
+    def test_invalid_error_rate(self):
+        self.assertRaises(ValueError, BloomFilter, error_rate=0)
+
+
+class TestCreateUrlSet(unittest.TestCase):
+    def test_kinds(self):
+        self.assertEqual(create_url_set(EXACT, ["https://example.com/"]), {"https://example.com/"})
+        self.assertIsInstance(create_url_set(FINGERPRINTS), FingerprintSet)
+        self.assertIsInstance(create_url_set(BLOOM_FILTER, bloom_filter_error_rate=0.001), BloomFilter)
+        self.assertRaises(ValueError, create_url_set, "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+
+from scrawler.utils.web_utils import StoredResponse, get_html, get_redirected_url
+from scrawler.warc import WarcWriter, WarcArchive
+
+
+class TestWarc(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "crawl.warc.gz")
+        self.BODY = "<html><title>Zürich</title></html>".encode("utf-8")
+
+        writer = WarcWriter(self.path)
+        response = StoredResponse("https://www.example.com/", 200, {"Content-Type": "text/html; charset=utf-8",
+                                                                    "Content-Encoding": "gzip", "Server": "nginx"}, reason="OK")
+        response.history = [StoredResponse("http://example.com/", 301, {"Location": "https://www.example.com/"})]
+        writer.write_response(response, self.BODY)
+        writer.write_response(StoredResponse("https://www.example.com/image.png", 200, {"Content-Type": "image/png"}), b"\x89PNG")
+        writer.close()
+        self.assertEqual(writer.no_records, 3)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_replay(self):
+        archive = WarcArchive(self.directory.name)
+        self.assertEqual(len(archive), 3)
+
+        response = archive.get("http://example.com")    # follows the recorded redirect
+        self.assertEqual((response.url, response.status, response.reason), ("https://www.example.com/", 200, "OK"))
+        self.assertEqual((response.body, response.text), (self.BODY, "<html><title>Zürich</title></html>"))
+        self.assertEqual(response.headers["server"], "nginx")
+        self.assertNotIn("content-encoding", response.headers)     # the recorded body is already decoded
+
+        self.assertEqual(archive.get("http://example.com/", follow_redirects=False).status, 301)
+        self.assertIsNone(archive.get("https://www.example.com/not-recorded"))
+
+    def test_get_html_from_archive(self):
+        archive = WarcArchive([self.path])
+        text, response = get_html("https://www.example.com/", warc_archive=archive, return_response_object=True)
+        self.assertEqual((text, response.status_code), ("<html><title>Zürich</title></html>", 200))
+        self.assertEqual(get_redirected_url("http://example.com/", warc_archive=archive), "https://www.example.com/")
+
+        self.assertRaises(ValueError, get_html, "https://www.example.com/image.png", warc_archive=archive)   # content type
+        self.assertRaises(ValueError, get_html, "https://www.example.com/not-recorded", warc_archive=archive)
+
+
+if __name__ == "__main__":
+    unittest.main()
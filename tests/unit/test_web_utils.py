@@ -1,10 +1,15 @@
 import unittest
 import asyncio
+import pickle
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import aiohttp
 
+from scrawler.backends.multithreading_backend import get_thread_session
 from scrawler.utils.web_utils import (async_get_redirected_url, async_get_robot_file_parser, get_directory_depth, is_media_file,
-                                      is_same_host, strip_unnecessary_url_parts)
+                                      is_same_host, strip_unnecessary_url_parts, StoredResponse, create_session, get_html,
+                                      parse_url, SameHostPredicate, filter_urls)
 
 
 class TestGetRedirectedUrl(unittest.TestCase):
@@ -107,6 +112,10 @@ class TestGetDirectoryDepth(unittest.TestCase):
         for url, depth_target in self.SAMPLES.items():
             self.assertEqual(get_directory_depth(url), depth_target)
 
+    def test_parsed_urls(self):
+        for url, depth_target in self.SAMPLES.items():
+            self.assertEqual(get_directory_depth(parse_url(url)), depth_target)
+
 
 class TestIsMediaFile(unittest.TestCase):
     def setUp(self) -> None:
@@ -139,6 +148,40 @@ class TestIsSameHost(unittest.TestCase):
         for url1, url2, mode in self.SAMPLES_DIFFERENT_HOST:
             self.assertFalse(is_same_host(url1, url2, mode=mode))
 
+    def test_unparseable_urls(self):
+        for mode in ("hostname", "subdomain1", "invalid mode"):
+            self.assertFalse(is_same_host("not a url", "https://example.com/", mode=mode))
+            self.assertFalse(is_same_host("https://example.com/", "mailto:info@example.com", mode=mode))
+        self.assertRaises(ValueError, is_same_host, "https://example.com/", "https://example.com/", mode="invalid mode")
+
+    def test_predicate_matches_is_same_host(self):
+        base_url = "https://www.blog.example.co.uk/dir1/dir2/index.html"
+        urls = ["https://www.blog.example.co.uk/dir1/other.html", "https://shop.blog.example.co.uk/dir1/dir2/",
+                "https://blog.example.co.uk/", "http://www.blog.example.co.uk/dir1/dir2/a", "https://example.org/dir1/dir2/",
+                "https://www.other.example.co.uk/dir1/", "not a url"]
+        for mode in ("domain", "fld", "hostname", "subdomain1", "subdomain2", "directory1", "directory2"):
+            is_same_host_as_base_url = SameHostPredicate(base_url, mode=mode)
+            for url in urls:
+                self.assertEqual(is_same_host_as_base_url(url), is_same_host(url, base_url, mode=mode), (url, mode))
+
+        self.assertRaises(ValueError, SameHostPredicate, base_url, mode="subdomainX")
+        self.assertRaises(ValueError, SameHostPredicate, base_url, mode="host")
+        self.assertFalse(SameHostPredicate("not a url", mode="hostname")("https://example.com/"))
+
+
+class TestParseUrl(unittest.TestCase):
+    def test_parsed_urls_are_reused(self):
+        url = "https://www.example.com/dir/page.html?a=1"
+        self.assertIs(parse_url(url), parse_url(url))
+        self.assertEqual(parse_url(url).path, "/dir/page.html")
+
+    def test_filter_urls(self):
+        urls = {"https://www.example.com/a", "https://www.example.com/b.jpg", "https://other.org/", "mailto:info@example.com"}
+        filtered, discarded = filter_urls(urls, filter_non_standard_schemes=True, filter_media_files=True, blocklist=(),
+                                          filter_foreign_urls="fld", base_url="https://www.example.com/", return_discarded=True)
+        self.assertEqual(filtered, {"https://www.example.com/a"})
+        self.assertEqual(discarded, urls - filtered)
+
 
 class TestStripUnnecessaryUrlParts(unittest.TestCase):
     def setUp(self) -> None:
@@ -170,5 +213,64 @@ class TestStripUnnecessaryUrlParts(unittest.TestCase):
                              target)
 
 
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keeps the connection open
+    client_ports = set()
+
+    def do_GET(self):
+        KeepAliveHandler.client_ports.add(self.client_address[1])   # one port per connection
+        body = b"%PDF-1.4" * 1000 if self.path.endswith(".pdf") else b"<html><title>Page</title></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf" if self.path.endswith(".pdf") else "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        KeepAliveHandler.client_ports.clear()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        session = create_session()
+        for page in range(3):
+            self.assertIn("Page", get_html(f"{self.base_url}/page{page}", session=session))
+        self.assertEqual(len(KeepAliveHandler.client_ports), 1)
+
+        with self.assertRaises(ValueError):     # rejected response must not block the session
+            get_html(f"{self.base_url}/file.pdf", session=session)
+        self.assertIn("Page", get_html(f"{self.base_url}/page3", session=session))
+        session.close()
+
+    def test_thread_session(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(get_thread_session()))
+        thread.start()
+        thread.join()
+        self.assertIs(get_thread_session(), get_thread_session())
+        self.assertIsNot(sessions[0], get_thread_session())
+
+
+class TestStoredResponse(unittest.TestCase):
+    def test_pickle(self):
+        response = StoredResponse("https://example.com/", 200, headers={"Content-Type": "text/html; charset=ISO-8859-1"})
+        restored = pickle.loads(pickle.dumps(response))
+
+        self.assertEqual(restored.status_code, 200)
+        self.assertEqual(restored.headers["content-type"], "text/html; charset=ISO-8859-1")
+        self.assertEqual(restored.charset, "ISO-8859-1")
+
+
+
 if __name__ == "__main__":
     unittest.main()